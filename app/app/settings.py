@@ -24,6 +24,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.db_routing.PrimaryStickinessMiddleware',
 ]
 
 REST_FRAMEWORK = {
@@ -61,8 +62,65 @@ DATABASES = {
     }
 }
 
+# Optional streaming replica for tracking, lookup and label cache reads. Without
+# DB_REPLICA_HOST, or while the replica is unreachable, all reads use the primary.
+if os.environ.get('DB_REPLICA_HOST'):
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.environ.get('DB_REPLICA_HOST'),
+        'PORT': os.environ.get('DB_REPLICA_PORT', ''),
+        'CONN_HEALTH_CHECKS': True,
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['core.db_routing.ReadReplicaRouter']
+READ_REPLICA_ALIAS = 'replica'
+# Reads stay on the primary this long after a client's write, covering replication lag
+READ_REPLICA_STICKY_SECONDS = int(os.environ.get('READ_REPLICA_STICKY_SECONDS', 5))
+# An unreachable replica is skipped for this long before it is tried again
+READ_REPLICA_RETRY_SECONDS = int(os.environ.get('READ_REPLICA_RETRY_SECONDS', 30))
+
 DHL_WEBHOOK_API_KEY = os.environ.get('DHL_WEBHOOK_API_KEY', 'dhl-webhook-secret-key-2024')
 
+# Tracking responses are cached per reference. Statuses are written by the
+# process_webhook_inbox worker, so the cache must be shared with it for its
+# invalidations to reach the web processes: the default is a directory shared
+# by every process on the host, so hits never touch the database. Deployments
+# spanning several hosts point TRACKING_CACHE_BACKEND/LOCATION at Redis or
+# memcached; LocMemCache is only suitable for a single-process dev server.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    },
+    'tracking': {
+        'BACKEND': os.environ.get('TRACKING_CACHE_BACKEND', 'django.core.cache.backends.filebased.FileBasedCache'),
+        'LOCATION': os.environ.get('TRACKING_CACHE_LOCATION', str(BASE_DIR / 'tracking_cache')),
+        'TIMEOUT': int(os.environ.get('TRACKING_CACHE_TIMEOUT', 300)),
+        'OPTIONS': {
+            'MAX_ENTRIES': int(os.environ.get('TRACKING_CACHE_MAX_ENTRIES', 50000)),
+        },
+    },
+}
+
+# Downloaded label documents, stored by content hash; least recently used
+# documents are evicted down to 90% of LABEL_STORE_MAX_BYTES once the store exceeds it.
+LABEL_STORE_DIR = os.environ.get('LABEL_STORE_DIR', str(BASE_DIR / 'label_store'))
+LABEL_STORE_MAX_BYTES = int(os.environ.get('LABEL_STORE_MAX_BYTES', 1024 * 1024 * 1024))
+# Set to X-Accel-Redirect (nginx) or X-Sendfile (Apache) to let the web server
+# send label files from an internal location mapped onto LABEL_STORE_DIR.
+LABEL_STORE_SENDFILE_HEADER = os.environ.get('LABEL_STORE_SENDFILE_HEADER', '')
+LABEL_STORE_SENDFILE_PREFIX = os.environ.get('LABEL_STORE_SENDFILE_PREFIX', '/protected/labels/')
+
+# Queue a label fetch for every new shipment so the first print is a cache hit;
+# the queue is drained by the prefetch_labels command at a capped rate per courier.
+LABEL_PREFETCH_ENABLED = os.environ.get('LABEL_PREFETCH_ENABLED', 'false').lower() in ('1', 'true', 'yes')
+LABEL_PREFETCH_RATE_PER_SECOND = float(os.environ.get('LABEL_PREFETCH_RATE_PER_SECOND', 5))
+# Label URL lifetime for couriers without CourierConfig.label_url_ttl_seconds
+# (0 = never expires). refresh_labels re-fetches labels this long before expiry.
+LABEL_URL_TTL_SECONDS = int(os.environ.get('LABEL_URL_TTL_SECONDS', 0))
+LABEL_REFRESH_LEAD_SECONDS = int(os.environ.get('LABEL_REFRESH_LEAD_SECONDS', 900))
+# Labels fetched concurrently while a merged print run PDF is streamed
+LABEL_PRINT_RUN_WORKERS = int(os.environ.get('LABEL_PRINT_RUN_WORKERS', 8))
+
 LANGUAGE_CODE = 'en-us'
 
 TIME_ZONE = 'UTC'
@@ -0,0 +1,207 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Optional, TypeVar
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class RoutingState:
+    """Read intent and primary stickiness of one request, or of one worker thread outside requests."""
+
+    def __init__(self, pinned_until: float = 0.0):
+        self.replica_reads = 0
+        # Reads routed to the replica so far, to tell replica failures from primary ones
+        self.routed_to_replica = 0
+        self.derived_writes = 0
+        self.wrote = False
+        self.pinned_until = pinned_until
+
+    def pinned_to_primary(self) -> bool:
+        return self.wrote or time.time() < self.pinned_until
+
+
+_routing_state: ContextVar[Optional[RoutingState]] = ContextVar('routing_state', default=None)
+
+
+def routing_state() -> RoutingState:
+    # Mutated in place rather than re-set, so changes made in a copied context stay visible
+    state = _routing_state.get()
+    if state is None:
+        state = RoutingState()
+        _routing_state.set(state)
+    return state
+
+
+@contextmanager
+def replica_reads():
+    """Send the reads made inside the block to the read replica when one is usable."""
+    state = routing_state()
+    state.replica_reads += 1
+    try:
+        yield
+    finally:
+        state.replica_reads -= 1
+
+
+@contextmanager
+def derived_writes():
+    """
+    Mark the writes made inside the block as derived from data already on the
+    primary, such as backfilled projections, so they do not pin reads to it.
+    """
+    state = routing_state()
+    state.derived_writes += 1
+    try:
+        yield
+    finally:
+        state.derived_writes -= 1
+
+
+def read_from_replica(read: Callable[[], T], fallback_on_miss: bool = True) -> T:
+    """
+    Run a read on the read replica.
+
+    The replica may lag behind the primary, so an empty result read from it is
+    read again from the primary unless fallback_on_miss is False. If the
+    replica fails mid-read it is marked down and the read is retried on the
+    primary.
+    """
+    state = routing_state()
+    routed_before = state.routed_to_replica
+    try:
+        with replica_reads():
+            result = read()
+    except OperationalError as e:
+        alias = ReadReplicaRouter.replica_alias()
+        if alias is None or state.routed_to_replica == routed_before:
+            raise
+        replica_health.mark_down(alias, e)
+        return read()
+    if not result and fallback_on_miss and state.routed_to_replica != routed_before:
+        return read()
+    return result
+
+
+class ReplicaHealth:
+    """Tracks whether a replica can be connected to, and skips it for a while after a failure."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._down_until = {}
+
+    def available(self, alias: str) -> bool:
+        if time.monotonic() < self._down_until.get(alias, 0.0):
+            return False
+        try:
+            connections[alias].ensure_connection()
+        except Exception as e:
+            self.mark_down(alias, e)
+            return False
+        return True
+
+    def mark_down(self, alias: str, error: Exception) -> None:
+        with self._lock:
+            self._down_until[alias] = time.monotonic() + settings.READ_REPLICA_RETRY_SECONDS
+        # Drop a broken connection so the next check reconnects
+        connections[alias].close_if_unusable_or_obsolete()
+        logger.warning(f"ReplicaHealth: Replica '{alias}' unavailable, reading from primary: {str(error)}")
+
+
+# Global health tracker shared by all router instances
+replica_health = ReplicaHealth()
+
+
+class ReadReplicaRouter:
+    """
+    Routes reads made under replica_reads() to READ_REPLICA_ALIAS.
+
+    Everything else, all writes and reads inside a transaction on the primary
+    go to the primary. After a write, reads stay on the primary for the rest of
+    the request or worker thread, and for READ_REPLICA_STICKY_SECONDS on later
+    requests through PrimaryStickinessMiddleware. Cache entries and writes
+    under derived_writes() do not count. Without a configured or reachable
+    replica every read goes to the primary.
+    """
+
+    # app_label of the pseudo-model DatabaseCache routes its queries with
+    CACHE_APP_LABEL = 'django_cache'
+
+    @staticmethod
+    def replica_alias() -> Optional[str]:
+        alias = getattr(settings, 'READ_REPLICA_ALIAS', None)
+        if not alias or alias not in settings.DATABASES:
+            return None
+        return alias
+
+    def db_for_read(self, model, **hints) -> Optional[str]:
+        state = routing_state()
+        if not state.replica_reads or state.pinned_to_primary():
+            return None
+        alias = self.replica_alias()
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block or not replica_health.available(alias):
+            return None
+        state.routed_to_replica += 1
+        return alias
+
+    def db_for_write(self, model, **hints) -> str:
+        state = routing_state()
+        if not state.derived_writes and model._meta.app_label != self.CACHE_APP_LABEL:
+            state.wrote = True
+        # Explicit, as instances read from the replica would otherwise be saved back to it
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints) -> Optional[bool]:
+        databases = {DEFAULT_DB_ALIAS, self.replica_alias()}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints) -> Optional[bool]:
+        if db == self.replica_alias() and db != DEFAULT_DB_ALIAS:
+            return False
+        return None
+
+
+class PrimaryStickinessMiddleware:
+    """
+    Gives each request its own routing state, and keeps a client on the
+    primary for READ_REPLICA_STICKY_SECONDS after a request of theirs wrote,
+    so they read their own writes while the replica catches up.
+    """
+
+    COOKIE_NAME = 'primary_until'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = RoutingState(pinned_until=self._pinned_until(request))
+        token = _routing_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _routing_state.reset(token)
+
+        if state.wrote:
+            sticky_seconds = settings.READ_REPLICA_STICKY_SECONDS
+            response.set_cookie(
+                self.COOKIE_NAME,
+                f'{time.time() + sticky_seconds:.3f}',
+                max_age=sticky_seconds,
+                httponly=True,
+                samesite='Lax'
+            )
+        return response
+
+    def _pinned_until(self, request) -> float:
+        try:
+            return float(request.COOKIES.get(self.COOKIE_NAME, 0))
+        except ValueError:
+            return 0.0
@@ -2,6 +2,7 @@ import logging
 from django.core.management.base import BaseCommand
 from django.db import transaction
 from core.models import Courier, CourierConfig
+from core.repositories.courier_repository import CourierRepository
 
 logger = logging.getLogger(__name__)
 
@@ -42,7 +43,7 @@ class Command(BaseCommand):
                     # Update supports_cancellation if it exists in the data
                     if 'supports_cancellation' in courier_data:
                         courier.supports_cancellation = courier_data['supports_cancellation']
-                        courier.save()
+                        CourierRepository().save(courier, update_fields=['supports_cancellation'])
                     
                     if created:
                         self.stdout.write(f'Created {courier_data["name"]} courier')
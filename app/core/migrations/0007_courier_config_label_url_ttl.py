@@ -0,0 +1,18 @@
+# Generated manually for per-courier label URL lifetimes
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_create_courier_configs_table'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='courierconfig',
+            name='label_url_ttl_seconds',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+    ]
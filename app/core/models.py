@@ -123,6 +123,11 @@ class CourierConfig(models.Model):
         blank=True, 
         null=True
     )
+    # Lifetime of the courier's label URLs, for couriers that do not report one
+    label_url_ttl_seconds = models.PositiveIntegerField(
+        blank=True,
+        null=True
+    )
     is_active = models.BooleanField(
         default=True
     )
@@ -0,0 +1,58 @@
+import logging
+from django.core.management.base import BaseCommand, CommandError
+from shipment.services.status.status_partition_service import StatusPartitionService
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Archive shipment_statuses partitions older than the retention window and detach them'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--older-than-months',
+            type=int,
+            default=12
+        )
+        parser.add_argument(
+            '--output-dir',
+            type=str,
+            default='archives/shipment_statuses'
+        )
+        parser.add_argument(
+            '--drop',
+            action='store_true',
+            help='Drop each partition after it has been archived'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true'
+        )
+
+    def handle(self, *args, **options):
+        older_than_months = options['older_than_months']
+
+        if older_than_months < 1:
+            raise CommandError('--older-than-months must be at least 1')
+        if not StatusPartitionService.is_supported():
+            raise CommandError('shipment_statuses partitioning requires PostgreSQL')
+
+        partitions = StatusPartitionService.partitions_older_than(older_than_months)
+        if not partitions:
+            self.stdout.write(self.style.SUCCESS('No partitions to archive'))
+            return
+
+        for name in partitions:
+            if options['dry_run']:
+                self.stdout.write(f'Would archive partition {name}')
+                continue
+
+            try:
+                path = StatusPartitionService.archive_partition(name, options['output_dir'])
+                if options['drop']:
+                    StatusPartitionService.drop_partition(name)
+            except Exception as e:
+                logger.error(f"ArchiveStatusPartitions: Failed to archive {name}: {str(e)}")
+                raise CommandError(f'Failed to archive {name}: {str(e)}')
+
+            self.stdout.write(self.style.SUCCESS(f'✓ Archived partition {name} to {path}'))
@@ -0,0 +1,148 @@
+import json
+import logging
+import time
+from collections import Counter
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import RequestFactory
+from rest_framework.decorators import api_view
+from rest_framework.response import Response
+from shipment import webhook_views
+from shipment.repositories.repository_factory import repositories
+from shipment.services.webhooks import DHLWebhookValidator, WebhookInboxProcessor
+
+logger = logging.getLogger(__name__)
+
+
+@api_view(['POST'])
+def drf_dhl_webhook(request):
+    """
+    Baseline: the webhook as the DRF view it used to be. It runs the same checks
+    and inbox writes as webhook_views.dhl_webhook, but goes through DRF's
+    request parsing and response rendering.
+    """
+    payload = request.data
+    if not isinstance(payload, list):
+        error_code, tracking_number = DHLWebhookValidator.check_event(payload)
+        if error_code:
+            return Response({'success': False, 'message': 'Invalid payload structure', 'error_code': error_code}, status=400)
+        inbox_entry = repositories.webhook_inbox.append(
+            WebhookInboxProcessor.COURIER,
+            payload,
+            WebhookInboxProcessor.lane_hash(tracking_number)
+        )
+        return Response({
+            'success': True,
+            'message': 'Webhook accepted for processing',
+            'data': {'inbox_id': inbox_entry.id, 'tracking_number': tracking_number}
+        }, status=202)
+
+    results = []
+    accepted = []
+    for index, event in enumerate(payload):
+        error_code, tracking_number = DHLWebhookValidator.check_event(event)
+        if error_code:
+            results.append({'index': index, 'success': False, 'error_code': error_code})
+        else:
+            result = {'index': index, 'success': True, 'tracking_number': tracking_number}
+            results.append(result)
+            accepted.append((event, result))
+    inbox_entries = repositories.webhook_inbox.append_many(
+        WebhookInboxProcessor.COURIER,
+        [event for event, _ in accepted],
+        [WebhookInboxProcessor.lane_hash(result['tracking_number']) for _, result in accepted]
+    )
+    for (_, result), inbox_entry in zip(accepted, inbox_entries):
+        result['inbox_id'] = inbox_entry.id
+    return Response({
+        'success': True,
+        'message': 'Webhook batch accepted for processing',
+        'data': {
+            'total': len(payload),
+            'accepted': len(accepted),
+            'rejected': len(payload) - len(accepted),
+            'results': results
+        }
+    }, status=202)
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure per-request CPU time of the DHL webhook view against a DRF baseline '
+        'doing the same work; queued inbox rows are rolled back'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--iterations',
+            type=int,
+            default=2000
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=0,
+            help='Send arrays of this many events instead of single events'
+        )
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        batch_size = options['batch_size']
+
+        if iterations < 1:
+            raise CommandError('--iterations must be at least 1')
+        if batch_size < 0:
+            raise CommandError('--batch-size must not be negative')
+
+        event = {
+            'tracking_number': '0034043333301020017128697',
+            'status': 'in_transit',
+            'location': {'countryCode': 'DEU', 'postalCode': '53113', 'addressLocality': 'Bonn'}
+        }
+        body = json.dumps([event] * batch_size if batch_size else event)
+        factory = RequestFactory()
+        headers = {'HTTP_X_API_KEY': settings.DHL_WEBHOOK_API_KEY}
+        views = (('Lean view', webhook_views.dhl_webhook), ('DRF baseline', drf_dhl_webhook))
+        timings = []
+
+        # Silence per-request logging so it does not dominate the measurement
+        logging.disable(logging.INFO)
+        try:
+            for name, view in views:
+                # Requests are built up front so only the view itself is timed
+                requests = [
+                    factory.post('/api/webhooks/dhl/', data=body, content_type='application/json', **headers)
+                    for _ in range(iterations)
+                ]
+                timings.append((name, *self._time_view(view, requests)))
+        finally:
+            logging.disable(logging.NOTSET)
+
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(f'DHL Webhook Benchmark:')
+        self.stdout.write(f'  Requests: {iterations} ({batch_size or 1} events each)')
+        for name, status_codes, cpu_elapsed, wall_elapsed in timings:
+            self.stdout.write(f'  {name}:')
+            self.stdout.write(f'    Status codes: {dict(status_codes)}')
+            self.stdout.write(f'    CPU per request: {cpu_elapsed / iterations * 1e6:.1f} µs')
+            self.stdout.write(f'    Wall per request: {wall_elapsed / iterations * 1e6:.1f} µs')
+        self.stdout.write(f'  CPU speedup: {timings[1][2] / timings[0][2]:.2f}x')
+        self.stdout.write('='*50)
+
+    @staticmethod
+    def _time_view(view, requests):
+        status_codes = Counter()
+        with transaction.atomic():
+            cpu_started = time.process_time()
+            wall_started = time.perf_counter()
+            for request in requests:
+                response = view(request)
+                # DRF responses are rendered by the handler, after the view returns
+                if hasattr(response, 'render'):
+                    response.render()
+                status_codes[response.status_code] += 1
+            cpu_elapsed = time.process_time() - cpu_started
+            wall_elapsed = time.perf_counter() - wall_started
+            transaction.set_rollback(True)
+        return status_codes, cpu_elapsed, wall_elapsed
@@ -0,0 +1,34 @@
+import logging
+from django.core.management.base import BaseCommand, CommandError
+from shipment.services.status.status_partition_service import StatusPartitionService
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Create monthly shipment_statuses partitions ahead of time'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--months-ahead',
+            type=int,
+            default=3
+        )
+
+    def handle(self, *args, **options):
+        months_ahead = options['months_ahead']
+
+        if months_ahead < 0:
+            raise CommandError('--months-ahead must not be negative')
+        if not StatusPartitionService.is_supported():
+            raise CommandError('shipment_statuses partitioning requires PostgreSQL')
+
+        logger.info(f"CreateStatusPartitions: Ensuring partitions {months_ahead} months ahead")
+        created = StatusPartitionService.ensure_future_partitions(months_ahead)
+
+        if not created:
+            self.stdout.write(self.style.SUCCESS('All partitions already exist'))
+            return
+
+        for name in created:
+            self.stdout.write(self.style.SUCCESS(f'✓ Created partition {name}'))
@@ -0,0 +1,68 @@
+import logging
+from django.core.management.base import BaseCommand, CommandError
+from shipment.models import ShipmentRequest
+from shipment.services.requests.request_importer import ShipmentRequestImporter
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Stream shipment requests from an NDJSON file into the database in chunks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            type=str
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=1000
+        )
+        parser.add_argument(
+            '--status',
+            type=str,
+            default='pending',
+            choices=[choice[0] for choice in ShipmentRequest.STATUS_CHOICES]
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        chunk_size = options['chunk_size']
+
+        if chunk_size < 1:
+            raise CommandError('--chunk-size must be at least 1')
+
+        self.stdout.write(f'Importing shipment requests from {path}...')
+        logger.info(f"ImportShipmentRequests: Starting import from {path} with chunk_size={chunk_size}")
+
+        importer = ShipmentRequestImporter(chunk_size=chunk_size, status=options['status'])
+
+        try:
+            with open(path, 'r', encoding='utf-8') as ndjson_file:
+                results = importer.import_lines(
+                    ndjson_file,
+                    on_error=self._report_error,
+                    on_chunk=self._report_progress
+                )
+        except OSError as e:
+            raise CommandError(f'Could not read {path}: {str(e)}')
+
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(f'Import Summary:')
+        self.stdout.write(f'  Total lines: {results["total"]}')
+        self.stdout.write(f'  Imported: {results["imported"]}')
+        self.stdout.write(f'  Skipped: {results["skipped"]}')
+        self.stdout.write(f'  Failed: {results["failed"]}')
+        self.stdout.write(f'  Elapsed: {results["elapsed_seconds"]}s ({results["rows_per_second"]} lines/s)')
+        self.stdout.write('='*50)
+
+    def _report_error(self, line_number, error):
+        self.stdout.write(self.style.ERROR(f'✗ Line {line_number}: {error}'))
+
+    def _report_progress(self, results):
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'✓ {results["imported"]} imported, {results["failed"]} failed - {results["rows_per_second"]} lines/s'
+            )
+        )
@@ -0,0 +1,67 @@
+import logging
+import time
+from django.core.management.base import BaseCommand, CommandError
+from shipment.services.labels.label_prefetch_service import LabelPrefetchService
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Fetch and cache labels of newly created shipments ahead of their first print'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=20
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling the prefetch queue instead of exiting once it is empty'
+        )
+        parser.add_argument(
+            '--idle-sleep',
+            type=float,
+            default=5.0
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        self.stdout.write('Starting label prefetch...')
+        logger.info(f"LabelPrefetchWorker: Starting with batch_size={batch_size}, loop={options['loop']}")
+
+        service = LabelPrefetchService()
+        totals = {'total': 0, 'fetched': 0, 'cached': 0, 'retried': 0, 'failed': 0}
+
+        try:
+            while True:
+                results = service.process_batch(batch_size)
+                for key in totals:
+                    totals[key] += results[key]
+
+                if results['total'] == 0:
+                    if not options['loop']:
+                        break
+                    time.sleep(options['idle_sleep'])
+                    continue
+
+                self.stdout.write(
+                    f'✓ Batch of {results["total"]}: {results["fetched"]} fetched, {results["cached"]} cached, '
+                    f'{results["retried"]} retried, {results["failed"]} failed'
+                )
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping label prefetch...')
+
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(f'Prefetch Summary:')
+        self.stdout.write(f'  Total: {totals["total"]}')
+        self.stdout.write(f'  Fetched: {totals["fetched"]}')
+        self.stdout.write(f'  Already cached: {totals["cached"]}')
+        self.stdout.write(f'  Retried: {totals["retried"]}')
+        self.stdout.write(f'  Failed: {totals["failed"]}')
+        self.stdout.write(f'  Still queued: {service.pending_count()}')
+        self.stdout.write('='*50)
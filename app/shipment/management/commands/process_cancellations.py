@@ -0,0 +1,67 @@
+import logging
+import time
+from django.core.management.base import BaseCommand, CommandError
+from shipment.services.cancellation.cancellation_queue_processor import CancellationQueueProcessor
+from shipment.repositories.repository_factory import repositories
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Cancel queued shipments with their couriers in batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling the cancellation queue instead of exiting once nothing is due'
+        )
+        parser.add_argument(
+            '--idle-sleep',
+            type=float,
+            default=5.0
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        self.stdout.write('Starting cancellation processing...')
+        logger.info(f"CancellationWorker: Starting with batch_size={batch_size}, loop={options['loop']}")
+
+        processor = CancellationQueueProcessor()
+        totals = {'total': 0, 'cancelled': 0, 'retried': 0, 'failed': 0}
+
+        try:
+            while True:
+                results = processor.process_batch(batch_size)
+                for key in totals:
+                    totals[key] += results[key]
+
+                if results['total'] == 0:
+                    if not options['loop']:
+                        break
+                    time.sleep(options['idle_sleep'])
+                    continue
+
+                self.stdout.write(
+                    f'✓ Batch of {results["total"]}: {results["cancelled"]} cancelled, '
+                    f'{results["retried"]} retried, {results["failed"]} failed'
+                )
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping cancellation processing...')
+
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(f'Cancellation Summary:')
+        self.stdout.write(f'  Total: {totals["total"]}')
+        self.stdout.write(f'  Cancelled: {totals["cancelled"]}')
+        self.stdout.write(f'  Retried: {totals["retried"]}')
+        self.stdout.write(f'  Failed: {totals["failed"]}')
+        self.stdout.write(f'  Still queued: {repositories.cancellation_queue.count_open()}')
+        self.stdout.write('='*50)
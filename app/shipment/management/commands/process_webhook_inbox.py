@@ -0,0 +1,144 @@
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from shipment.services.webhooks.webhook_inbox_processor import WebhookInboxProcessor
+from shipment.services.webhooks.tracking_number_filter import tracking_number_filter
+
+logger = logging.getLogger(__name__)
+
+
+def drain_lane(lane, lanes, batch_size, loop, idle_sleep, stdout=None):
+    """Process one lane until it is empty, or forever with loop; returns the totals."""
+    processor = WebhookInboxProcessor(lane=lane, lanes=lanes)
+    totals = {'total': 0, 'processed': 0, 'ignored': 0, 'retried': 0, 'failed': 0}
+
+    try:
+        while True:
+            tracking_number_filter.refresh()
+            results = processor.process_batch(batch_size)
+            for key in totals:
+                totals[key] += results[key]
+
+            # Another worker holds the lane; it is not drained until that batch commits
+            if results['lane_busy']:
+                time.sleep(idle_sleep)
+                continue
+
+            if results['total'] == 0:
+                if not loop:
+                    break
+                time.sleep(idle_sleep)
+                continue
+
+            message = (
+                f'✓ Lane {lane}: batch of {results["total"]}: {results["processed"]} processed, '
+                f'{results["ignored"]} ignored, {results["retried"]} retried, {results["failed"]} failed'
+            )
+            if stdout:
+                stdout.write(message)
+            else:
+                logger.info(f"WebhookInboxWorker: {message}")
+    except KeyboardInterrupt:
+        pass
+
+    return totals
+
+
+class Command(BaseCommand):
+    help = 'Drain queued courier webhooks from the inbox and apply their status updates'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling the inbox instead of exiting once it is empty'
+        )
+        parser.add_argument(
+            '--idle-sleep',
+            type=float,
+            default=1.0
+        )
+        parser.add_argument(
+            '--lanes',
+            type=int,
+            default=1,
+            help='Number of lanes tracking numbers are hashed onto; all workers must use the same value'
+        )
+        parser.add_argument(
+            '--lane',
+            type=int,
+            default=None,
+            help='Drain only this lane; without it one process per lane is started'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        lanes = options['lanes']
+        lane = options['lane']
+
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+        if lanes < 1:
+            raise CommandError('--lanes must be at least 1')
+        if lane is not None and not 0 <= lane < lanes:
+            raise CommandError(f'--lane must be between 0 and {lanes - 1}')
+
+        self.stdout.write('Starting webhook inbox processing...')
+        logger.info(f"WebhookInboxWorker: Starting with batch_size={batch_size}, loop={options['loop']}, lanes={lanes}, lane={lane}")
+
+        tracking_number_filter.build()
+
+        if lane is None and lanes > 1:
+            lane_totals = self._drain_lanes_in_parallel(lanes, options)
+        else:
+            lane_totals = [drain_lane(lane or 0, lanes, batch_size, options['loop'], options['idle_sleep'], self.stdout)]
+
+        if lane_totals is None:
+            self.stdout.write('Stopping webhook inbox processing...')
+            return
+
+        totals = {key: sum(lane_total[key] for lane_total in lane_totals) for key in lane_totals[0]}
+
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(f'Inbox Summary:')
+        self.stdout.write(f'  Total: {totals["total"]}')
+        self.stdout.write(f'  Processed: {totals["processed"]}')
+        self.stdout.write(f'  Ignored: {totals["ignored"]}')
+        self.stdout.write(f'  Retried: {totals["retried"]}')
+        self.stdout.write(f'  Failed: {totals["failed"]}')
+        filter_stats = tracking_number_filter.stats()
+        self.stdout.write(
+            f'  Tracking filter: {filter_stats["count"]} ids, {filter_stats["memory_bytes"]} bytes, '
+            f'~{filter_stats["false_positive_rate"]:.4%} false positives, {filter_stats["rejections"]} rejected'
+        )
+        self.stdout.write('='*50)
+
+    def _drain_lanes_in_parallel(self, lanes, options):
+        # Forked workers must open their own database connections
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+
+        with ProcessPoolExecutor(max_workers=lanes, mp_context=context) as executor:
+            futures = [
+                executor.submit(
+                    drain_lane,
+                    lane,
+                    lanes,
+                    options['batch_size'],
+                    options['loop'],
+                    options['idle_sleep']
+                )
+                for lane in range(lanes)
+            ]
+            try:
+                return [future.result() for future in futures]
+            except KeyboardInterrupt:
+                return None
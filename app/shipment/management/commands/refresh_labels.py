@@ -0,0 +1,68 @@
+import logging
+import time
+from django.core.management.base import BaseCommand, CommandError
+from shipment.services.labels.label_refresh_service import LabelRefreshService
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = 'Re-fetch shipment labels whose courier URL is about to expire'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=100
+        )
+        parser.add_argument(
+            '--lead-seconds',
+            type=int,
+            default=None,
+            help='Refresh labels expiring within this many seconds (default: LABEL_REFRESH_LEAD_SECONDS)'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep checking for expiring labels instead of exiting once none are left'
+        )
+        parser.add_argument(
+            '--idle-sleep',
+            type=float,
+            default=60.0
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        self.stdout.write('Starting label refresh...')
+        logger.info(f"LabelRefreshWorker: Starting with batch_size={batch_size}, loop={options['loop']}")
+
+        service = LabelRefreshService()
+        totals = {'total': 0, 'refreshed': 0, 'failed': 0}
+
+        try:
+            while True:
+                results = service.refresh_expiring(batch_size, options['lead_seconds'])
+                for key in totals:
+                    totals[key] += results[key]
+
+                # Failed labels are skipped until their retry is due, so only an empty batch waits
+                if results['total'] == 0:
+                    if not options['loop']:
+                        break
+                    time.sleep(options['idle_sleep'])
+                    continue
+
+                self.stdout.write(f'✓ Batch of {results["total"]}: {results["refreshed"]} refreshed, {results["failed"]} failed')
+        except KeyboardInterrupt:
+            self.stdout.write('Stopping label refresh...')
+
+        self.stdout.write('\n' + '='*50)
+        self.stdout.write(f'Refresh Summary:')
+        self.stdout.write(f'  Total: {totals["total"]}')
+        self.stdout.write(f'  Refreshed: {totals["refreshed"]}')
+        self.stdout.write(f'  Failed: {totals["failed"]}')
+        self.stdout.write('='*50)
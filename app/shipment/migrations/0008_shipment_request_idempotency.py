@@ -0,0 +1,51 @@
+# Generated manually for race-free shipment request creation
+
+from django.db import migrations, models
+
+
+def supersede_duplicate_active_requests(apps, schema_editor):
+    ShipmentRequest = apps.get_model('shipment', 'ShipmentRequest')
+    active_condition = (
+        models.Q(status__in=['pending', 'processing']) |
+        models.Q(status='failed', retries__lt=3)
+    )
+    seen_references = set()
+    duplicates = ShipmentRequest.objects.filter(active_condition).order_by('reference_number', '-created_at')
+    for request in duplicates.iterator():
+        if request.reference_number in seen_references:
+            request.status = 'cancelled'
+            request.failed_reason = 'Superseded by a newer active request with the same reference number'
+            request.save(update_fields=['status', 'failed_reason'])
+        else:
+            seen_references.add(request.reference_number)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipment', '0007_create_shipment_statuses_table'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shipmentrequest',
+            name='idempotency_key',
+            field=models.CharField(blank=True, max_length=255, null=True, unique=True),
+        ),
+        migrations.AddIndex(
+            model_name='shipmentrequest',
+            index=models.Index(fields=['reference_number'], name='shipment_re_referen_1b0014_idx'),
+        ),
+        migrations.RunPython(
+            supersede_duplicate_active_requests,
+            reverse_code=migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name='shipmentrequest',
+            constraint=models.UniqueConstraint(
+                condition=models.Q(('status__in', ['pending', 'processing']), models.Q(('retries__lt', 3), ('status', 'failed')), _connector='OR'),
+                fields=('reference_number',),
+                name='uniq_active_request_reference'
+            ),
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated manually to denormalize the latest status onto shipments
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipment', '0008_shipment_request_idempotency'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shipment',
+            name='current_status',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='shipment',
+            name='current_status_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunSQL(
+            """
+            UPDATE shipments
+            SET current_status = latest.status,
+                current_status_at = latest.created_at
+            FROM (
+                SELECT DISTINCT ON (shipment_id) shipment_id, status, created_at
+                FROM shipment_statuses
+                ORDER BY shipment_id, created_at DESC
+            ) AS latest
+            WHERE latest.shipment_id = shipments.id;
+            """,
+            reverse_sql=migrations.RunSQL.noop
+        ),
+        migrations.AddIndex(
+            model_name='shipment',
+            index=models.Index(fields=['current_status', 'current_status_at'], name='shipments_current_cce0af_idx'),
+        ),
+    ]
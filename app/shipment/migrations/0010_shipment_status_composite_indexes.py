@@ -0,0 +1,16 @@
+# Generated manually to replace single-column shipment status indexes
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    # Folded into 0011: it rebuilds shipment_statuses as a partitioned table
+    # with the composite indexes, so building them here concurrently first
+    # would only have them dropped again with the unpartitioned table.
+
+    dependencies = [
+        ('shipment', '0009_shipment_current_status'),
+    ]
+
+    operations = []
@@ -0,0 +1,129 @@
+# Generated manually to range-partition shipment_statuses by month
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+# The table is rebuilt here, so it also gets the composite (shipment_id,
+# created_at DESC) and (shipment_id, status) indexes that replace the
+# single-column ones (see 0010). Status lookups filter on shipment_id alone
+# and cannot prune partitions: each lookup probes the composite index of every
+# attached partition, which archive_status_partitions keeps to the retention
+# window.
+#
+# PostgreSQL requires the partition key in the primary key, so the table is
+# rebuilt with PRIMARY KEY (id, created_at). Identity columns are not allowed
+# on partitioned tables before PostgreSQL 17, so ids come from a plain
+# sequence owned by the new table. A default partition catches rows that fall
+# outside the monthly partitions created by create_status_partitions.
+PARTITION_SQL = """
+ALTER TABLE shipment_statuses RENAME TO shipment_statuses_legacy;
+
+CREATE TABLE shipment_statuses (
+    LIKE shipment_statuses_legacy INCLUDING DEFAULTS
+) PARTITION BY RANGE (created_at);
+
+CREATE SEQUENCE shipment_statuses_partitioned_id_seq AS bigint;
+ALTER TABLE shipment_statuses
+    ALTER COLUMN id SET DEFAULT nextval('shipment_statuses_partitioned_id_seq');
+
+DO $$
+DECLARE
+    month_start timestamptz;
+    last_month timestamptz := date_trunc('month', now()) + interval '3 months';
+BEGIN
+    SELECT COALESCE(date_trunc('month', MIN(created_at)), date_trunc('month', now()))
+    INTO month_start
+    FROM shipment_statuses_legacy;
+
+    WHILE month_start <= last_month LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF shipment_statuses FOR VALUES FROM (%L) TO (%L)',
+            'shipment_statuses_p' || to_char(month_start, 'YYYY_MM'),
+            month_start,
+            month_start + interval '1 month'
+        );
+        month_start := month_start + interval '1 month';
+    END LOOP;
+END $$;
+
+CREATE TABLE shipment_statuses_default PARTITION OF shipment_statuses DEFAULT;
+
+INSERT INTO shipment_statuses SELECT * FROM shipment_statuses_legacy;
+SELECT setval(
+    'shipment_statuses_partitioned_id_seq',
+    COALESCE((SELECT MAX(id) FROM shipment_statuses_legacy), 0) + 1,
+    false
+);
+
+DROP TABLE shipment_statuses_legacy;
+ALTER SEQUENCE shipment_statuses_partitioned_id_seq OWNED BY shipment_statuses.id;
+
+ALTER TABLE shipment_statuses ADD CONSTRAINT shipment_statuses_pkey PRIMARY KEY (id, created_at);
+ALTER TABLE shipment_statuses ADD CONSTRAINT shipment_statuses_shipment_id_fk_shipments_id
+    FOREIGN KEY (shipment_id) REFERENCES shipments (id) DEFERRABLE INITIALLY DEFERRED;
+CREATE INDEX shipment_st_shipmen_e9e013_idx ON shipment_statuses (shipment_id, created_at DESC);
+CREATE INDEX shipment_st_shipmen_7cb55e_idx ON shipment_statuses (shipment_id, status);
+"""
+
+# Restores the table as 0009 left it, with its single-column indexes
+UNPARTITION_SQL = """
+CREATE TABLE shipment_statuses_unpartitioned (
+    LIKE shipment_statuses INCLUDING DEFAULTS
+);
+INSERT INTO shipment_statuses_unpartitioned SELECT * FROM shipment_statuses;
+ALTER SEQUENCE shipment_statuses_partitioned_id_seq OWNED BY shipment_statuses_unpartitioned.id;
+
+DROP TABLE shipment_statuses;
+ALTER TABLE shipment_statuses_unpartitioned RENAME TO shipment_statuses;
+
+ALTER TABLE shipment_statuses ADD CONSTRAINT shipment_statuses_pkey PRIMARY KEY (id);
+ALTER TABLE shipment_statuses ADD CONSTRAINT shipment_statuses_shipment_id_fk_shipments_id
+    FOREIGN KEY (shipment_id) REFERENCES shipments (id) DEFERRABLE INITIALLY DEFERRED;
+CREATE INDEX shipment_statuses_shipment_id_b550a119 ON shipment_statuses (shipment_id);
+CREATE INDEX shipment_st_shipmen_9c894a_idx ON shipment_statuses (shipment_id);
+CREATE INDEX shipment_st_status_ebbd5f_idx ON shipment_statuses (status);
+CREATE INDEX shipment_st_created_f4d9c6_idx ON shipment_statuses (created_at);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipment', '0010_shipment_status_composite_indexes'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(PARTITION_SQL, reverse_sql=UNPARTITION_SQL),
+            ],
+            state_operations=[
+                migrations.AddIndex(
+                    model_name='shipmentstatus',
+                    index=models.Index(fields=['shipment', '-created_at'], name='shipment_st_shipmen_e9e013_idx'),
+                ),
+                migrations.AddIndex(
+                    model_name='shipmentstatus',
+                    index=models.Index(fields=['shipment', 'status'], name='shipment_st_shipmen_7cb55e_idx'),
+                ),
+                migrations.RemoveIndex(
+                    model_name='shipmentstatus',
+                    name='shipment_st_shipmen_9c894a_idx',
+                ),
+                migrations.RemoveIndex(
+                    model_name='shipmentstatus',
+                    name='shipment_st_status_ebbd5f_idx',
+                ),
+                migrations.RemoveIndex(
+                    model_name='shipmentstatus',
+                    name='shipment_st_created_f4d9c6_idx',
+                ),
+                migrations.AlterField(
+                    model_name='shipmentstatus',
+                    name='shipment',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='shipment.shipment'),
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated manually to store the rendered tracking payload on shipments
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipment', '0011_partition_shipment_statuses'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shipment',
+            name='tracking_projection',
+            field=models.JSONField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated manually for the asynchronous webhook inbox
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipment', '0012_shipment_tracking_projection'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookInboxEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('courier', models.CharField(max_length=50)),
+                ('payload', models.JSONField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processed', 'Processed'), ('ignored', 'Ignored'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('received_at', models.DateTimeField(auto_now_add=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Webhook Inbox Entry',
+                'verbose_name_plural': 'Webhook Inbox Entries',
+                'db_table': 'webhook_inbox',
+                'ordering': ['id'],
+                'indexes': [models.Index(condition=models.Q(('status', 'pending')), fields=['id'], name='webhook_inbox_pending_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,42 @@
+# Generated manually for insert-on-conflict status deduplication
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipment', '0013_webhook_inbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShipmentStatusMarker',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('shipment', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='shipment.shipment')),
+            ],
+            options={
+                'verbose_name': 'Shipment Status Marker',
+                'verbose_name_plural': 'Shipment Status Markers',
+                'db_table': 'shipment_status_markers',
+                'constraints': [models.UniqueConstraint(fields=('shipment', 'status'), name='uniq_shipment_status_marker')],
+            },
+        ),
+        # shipment_statuses is partitioned by created_at, so it cannot carry a
+        # unique (shipment_id, status) index itself; markers hold that invariant.
+        migrations.RunSQL(
+            """
+            INSERT INTO shipment_status_markers (shipment_id, status, created_at)
+            SELECT shipment_id, status, MIN(created_at)
+            FROM shipment_statuses
+            WHERE status NOT IN ('exception')
+            GROUP BY shipment_id, status
+            ON CONFLICT (shipment_id, status) DO NOTHING;
+            """,
+            reverse_sql=migrations.RunSQL.noop
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated manually for order-preserving parallel webhook processing
+
+import zlib
+from django.db import migrations, models
+import django.utils.timezone
+
+
+def backfill_lane_hash(apps, schema_editor):
+    WebhookInboxEntry = apps.get_model('shipment', 'WebhookInboxEntry')
+    entries = list(WebhookInboxEntry.objects.filter(status='pending'))
+    for entry in entries:
+        tracking_number = entry.payload.get('tracking_number') if isinstance(entry.payload, dict) else None
+        entry.lane_hash = zlib.crc32(str(tracking_number or '').encode('utf-8'))
+    WebhookInboxEntry.objects.bulk_update(entries, ['lane_hash'], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipment', '0014_shipment_status_markers'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhookinboxentry',
+            name='lane_hash',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_lane_hash, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='shipmentstatus',
+            name='created_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated manually for the content-addressed label document store
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipment', '0015_webhook_inbox_lanes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shipmentlabel',
+            name='content_hash',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+    ]
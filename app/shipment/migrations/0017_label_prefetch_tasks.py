@@ -0,0 +1,36 @@
+# Generated manually for the eager label prefetch queue
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipment', '0016_shipment_label_content_hash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LabelPrefetchTask',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('courier', models.CharField(max_length=50)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('shipment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='shipment.shipment')),
+            ],
+            options={
+                'verbose_name': 'Label Prefetch Task',
+                'verbose_name_plural': 'Label Prefetch Tasks',
+                'db_table': 'label_prefetch_tasks',
+                'ordering': ['id'],
+                'indexes': [models.Index(condition=models.Q(('status__in', ['pending', 'processing'])), fields=['id'], name='label_prefetch_open_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status__in', ['pending', 'processing'])), fields=('shipment',), name='uniq_open_label_prefetch')],
+            },
+        ),
+    ]
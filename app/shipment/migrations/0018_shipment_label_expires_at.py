@@ -0,0 +1,22 @@
+# Generated manually for label URL expiry tracking
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipment', '0017_label_prefetch_tasks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shipmentlabel',
+            name='expires_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='shipmentlabel',
+            index=models.Index(condition=models.Q(('expires_at__isnull', False), ('is_active', True)), fields=['expires_at'], name='shipment_label_expiry_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated manually for the asynchronous cancellation queue
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipment', '0018_shipment_label_expires_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CancellationJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': 'Cancellation Job',
+                'verbose_name_plural': 'Cancellation Jobs',
+                'db_table': 'cancellation_jobs',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='CancellationQueueEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('reference_number', models.CharField(max_length=255)),
+                ('courier', models.CharField(blank=True, max_length=50)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('cancelled', 'Cancelled'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('error_code', models.CharField(blank=True, max_length=100, null=True)),
+                ('error', models.TextField(blank=True, null=True)),
+                ('next_attempt_at', models.DateTimeField(blank=True, null=True)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('processed_at', models.DateTimeField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='entries', to='shipment.cancellationjob')),
+                ('shipment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='shipment.shipment')),
+            ],
+            options={
+                'verbose_name': 'Cancellation Queue Entry',
+                'verbose_name_plural': 'Cancellation Queue Entries',
+                'db_table': 'cancellation_queue',
+                'ordering': ['id'],
+                'indexes': [models.Index(condition=models.Q(('status__in', ['pending', 'processing'])), fields=['id'], name='cancellation_queue_open_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('status__in', ['pending', 'processing'])), fields=('shipment',), name='uniq_open_cancellation')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated manually to retry webhook inbox entries that failed transiently
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipment', '0019_cancellation_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='webhookinboxentry',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='webhookinboxentry',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
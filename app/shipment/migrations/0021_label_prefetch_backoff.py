@@ -0,0 +1,18 @@
+# Generated manually to back off label prefetch retries exponentially
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipment', '0020_webhook_inbox_retries'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='labelprefetchtask',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated manually to record failed label refreshes
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('shipment', '0021_label_prefetch_backoff'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shipmentlabel',
+            name='refresh_attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='shipmentlabel',
+            name='refresh_attempted_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
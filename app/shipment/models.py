@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 
 class Shipment(models.Model):
@@ -43,6 +44,19 @@ class Shipment(models.Model):
     weight_unit = models.CharField(
         max_length=10
     )
+    current_status = models.CharField(
+        max_length=100,
+        blank=True,
+        null=True
+    )
+    current_status_at = models.DateTimeField(
+        blank=True,
+        null=True
+    )
+    tracking_projection = models.JSONField(
+        blank=True,
+        null=True
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -51,6 +65,9 @@ class Shipment(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Shipment'
         verbose_name_plural = 'Shipments'
+        indexes = [
+            models.Index(fields=['current_status', 'current_status_at']),
+        ]
     
     def __str__(self):
         return f"Shipment {self.id} - {self.reference_number}"
@@ -98,6 +115,12 @@ class Consignee(models.Model):
         return self.name
 
 
+ACTIVE_SHIPMENT_REQUEST_CONDITION = (
+    models.Q(status__in=['pending', 'processing']) |
+    models.Q(status='failed', retries__lt=3)
+)
+
+
 class ShipmentRequest(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -122,6 +145,12 @@ class ShipmentRequest(models.Model):
         null=True, 
         blank=True
     )
+    idempotency_key = models.CharField(
+        max_length=255,
+        unique=True,
+        null=True,
+        blank=True
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -130,9 +159,23 @@ class ShipmentRequest(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Shipment Request'
         verbose_name_plural = 'Shipment Requests'
+        indexes = [
+            models.Index(fields=['reference_number']),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['reference_number'],
+                condition=ACTIVE_SHIPMENT_REQUEST_CONDITION,
+                name='uniq_active_request_reference'
+            ),
+        ]
     
     def __str__(self):
         return f"ShipmentRequest {self.id} - {self.status}"
+    
+    @property
+    def is_active(self) -> bool:
+        return self.status in ['pending', 'processing'] or (self.status == 'failed' and self.retries < 3)
 
 
 class ShipmentLabel(models.Model):
@@ -149,9 +192,28 @@ class ShipmentLabel(models.Model):
     format = models.CharField(
         max_length=50
     )
+    # SHA-256 of the downloaded document in the label blob store
+    content_hash = models.CharField(
+        max_length=64,
+        blank=True,
+        null=True
+    )
+    # When the courier's label URL stops working; null when it does not expire
+    expires_at = models.DateTimeField(
+        blank=True,
+        null=True
+    )
     is_active = models.BooleanField(
         default=True
     )
+    # Failed attempts to refresh this label before it expires, and when the last one ran
+    refresh_attempts = models.PositiveIntegerField(
+        default=0
+    )
+    refresh_attempted_at = models.DateTimeField(
+        blank=True,
+        null=True
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -164,6 +226,11 @@ class ShipmentLabel(models.Model):
             models.Index(fields=['shipment_id']),
             models.Index(fields=['reference_number']),
             models.Index(fields=['is_active']),
+            models.Index(
+                fields=['expires_at'],
+                condition=models.Q(is_active=True, expires_at__isnull=False),
+                name='shipment_label_expiry_idx'
+            ),
         ]
     
     def __str__(self):
@@ -173,7 +240,8 @@ class ShipmentLabel(models.Model):
 class ShipmentStatus(models.Model):
     shipment = models.ForeignKey(
         'Shipment',
-        on_delete=models.CASCADE
+        on_delete=models.CASCADE,
+        db_index=False
     )
     status = models.CharField(
         max_length=100
@@ -193,7 +261,8 @@ class ShipmentStatus(models.Model):
         blank=True,
         null=True
     )
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Carrier event time when reported by a webhook, otherwise the insert time
+    created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
@@ -201,11 +270,257 @@ class ShipmentStatus(models.Model):
         ordering = ['-created_at']
         verbose_name = 'Shipment Status'
         verbose_name_plural = 'Shipment Statuses'
+        # Composite indexes serve "latest status for a shipment" and "has this
+        # shipment reached a status"; both also cover plain shipment_id lookups.
         indexes = [
-            models.Index(fields=['shipment_id']),
-            models.Index(fields=['status']),
-            models.Index(fields=['created_at']),
+            models.Index(fields=['shipment', '-created_at']),
+            models.Index(fields=['shipment', 'status']),
+        ]
+    
+    def __str__(self):
+        return f"ShipmentStatus {self.id} - {self.shipment.reference_number} - {self.status}"
+
+class ShipmentStatusMarker(models.Model):
+    """One row per (shipment, status) already recorded, used to deduplicate status reports."""
+    shipment = models.ForeignKey(
+        'Shipment',
+        on_delete=models.CASCADE,
+        db_index=False
+    )
+    status = models.CharField(
+        max_length=100
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'shipment_status_markers'
+        verbose_name = 'Shipment Status Marker'
+        verbose_name_plural = 'Shipment Status Markers'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['shipment', 'status'],
+                name='uniq_shipment_status_marker'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"ShipmentStatusMarker {self.shipment_id} - {self.status}"
+
+
+class WebhookInboxEntry(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processed', 'Processed'),
+        ('ignored', 'Ignored'),
+        ('failed', 'Failed'),
+    ]
+    
+    courier = models.CharField(
+        max_length=50
+    )
+    payload = models.JSONField()
+    # Stable hash of the tracking number; workers own the lane lane_hash % lanes
+    lane_hash = models.BigIntegerField(
+        default=0
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending'
+    )
+    result = models.JSONField(
+        blank=True,
+        null=True
+    )
+    attempts = models.PositiveIntegerField(
+        default=0
+    )
+    # Pending entries that failed transiently wait until then before the next attempt
+    next_attempt_at = models.DateTimeField(
+        blank=True,
+        null=True
+    )
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(
+        blank=True,
+        null=True
+    )
+    
+    class Meta:
+        db_table = 'webhook_inbox'
+        ordering = ['id']
+        verbose_name = 'Webhook Inbox Entry'
+        verbose_name_plural = 'Webhook Inbox Entries'
+        indexes = [
+            models.Index(
+                fields=['id'],
+                condition=models.Q(status='pending'),
+                name='webhook_inbox_pending_idx'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"WebhookInboxEntry {self.id} - {self.courier} - {self.status}"
+
+
+class LabelPrefetchTask(models.Model):
+    """Queued label fetch for a newly created shipment, so the first print is a cache hit."""
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+    
+    shipment = models.ForeignKey(
+        'Shipment',
+        on_delete=models.CASCADE
+    )
+    courier = models.CharField(
+        max_length=50
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending'
+    )
+    attempts = models.PositiveIntegerField(
+        default=0
+    )
+    error = models.TextField(
+        blank=True,
+        null=True
+    )
+    # Pending tasks that failed transiently wait until then before the next attempt
+    next_attempt_at = models.DateTimeField(
+        blank=True,
+        null=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    claimed_at = models.DateTimeField(
+        blank=True,
+        null=True
+    )
+    processed_at = models.DateTimeField(
+        blank=True,
+        null=True
+    )
+    
+    class Meta:
+        db_table = 'label_prefetch_tasks'
+        ordering = ['id']
+        verbose_name = 'Label Prefetch Task'
+        verbose_name_plural = 'Label Prefetch Tasks'
+        indexes = [
+            models.Index(
+                fields=['id'],
+                condition=models.Q(status__in=['pending', 'processing']),
+                name='label_prefetch_open_idx'
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['shipment'],
+                condition=models.Q(status__in=['pending', 'processing']),
+                name='uniq_open_label_prefetch'
+            ),
+        ]
+    
+    def __str__(self):
+        return f"LabelPrefetchTask {self.id} - {self.shipment_id} - {self.status}"
+
+
+class CancellationJob(models.Model):
+    """A bulk cancellation request; its shipments are cancelled by the queue worker."""
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'cancellation_jobs'
+        ordering = ['-created_at']
+        verbose_name = 'Cancellation Job'
+        verbose_name_plural = 'Cancellation Jobs'
+    
+    def __str__(self):
+        return f"CancellationJob {self.id}"
+
+
+class CancellationQueueEntry(models.Model):
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('cancelled', 'Cancelled'),
+        ('failed', 'Failed'),
+    ]
+    
+    job = models.ForeignKey(
+        'CancellationJob',
+        on_delete=models.CASCADE,
+        related_name='entries'
+    )
+    # Null when the reference did not match a shipment
+    shipment = models.ForeignKey(
+        'Shipment',
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True
+    )
+    reference_number = models.CharField(
+        max_length=255
+    )
+    courier = models.CharField(
+        max_length=50,
+        blank=True
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending'
+    )
+    attempts = models.PositiveIntegerField(
+        default=0
+    )
+    error_code = models.CharField(
+        max_length=100,
+        blank=True,
+        null=True
+    )
+    error = models.TextField(
+        blank=True,
+        null=True
+    )
+    next_attempt_at = models.DateTimeField(
+        blank=True,
+        null=True
+    )
+    claimed_at = models.DateTimeField(
+        blank=True,
+        null=True
+    )
+    processed_at = models.DateTimeField(
+        blank=True,
+        null=True
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        db_table = 'cancellation_queue'
+        ordering = ['id']
+        verbose_name = 'Cancellation Queue Entry'
+        verbose_name_plural = 'Cancellation Queue Entries'
+        indexes = [
+            models.Index(
+                fields=['id'],
+                condition=models.Q(status__in=['pending', 'processing']),
+                name='cancellation_queue_open_idx'
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['shipment'],
+                condition=models.Q(status__in=['pending', 'processing']),
+                name='uniq_open_cancellation'
+            ),
         ]
     
     def __str__(self):
-        return f"ShipmentStatus {self.id} - {self.shipment.reference_number} - {self.status}"
\ No newline at end of file
+        return f"CancellationQueueEntry {self.id} - {self.reference_number} - {self.status}"
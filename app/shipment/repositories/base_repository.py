@@ -1,6 +1,10 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional, Any, Dict
+from typing import Callable, Iterable, Iterator, List, Optional, Any, Dict, Sequence, TypeVar, Union
 from django.db import models
+from django.utils import timezone
+from core.db_routing import read_from_replica
+
+T = TypeVar('T')
 
 
 class BaseRepository(ABC):
@@ -22,7 +26,7 @@ class BaseRepository(ABC):
         pass
     
     @abstractmethod
-    def update(self, id: int, **kwargs) -> Optional[models.Model]:
+    def update(self, id: int, refresh: bool = False, **kwargs) -> Union[models.Model, bool, None]:
         """Update a record by ID."""
         pass
     
@@ -45,6 +49,9 @@ class BaseRepository(ABC):
 class DjangoRepository(BaseRepository):
     """Base Django repository implementation."""
     
+    # Rows fetched per round trip by the iter_* methods
+    ITERATOR_CHUNK_SIZE = 2000
+    
     def __init__(self, model_class: models.Model):
         self.model = model_class
     
@@ -59,20 +66,40 @@ class DjangoRepository(BaseRepository):
         """Get all records."""
         return list(self.model.objects.all())
     
+    def get_by_ids(self, ids: Iterable[int]) -> Dict[int, models.Model]:
+        """Get many records by ID with one query, keyed by ID."""
+        return self.model.objects.in_bulk(list(ids))
+    
     def create(self, **kwargs) -> models.Model:
         """Create a new record."""
         return self.model.objects.create(**kwargs)
     
-    def update(self, id: int, **kwargs) -> Optional[models.Model]:
-        """Update a record by ID."""
-        try:
-            obj = self.model.objects.get(id=id)
-            for key, value in kwargs.items():
-                setattr(obj, key, value)
-            obj.save()
-            return obj
-        except self.model.DoesNotExist:
-            return None
+    def update(self, id: int, refresh: bool = False, **kwargs) -> Union[models.Model, bool, None]:
+        """
+        Update the given fields of a record by ID in a single UPDATE statement.
+
+        auto_now fields such as updated_at are set unless passed explicitly.
+        Returns whether the record existed, or with refresh=True the record as
+        re-read after the update (None if it does not exist).
+        """
+        for field_name in self._auto_now_fields():
+            kwargs.setdefault(field_name, timezone.now())
+        updated = self.model.objects.filter(id=id).update(**kwargs) > 0
+        if refresh:
+            return self.get_by_id(id) if updated else None
+        return updated
+    
+    def save(self, obj: models.Model, update_fields: Optional[Iterable[str]] = None) -> models.Model:
+        """
+        Save a loaded record, writing only update_fields when given.
+
+        auto_now fields are added to update_fields so they are still written.
+        """
+        if update_fields is not None:
+            update_fields = list(update_fields)
+            update_fields += [name for name in self._auto_now_fields() if name not in update_fields]
+        obj.save(update_fields=update_fields)
+        return obj
     
     def delete(self, id: int) -> bool:
         """Delete a record by ID."""
@@ -87,12 +114,88 @@ class DjangoRepository(BaseRepository):
         """Filter records by given criteria."""
         return list(self.model.objects.filter(**kwargs))
     
+    def read_from_replica(self, read: Callable[[], T], fallback_on_miss: bool = True) -> T:
+        """Run one of this repository's reads on the read replica; an empty result is re-read from the primary."""
+        return read_from_replica(read, fallback_on_miss)
+    
+    def iter_all(
+        self,
+        values_list: Optional[Sequence[str]] = None,
+        flat: bool = False,
+        only: Optional[Sequence[str]] = None,
+        chunk_size: Optional[int] = None
+    ) -> Iterator[Any]:
+        """Stream all records; see iter_filter."""
+        return self._iterate(self.model.objects.all(), values_list, flat, only, chunk_size)
+    
+    def iter_filter(
+        self,
+        values_list: Optional[Sequence[str]] = None,
+        flat: bool = False,
+        only: Optional[Sequence[str]] = None,
+        chunk_size: Optional[int] = None,
+        **kwargs
+    ) -> Iterator[Any]:
+        """
+        Stream the records matching given criteria without loading them all into memory.
+
+        On PostgreSQL rows are read through a server-side cursor in batches of
+        chunk_size. Pass values_list to get tuples of those fields (single
+        values with flat=True), or only to load instances with just those fields.
+        """
+        return self._iterate(self.model.objects.filter(**kwargs), values_list, flat, only, chunk_size)
+    
     def get_or_create(self, defaults: Dict[str, Any] = None, **kwargs) -> tuple[models.Model, bool]:
         """Get or create a record."""
         if defaults is None:
             defaults = {}
         return self.model.objects.get_or_create(defaults=defaults, **kwargs)
     
+    def _iterate(
+        self,
+        queryset: models.QuerySet,
+        values_list: Optional[Sequence[str]],
+        flat: bool,
+        only: Optional[Sequence[str]],
+        chunk_size: Optional[int]
+    ) -> Iterator[Any]:
+        if values_list is not None and only is not None:
+            raise ValueError('values_list and only cannot be combined')
+        if values_list is not None:
+            queryset = queryset.values_list(*values_list, flat=flat)
+        elif only is not None:
+            queryset = queryset.only(*only)
+        return queryset.iterator(chunk_size=chunk_size or self.ITERATOR_CHUNK_SIZE)
+    
+    def _auto_now_fields(self) -> List[str]:
+        return [
+            field.name for field in self.model._meta.concrete_fields
+            if getattr(field, 'auto_now', False)
+        ]
+    
+    def get_or_create_many(self, key_field: str, defaults_by_key: Dict[Any, Dict[str, Any]]) -> Dict[Any, models.Model]:
+        """
+        Get or create one record per value of key_field with one lookup and one bulk insert.
+
+        Where several records share a key the oldest one is returned.
+        """
+        if not defaults_by_key:
+            return {}
+        records = {}
+        for obj in self.model.objects.filter(**{f'{key_field}__in': list(defaults_by_key)}).order_by('-id'):
+            records[getattr(obj, key_field)] = obj
+        missing = [
+            self.model(**{**defaults, key_field: key})
+            for key, defaults in defaults_by_key.items() if key not in records
+        ]
+        for obj in self.bulk_create(missing):
+            records[getattr(obj, key_field)] = obj
+        return records
+    
+    def bulk_create(self, objects: List[models.Model], batch_size: Optional[int] = None) -> List[models.Model]:
+        """Insert many unsaved records in as few statements as possible."""
+        return self.model.objects.bulk_create(objects, batch_size=batch_size)
+
     def exists(self, **kwargs) -> bool:
         """Check if a record exists with given criteria."""
         return self.model.objects.filter(**kwargs).exists()
@@ -0,0 +1,91 @@
+from datetime import timedelta
+from typing import Any, Dict, Iterable, List, Optional, Set
+from django.db import transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from ..models import CancellationJob, CancellationQueueEntry
+from .base_repository import DjangoRepository
+
+
+class CancellationQueueRepository(DjangoRepository):
+    """Repository for CancellationQueueEntry and CancellationJob model operations."""
+    
+    OPEN_STATUSES = ['pending', 'processing']
+    
+    def __init__(self):
+        super().__init__(CancellationQueueEntry)
+    
+    def create_job(self, entries: List[CancellationQueueEntry]) -> CancellationJob:
+        """
+        Create a job with its entries.
+        
+        An open entry for a shipment that a concurrent job, or an earlier entry
+        of this one, already queued is dropped; get_open_shipment_ids(job_id=...)
+        tells which were inserted.
+        """
+        with transaction.atomic():
+            job = CancellationJob.objects.create()
+            for entry in entries:
+                entry.job = job
+            self.model.objects.bulk_create(entries, ignore_conflicts=True)
+        return job
+    
+    def get_open_shipment_ids(self, shipment_ids: Optional[Iterable[int]] = None, job_id: Optional[int] = None) -> Set[int]:
+        """Shipments that already have a cancellation waiting in the queue, optionally only those of one job."""
+        open_entries = self.model.objects.filter(status__in=self.OPEN_STATUSES)
+        if shipment_ids is not None:
+            open_entries = open_entries.filter(shipment_id__in=list(shipment_ids))
+        if job_id is not None:
+            open_entries = open_entries.filter(job_id=job_id)
+        return set(open_entries.values_list('shipment_id', flat=True))
+    
+    def claim(self, limit: int = 100, stale_after: timedelta = timedelta(minutes=10)) -> List[CancellationQueueEntry]:
+        """
+        Mark the oldest due entries as processing and return them.
+        
+        The claim commits before any courier call. Entries waiting for a retry
+        are due once next_attempt_at has passed; entries left in processing by
+        a crashed worker are claimed again after stale_after.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            entries = list(
+                self.model.objects.select_for_update(skip_locked=True, of=('self',)).select_related(
+                    'shipment__courier'
+                ).filter(
+                    Q(status='pending', next_attempt_at__isnull=True) |
+                    Q(status='pending', next_attempt_at__lte=now) |
+                    Q(status='processing', claimed_at__lt=now - stale_after)
+                ).order_by('id')[:limit]
+            )
+            for entry in entries:
+                entry.status = 'processing'
+                entry.claimed_at = now
+                entry.attempts += 1
+            self.model.objects.bulk_update(entries, ['status', 'claimed_at', 'attempts'])
+        return entries
+    
+    def mark_finished(self, entries: List[CancellationQueueEntry]) -> None:
+        """Persist the outcome of claimed entries in one statement."""
+        processed_at = timezone.now()
+        for entry in entries:
+            entry.processed_at = processed_at
+        self.model.objects.bulk_update(entries, ['status', 'error_code', 'error', 'next_attempt_at', 'processed_at'])
+    
+    def get_job_summary(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """Entry counts per status and the entries of a job; None when the job does not exist."""
+        if not CancellationJob.objects.filter(id=job_id).exists():
+            return None
+        counts = dict(
+            self.model.objects.filter(job_id=job_id).values_list('status').annotate(total=Count('id')).order_by()
+        )
+        entries = list(
+            self.model.objects.filter(job_id=job_id).order_by('id').values(
+                'reference_number', 'status', 'attempts', 'error_code', 'error', 'processed_at'
+            )
+        )
+        return {'counts': counts, 'entries': entries}
+    
+    def count_open(self) -> int:
+        """Count entries still waiting to be processed."""
+        return self.model.objects.filter(status__in=self.OPEN_STATUSES).count()
@@ -0,0 +1,59 @@
+from datetime import timedelta
+from typing import List
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from ..models import LabelPrefetchTask
+from .base_repository import DjangoRepository
+
+
+class LabelPrefetchRepository(DjangoRepository):
+    """Repository for LabelPrefetchTask model operations."""
+    
+    def __init__(self):
+        super().__init__(LabelPrefetchTask)
+    
+    def enqueue(self, shipment_id: int, courier: str) -> None:
+        """Queue a label fetch; a shipment with an open task is not queued twice."""
+        self.model.objects.bulk_create(
+            [self.model(shipment_id=shipment_id, courier=courier)],
+            ignore_conflicts=True
+        )
+    
+    def claim(self,
+              limit: int = 20,
+              stale_after: timedelta = timedelta(minutes=10)) -> List[LabelPrefetchTask]:
+        """
+        Mark the oldest open tasks as processing and return them.
+        
+        The claim commits before any courier call, so no row locks are held while
+        labels are fetched. Tasks waiting for a retry are due once
+        next_attempt_at has passed, and tasks left in processing by a crashed
+        worker are claimed again once stale_after has passed.
+        """
+        now = timezone.now()
+        with transaction.atomic():
+            tasks = list(
+                self.model.objects.select_for_update(skip_locked=True, of=('self',)).select_related('shipment').filter(
+                    Q(status='pending', next_attempt_at__isnull=True) |
+                    Q(status='pending', next_attempt_at__lte=now) |
+                    Q(status='processing', claimed_at__lt=now - stale_after)
+                ).order_by('id')[:limit]
+            )
+            for task in tasks:
+                task.status = 'processing'
+                task.claimed_at = now
+                task.attempts += 1
+            self.model.objects.bulk_update(tasks, ['status', 'claimed_at', 'attempts'])
+        return tasks
+    
+    def mark_finished(self, tasks: List[LabelPrefetchTask]) -> None:
+        """Persist the outcome of claimed tasks in one statement."""
+        processed_at = timezone.now()
+        for task in tasks:
+            task.processed_at = processed_at
+        self.model.objects.bulk_update(tasks, ['status', 'error', 'next_attempt_at', 'processed_at'])
+    
+    def count_open(self) -> int:
+        """Count tasks still waiting to be processed."""
+        return self.model.objects.filter(status__in=['pending', 'processing']).count()
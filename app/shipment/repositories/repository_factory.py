@@ -3,7 +3,11 @@
 from .shipment_repository import ShipmentRepository
 from .shipment_request_repository import ShipmentRequestRepository
 from .shipment_label_repository import ShipmentLabelRepository
+from .shipment_status_repository import ShipmentStatusRepository
 from .shipper_consignee_repository import ShipperRepository, ConsigneeRepository
+from .webhook_inbox_repository import WebhookInboxRepository
+from .label_prefetch_repository import LabelPrefetchRepository
+from .cancellation_queue_repository import CancellationQueueRepository
 from core.repositories.courier_repository import (
     CourierRepository,
     CourierConfigRepository,
@@ -22,8 +26,12 @@ class RepositoryFactory:
         self._shipment_repository = None
         self._shipment_request_repository = None
         self._shipment_label_repository = None
+        self._shipment_status_repository = None
         self._shipper_repository = None
         self._consignee_repository = None
+        self._webhook_inbox_repository = None
+        self._label_prefetch_repository = None
+        self._cancellation_queue_repository = None
         self._courier_repository = None
         self._courier_config_repository = None
         self._courier_shipment_type_repository = None
@@ -52,6 +60,13 @@ class RepositoryFactory:
             self._shipment_label_repository = ShipmentLabelRepository()
         return self._shipment_label_repository
     
+    @property
+    def shipment_status(self) -> ShipmentStatusRepository:
+        """Get shipment status repository."""
+        if self._shipment_status_repository is None:
+            self._shipment_status_repository = ShipmentStatusRepository()
+        return self._shipment_status_repository
+    
     @property
     def shipper(self) -> ShipperRepository:
         """Get shipper repository."""
@@ -66,6 +81,27 @@ class RepositoryFactory:
             self._consignee_repository = ConsigneeRepository()
         return self._consignee_repository
     
+    @property
+    def webhook_inbox(self) -> WebhookInboxRepository:
+        """Get webhook inbox repository."""
+        if self._webhook_inbox_repository is None:
+            self._webhook_inbox_repository = WebhookInboxRepository()
+        return self._webhook_inbox_repository
+    
+    @property
+    def label_prefetch(self) -> LabelPrefetchRepository:
+        """Get label prefetch queue repository."""
+        if self._label_prefetch_repository is None:
+            self._label_prefetch_repository = LabelPrefetchRepository()
+        return self._label_prefetch_repository
+    
+    @property
+    def cancellation_queue(self) -> CancellationQueueRepository:
+        """Get cancellation queue repository."""
+        if self._cancellation_queue_repository is None:
+            self._cancellation_queue_repository = CancellationQueueRepository()
+        return self._cancellation_queue_repository
+    
     @property
     def courier(self) -> CourierRepository:
         """Get courier repository."""
@@ -1,5 +1,8 @@
-from typing import List, Optional
-from django.db import transaction
+from datetime import timedelta
+from typing import Any, Iterator, List, Optional
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
 from ..models import ShipmentLabel
 from .base_repository import DjangoRepository
 
@@ -7,6 +10,9 @@ from .base_repository import DjangoRepository
 class ShipmentLabelRepository(DjangoRepository):
     """Repository for ShipmentLabel model operations."""
     
+    # First key of the per-reference label fetch advisory locks
+    FETCH_LOCK_NAMESPACE = 7302
+    
     def __init__(self):
         super().__init__(ShipmentLabel)
     
@@ -23,8 +29,60 @@ class ShipmentLabelRepository(DjangoRepository):
         return self.first(reference_number=reference_number)
     
     def get_active_by_reference_number(self, reference_number: str) -> Optional[ShipmentLabel]:
-        """Get active label by reference number."""
-        return self.first(reference_number=reference_number, is_active=True)
+        """Get active label by reference number, unless its URL has expired."""
+        return self.model.objects.filter(
+            self._unexpired(),
+            reference_number=reference_number,
+            is_active=True
+        ).first()
+    
+    def get_active_id_by_reference_number(self, reference_number: str) -> Optional[int]:
+        """Get the id of the active, unexpired label by reference number."""
+        return self.model.objects.filter(
+            self._unexpired(),
+            reference_number=reference_number,
+            is_active=True
+        ).values_list('id', flat=True).first()
+    
+    def get_expiring_labels(self,
+                            before,
+                            limit: int = 100,
+                            retry_after: timedelta = timedelta(minutes=5),
+                            max_attempts: int = 3) -> List[ShipmentLabel]:
+        """
+        Get active labels whose URL is still valid but expires before the given
+        time, soonest first.
+        
+        Labels of delivered or cancelled shipments are left to expire, as are
+        expired ones; those are fetched again on their next request. Labels
+        whose refresh failed are skipped for retry_after, so they do not hold
+        back the labels behind them, and for good after max_attempts failures.
+        """
+        now = timezone.now()
+        return list(
+            self.model.objects.select_related('shipment__courier').filter(
+                Q(refresh_attempted_at__isnull=True) | Q(refresh_attempted_at__lt=now - retry_after),
+                is_active=True,
+                expires_at__gt=now,
+                expires_at__lt=before,
+                refresh_attempts__lt=max_attempts
+            ).exclude(
+                shipment__current_status__in=['delivered', 'cancelled']
+            ).order_by('expires_at')[:limit]
+        )
+    
+    def record_refresh_failures(self, label_ids: List[int]) -> int:
+        """Count a failed refresh attempt on each label in one statement."""
+        if not label_ids:
+            return 0
+        return self.model.objects.filter(id__in=label_ids).update(
+            refresh_attempts=F('refresh_attempts') + 1,
+            refresh_attempted_at=timezone.now()
+        )
+    
+    @staticmethod
+    def _unexpired() -> Q:
+        return Q(expires_at__isnull=True) | Q(expires_at__gt=timezone.now())
     
     def get_by_format(self, format: str) -> List[ShipmentLabel]:
         """Get labels by format."""
@@ -34,6 +92,10 @@ class ShipmentLabelRepository(DjangoRepository):
         """Get all active labels."""
         return self.filter(is_active=True)
     
+    def iter_active_labels(self, **projection) -> Iterator[Any]:
+        """Stream all active labels; projection is passed to iter_filter."""
+        return self.iter_filter(is_active=True, **projection)
+    
     def get_inactive_labels(self) -> List[ShipmentLabel]:
         """Get all inactive labels."""
         return self.filter(is_active=False)
@@ -44,7 +106,8 @@ class ShipmentLabelRepository(DjangoRepository):
         reference_number: str,
         url: str,
         format: str,
-        is_active: bool = True
+        is_active: bool = True,
+        expires_at=None
     ) -> ShipmentLabel:
         """Create a new shipment label."""
         return self.create(
@@ -52,14 +115,15 @@ class ShipmentLabelRepository(DjangoRepository):
             reference_number=reference_number,
             url=url,
             format=format,
-            is_active=is_active
+            is_active=is_active,
+            expires_at=expires_at
         )
     
-    def deactivate_label(self, label_id: int) -> Optional[ShipmentLabel]:
+    def deactivate_label(self, label_id: int) -> bool:
         """Deactivate a label by setting is_active to False."""
         return self.update(label_id, is_active=False)
     
-    def activate_label(self, label_id: int) -> Optional[ShipmentLabel]:
+    def activate_label(self, label_id: int) -> bool:
         """Activate a label by setting is_active to True."""
         return self.update(label_id, is_active=True)
     
@@ -101,7 +165,34 @@ class ShipmentLabelRepository(DjangoRepository):
             created_at__date__range=[start_date, end_date]
         )
     
-    def update_label_url(self, label_id: int, url: str) -> Optional[ShipmentLabel]:
+    def acquire_fetch_lock(self, reference_number: str) -> None:
+        """
+        Wait for the session-level lock that lets one process at a time fetch the
+        label of a reference from the courier. Release with release_fetch_lock.
+        """
+        if connection.vendor != 'postgresql':
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_advisory_lock(%s, hashtext(%s))',
+                [self.FETCH_LOCK_NAMESPACE, reference_number]
+            )
+    
+    def release_fetch_lock(self, reference_number: str) -> None:
+        """Release the lock taken by acquire_fetch_lock."""
+        if connection.vendor != 'postgresql':
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_advisory_unlock(%s, hashtext(%s))',
+                [self.FETCH_LOCK_NAMESPACE, reference_number]
+            )
+    
+    def set_content_hash(self, label_id: int, content_hash: str) -> int:
+        """Record the blob store hash of a label's downloaded document."""
+        return self.model.objects.filter(id=label_id).update(content_hash=content_hash)
+    
+    def update_label_url(self, label_id: int, url: str) -> bool:
         """Update the URL of a label."""
         return self.update(label_id, url=url)
     
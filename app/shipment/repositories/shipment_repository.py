@@ -1,4 +1,4 @@
-from typing import List, Optional
+from typing import Any, Iterable, Iterator, List, Optional, Set
 from django.db import transaction
 from ..models import Shipment
 from .base_repository import DjangoRepository
@@ -7,12 +7,40 @@ from .base_repository import DjangoRepository
 class ShipmentRepository(DjangoRepository):
     """Repository for Shipment model operations."""
     
+    # Relation profiles for lookups: the foreign keys joined into the shipment query
+    RELATION_PROFILES = {
+        'bare': (),
+        'with_courier': ('courier',),
+        'with_parties': ('shipper', 'consignee'),
+        'with_all': ('courier', 'shipper', 'consignee'),
+    }
+    
     def __init__(self):
         super().__init__(Shipment)
     
-    def get_by_reference_number(self, reference_number: str) -> Optional[Shipment]:
-        """Get shipment by reference number."""
-        return self.first(reference_number=reference_number)
+    def get_by_reference_number(self, reference_number: str, relations: str = 'bare') -> Optional[Shipment]:
+        """Get shipment by reference number with the relations of a profile joined in."""
+        return self._with_relations(relations).filter(reference_number=reference_number).first()
+    
+    def get_by_reference_numbers(self, reference_numbers: List[str], relations: str = 'with_all') -> List[Shipment]:
+        """Get shipments for many reference numbers with the relations of a profile joined in."""
+        return list(
+            self._with_relations(relations).filter(
+                reference_number__in=reference_numbers
+            )
+        )
+    
+    def _with_relations(self, relations: str):
+        if relations not in self.RELATION_PROFILES:
+            raise ValueError(f'Unknown relation profile: {relations}')
+        related = self.RELATION_PROFILES[relations]
+        return self.model.objects.select_related(*related) if related else self.model.objects.all()
+    
+    def get_tracking_version(self, reference_number: str) -> Optional[tuple]:
+        """Get (id, updated_at) for a reference without loading the shipment."""
+        return self.model.objects.filter(
+            reference_number=reference_number
+        ).values_list('id', 'updated_at').first()
     
     def get_latest_by_reference_number(self, reference_number: str) -> Optional[Shipment]:
         """Get the latest shipment by reference number ordered by updated_at."""
@@ -23,6 +51,19 @@ class ShipmentRepository(DjangoRepository):
         except self.model.DoesNotExist:
             return None
     
+    def lock_cancelled_ids(self, shipment_ids: Iterable[int]) -> Set[int]:
+        """
+        Lock shipments in id order, as status writers do, and return the ids of the
+        cancelled ones. Call inside a transaction.
+        """
+        return {
+            shipment_id
+            for shipment_id, current_status in self.model.objects.select_for_update().filter(
+                id__in=set(shipment_ids)
+            ).order_by('id').values_list('id', 'current_status')
+            if current_status == 'cancelled'
+        }
+    
     def get_by_courier_external_id(self, courier_external_id: str) -> Optional[Shipment]:
         """Get shipment by courier external ID."""
         return self.first(courier_external_id=courier_external_id)
@@ -32,10 +73,8 @@ class ShipmentRepository(DjangoRepository):
         return self.filter(courier_id=courier_id)
     
     def get_by_status(self, status: str) -> List[Shipment]:
-        """Get shipments by status (if status field exists)."""
-        if hasattr(self.model, 'status'):
-            return self.filter(status=status)
-        return []
+        """Get shipments by their denormalized current status."""
+        return self.filter(current_status=status)
     
     def get_recent_shipments(self, limit: int = 10) -> List[Shipment]:
         """Get recent shipments ordered by created_at."""
@@ -81,7 +120,7 @@ class ShipmentRepository(DjangoRepository):
         tracking_number: str = None,
         estimated_delivery: str = None,
         cost: float = None
-    ) -> Optional[Shipment]:
+    ) -> bool:
         """Update shipment with tracking information."""
         update_data = {}
         
@@ -107,6 +146,10 @@ class ShipmentRepository(DjangoRepository):
         """Get shipments created within a date range."""
         return self.filter(created_at__date__range=[start_date, end_date])
     
+    def iter_shipments_by_date_range(self, start_date, end_date, **projection) -> Iterator[Any]:
+        """Stream shipments created within a date range; projection is passed to iter_filter."""
+        return self.iter_filter(created_at__date__range=[start_date, end_date], **projection)
+    
     def get_shipments_by_weight_range(self, min_weight: float, max_weight: float) -> List[Shipment]:
         """Get shipments within a weight range."""
         return self.filter(weight__range=[min_weight, max_weight])
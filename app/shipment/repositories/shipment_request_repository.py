@@ -1,12 +1,21 @@
-from typing import List, Optional
+import json
+from typing import Any, Iterator, List, Optional, Union
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
 from django.utils import timezone
-from ..models import ShipmentRequest
+from ..models import ACTIVE_SHIPMENT_REQUEST_CONDITION, ShipmentRequest
 from .base_repository import DjangoRepository
 
 
 class ShipmentRequestRepository(DjangoRepository):
     """Repository for ShipmentRequest model operations."""
     
+    # Must match the predicate of the uniq_active_request_reference index so
+    # Postgres can infer it as the ON CONFLICT arbiter.
+    ACTIVE_REQUEST_PREDICATE_SQL = (
+        "(status IN ('pending', 'processing') OR (retries < 3 AND status = 'failed'))"
+    )
+    
     def __init__(self):
         super().__init__(ShipmentRequest)
     
@@ -23,6 +32,58 @@ class ShipmentRequestRepository(DjangoRepository):
         except self.model.DoesNotExist:
             return None
     
+    def get_by_idempotency_key(self, idempotency_key: str) -> Optional[ShipmentRequest]:
+        """Get shipment request by client supplied idempotency key."""
+        return self.first(idempotency_key=idempotency_key)
+    
+    def get_active_by_reference_number(self, reference_number: str) -> Optional[ShipmentRequest]:
+        """Get the pending, processing or retryable request for a reference number."""
+        return self.model.objects.filter(ACTIVE_SHIPMENT_REQUEST_CONDITION, reference_number=reference_number).first()
+    
+    def create_or_get_active(
+        self,
+        reference_number: str,
+        request_body: dict,
+        status: str = 'pending',
+        idempotency_key: str = None
+    ) -> tuple[ShipmentRequest, bool]:
+        """Insert a request unless an active one exists for the reference; return (request, created)."""
+        try:
+            with transaction.atomic():
+                if connection.vendor == 'postgresql':
+                    return self._upsert_active(reference_number, request_body, status, idempotency_key)
+                return self.create(
+                    reference_number=reference_number,
+                    request_body=request_body,
+                    status=status,
+                    idempotency_key=idempotency_key
+                ), True
+        except IntegrityError:
+            existing = None
+            if idempotency_key:
+                existing = self.get_by_idempotency_key(idempotency_key)
+            if existing is None:
+                existing = self.get_active_by_reference_number(reference_number)
+            if existing is None:
+                raise
+            return existing, False
+    
+    def _upsert_active(self, reference_number, request_body, status, idempotency_key) -> tuple[ShipmentRequest, bool]:
+        now = timezone.now()
+        rows = list(self.model.objects.raw(
+            f"""
+            INSERT INTO {self.model._meta.db_table}
+                (request_body, reference_number, status, retries, idempotency_key, created_at, updated_at)
+            VALUES (%s::jsonb, %s, %s, 0, %s, %s, %s)
+            ON CONFLICT (reference_number) WHERE {self.ACTIVE_REQUEST_PREDICATE_SQL}
+            DO UPDATE SET reference_number = EXCLUDED.reference_number
+            RETURNING *, (xmax = 0) AS inserted
+            """,
+            [json.dumps(request_body), reference_number, status, idempotency_key, now, now]
+        ))
+        shipment_request = rows[0]
+        return shipment_request, bool(shipment_request.inserted)
+    
     def get_pending_requests(self, limit: int = 10) -> List[ShipmentRequest]:
         """Get pending shipment requests."""
         return list(self.model.objects.filter(status='pending').order_by('created_at')[:limit])
@@ -60,8 +121,9 @@ class ShipmentRequestRepository(DjangoRepository):
         request_id: int,
         status: str,
         failed_reason: str = None,
-        retries: int = None
-    ) -> Optional[ShipmentRequest]:
+        retries: Union[int, F] = None,
+        refresh: bool = False
+    ) -> Union[ShipmentRequest, bool, None]:
         """Update shipment request status and related fields."""
         update_data = {'status': status}
         
@@ -72,21 +134,22 @@ class ShipmentRequestRepository(DjangoRepository):
             update_data['retries'] = retries
             update_data['last_retried_at'] = timezone.now()
         
-        return self.update(request_id, **update_data)
+        return self.update(request_id, refresh=refresh, **update_data)
     
     def mark_as_processing(self, request_id: int) -> Optional[ShipmentRequest]:
-        """Mark a shipment request as processing."""
+        """Mark a shipment request as processing and return it with its new retry count."""
         return self.update_status(
             request_id=request_id,
             status='processing',
-            retries=self.get_by_id(request_id).retries + 1 if self.get_by_id(request_id) else 0
+            retries=F('retries') + 1,
+            refresh=True
         )
     
-    def mark_as_completed(self, request_id: int) -> Optional[ShipmentRequest]:
+    def mark_as_completed(self, request_id: int) -> bool:
         """Mark a shipment request as completed."""
         return self.update_status(request_id=request_id, status='completed')
     
-    def mark_as_failed(self, request_id: int, failed_reason: str) -> Optional[ShipmentRequest]:
+    def mark_as_failed(self, request_id: int, failed_reason: str) -> bool:
         """Mark a shipment request as failed."""
         return self.update_status(
             request_id=request_id,
@@ -106,10 +169,36 @@ class ShipmentRequestRepository(DjangoRepository):
             created_at__lt=cutoff_date
         )
     
+    def iter_old_failed_requests(self, days_old: int = 7, **projection) -> Iterator[Any]:
+        """Stream failed requests older than specified days; projection is passed to iter_filter."""
+        cutoff_date = timezone.now() - timezone.timedelta(days=days_old)
+        return self.iter_filter(
+            status='failed',
+            created_at__lt=cutoff_date,
+            **projection
+        )
+    
     def exists_by_reference_number(self, reference_number: str) -> bool:
         """Check if a shipment request exists with the given reference number."""
         return self.exists(reference_number=reference_number)
     
+    def get_active_reference_numbers(self, reference_numbers: List[str]) -> set:
+        """Get which of the given reference numbers already have an active request."""
+        return set(
+            self.model.objects.filter(
+                ACTIVE_SHIPMENT_REQUEST_CONDITION,
+                reference_number__in=reference_numbers
+            ).values_list('reference_number', flat=True)
+        )
+    
+    def build_request(self, reference_number: str, request_body: dict, status: str = 'pending') -> ShipmentRequest:
+        """Build an unsaved shipment request for bulk insertion."""
+        return self.model(
+            reference_number=reference_number,
+            request_body=request_body,
+            status=status
+        )
+
     def get_recent_requests(self, limit: int = 10) -> List[ShipmentRequest]:
         """Get recent shipment requests ordered by created_at."""
         return list(self.model.objects.order_by('-created_at')[:limit])
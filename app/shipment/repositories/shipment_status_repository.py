@@ -0,0 +1,48 @@
+from typing import Iterable, Set, Tuple
+from django.db import IntegrityError, connection, transaction
+from ..models import ShipmentStatus, ShipmentStatusMarker
+from .base_repository import DjangoRepository
+
+
+class ShipmentStatusRepository(DjangoRepository):
+    """Repository for ShipmentStatus model operations."""
+    
+    def __init__(self):
+        super().__init__(ShipmentStatus)
+    
+    def claim_markers(self, pairs: Iterable[Tuple[int, str]]) -> Set[Tuple[int, str]]:
+        """Insert (shipment_id, status) markers and return the pairs that were not recorded before."""
+        pairs = list(dict.fromkeys(pairs))
+        if not pairs:
+            return set()
+        
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f"""
+                    INSERT INTO {ShipmentStatusMarker._meta.db_table} (shipment_id, status, created_at)
+                    SELECT shipment_id, status, now()
+                    FROM unnest(%s::bigint[], %s::varchar[]) AS pairs (shipment_id, status)
+                    ON CONFLICT (shipment_id, status) DO NOTHING
+                    RETURNING shipment_id, status
+                    """,
+                    [[shipment_id for shipment_id, _ in pairs], [status for _, status in pairs]]
+                )
+                return set(cursor.fetchall())
+        
+        claimed = set()
+        for shipment_id, status in pairs:
+            try:
+                with transaction.atomic():
+                    ShipmentStatusMarker.objects.create(shipment_id=shipment_id, status=status)
+                claimed.add((shipment_id, status))
+            except IntegrityError:
+                continue
+        return claimed
+    
+    def register_markers(self, pairs: Iterable[Tuple[int, str]]) -> None:
+        """Record markers for statuses written outside the webhook path, ignoring existing ones."""
+        ShipmentStatusMarker.objects.bulk_create(
+            [ShipmentStatusMarker(shipment_id=shipment_id, status=status) for shipment_id, status in set(pairs)],
+            ignore_conflicts=True
+        )
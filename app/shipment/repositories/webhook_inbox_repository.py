@@ -0,0 +1,68 @@
+from typing import Any, Dict, List
+from django.db import connection
+from django.db.models import F, Q
+from django.db.models.functions import Mod
+from django.utils import timezone
+from ..models import WebhookInboxEntry
+from .base_repository import DjangoRepository
+
+
+class WebhookInboxRepository(DjangoRepository):
+    """Repository for WebhookInboxEntry model operations."""
+    
+    # First key of the per-lane advisory locks
+    LANE_LOCK_NAMESPACE = 7301
+    
+    def __init__(self):
+        super().__init__(WebhookInboxEntry)
+    
+    def append(self, courier: str, payload: Dict[str, Any], lane_hash: int = 0) -> WebhookInboxEntry:
+        """Append a raw webhook payload to the inbox."""
+        return self.create(courier=courier, payload=payload, lane_hash=lane_hash)
+    
+    def append_many(self, courier: str, payloads: List[Dict[str, Any]], lane_hashes: List[int] = None) -> List[WebhookInboxEntry]:
+        """Append many raw webhook payloads with a single insert."""
+        lane_hashes = lane_hashes or [0] * len(payloads)
+        return self.bulk_create([
+            self.model(courier=courier, payload=payload, lane_hash=lane_hash)
+            for payload, lane_hash in zip(payloads, lane_hashes)
+        ])
+    
+    def claim_pending(self, courier: str, limit: int = 100, lane: int = 0, lanes: int = 1) -> List[WebhookInboxEntry]:
+        """
+        Lock the oldest due pending entries of one lane, skipping rows claimed by
+        other workers and entries waiting for a retry. Call inside a transaction.
+        """
+        queryset = self.model.objects.select_for_update(skip_locked=True).filter(
+            Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=timezone.now()),
+            courier=courier,
+            status='pending'
+        )
+        if lanes > 1:
+            queryset = queryset.annotate(lane=Mod(F('lane_hash'), lanes)).filter(lane=lane)
+        return list(queryset.order_by('id')[:limit])
+    
+    def try_lock_lane(self, courier: str, lane: int) -> bool:
+        """
+        Take the transaction-scoped lock that makes a worker the only consumer of a
+        lane, so one tracking number is never processed by two workers at once.
+        """
+        if connection.vendor != 'postgresql':
+            return True
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_try_advisory_xact_lock(%s, hashtext(%s))',
+                [self.LANE_LOCK_NAMESPACE, f'{courier}:{lane}']
+            )
+            return cursor.fetchone()[0]
+    
+    def mark_processed(self, entries: List[WebhookInboxEntry]) -> None:
+        """Persist status, result and retry schedule of processed entries in one statement."""
+        processed_at = timezone.now()
+        for entry in entries:
+            entry.processed_at = processed_at if entry.status != 'pending' else None
+        self.model.objects.bulk_update(entries, ['status', 'result', 'attempts', 'next_attempt_at', 'processed_at'])
+    
+    def count_pending(self, courier: str) -> int:
+        """Count entries still waiting to be processed."""
+        return self.count(courier=courier, status='pending')
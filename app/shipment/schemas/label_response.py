@@ -14,6 +14,7 @@ class LabelResponse:
     format: Optional[str] = None
     is_active: Optional[bool] = None
     created_at: Optional[str] = None
+    expires_at: Optional[str] = None
     error: Optional[str] = None
     error_code: Optional[str] = None
 
@@ -28,6 +29,7 @@ class LabelResponse:
             format=data.get('format'),
             is_active=data.get('is_active'),
             created_at=data.get('created_at'),
+            expires_at=data.get('expires_at'),
             error=data.get('error'),
             error_code=data.get('error_code')
         )
@@ -51,6 +53,8 @@ class LabelResponse:
                 result['is_active'] = self.is_active
             if self.created_at is not None:
                 result['created_at'] = self.created_at
+            if self.expires_at is not None:
+                result['expires_at'] = self.expires_at
         else:
             if self.error is not None:
                 result['error'] = self.error
@@ -61,7 +65,8 @@ class LabelResponse:
 
     @classmethod
     def create_success_response(cls, id: int, reference_number: str, url: str, 
-                              format: str, is_active: bool, created_at: str) -> 'LabelResponse':
+                              format: str, is_active: bool, created_at: str,
+                              expires_at: Optional[str] = None) -> 'LabelResponse':
         """Create successful label response."""
         return cls(
             success=True,
@@ -70,7 +75,8 @@ class LabelResponse:
             url=url,
             format=format,
             is_active=is_active,
-            created_at=created_at
+            created_at=created_at,
+            expires_at=expires_at
         )
 
     @classmethod
@@ -48,6 +48,11 @@ class ShipmentRequestResponse:
             'message': "Shipment request with this reference number is already under process",
             'status_code': 200,
             'data_type': 'ShipmentRequestData'
+        },
+        'idempotent_replay': {
+            'message': "Shipment request with this idempotency key already exists",
+            'status_code': 200,
+            'data_type': 'ShipmentRequestData'
         }
     }
 
@@ -62,8 +67,8 @@ class ShipmentRequestResponse:
         Create response for shipment request endpoint.
         
         Args:
-            response_type: Type of response ('new', 'existing_shipment', 'already_processing')
-            shipment_request: ShipmentRequest object (for 'new' and 'already_processing')
+            response_type: Type of response ('new', 'existing_shipment', 'already_processing', 'idempotent_replay')
+            shipment_request: ShipmentRequest object (for 'new', 'already_processing' and 'idempotent_replay')
             existing_shipment: Shipment object (for 'existing_shipment')
             shipper_id: Shipper ID (for 'new' and 'already_processing')
             consignee_id: Consignee ID (for 'new' and 'already_processing')
@@ -81,7 +86,7 @@ class ShipmentRequestResponse:
                 status="completed",
                 created_at=existing_shipment.created_at
             )
-        else:  # 'new' or 'already_processing'
+        else:  # 'new', 'already_processing' or 'idempotent_replay'
             # Get shipper/consignee IDs - use provided values or extract from request_body
             final_shipper_id = shipper_id or shipment_request.request_body.get('shipper_id')
             final_consignee_id = consignee_id or shipment_request.request_body.get('consignee_id')
@@ -138,3 +138,42 @@ class ShipmentRequestCreateSerializer(serializers.Serializer):
                 f"on route from '{shipper_city}' to '{consignee_city}'. "
                 f"Please try a different shipment type or contact support."
             )
+
+
+class BatchTrackingRequestSerializer(serializers.Serializer):
+    MAX_REFERENCES = 250
+    
+    reference_numbers = serializers.ListField(
+        child=serializers.CharField(max_length=255),
+        allow_empty=False,
+        max_length=MAX_REFERENCES
+    )
+    
+    def validate_reference_numbers(self, value):
+        return list(dict.fromkeys(value))
+
+
+class BulkCancellationRequestSerializer(serializers.Serializer):
+    MAX_REFERENCES = 1000
+    
+    reference_numbers = serializers.ListField(
+        child=serializers.CharField(max_length=255),
+        allow_empty=False,
+        max_length=MAX_REFERENCES
+    )
+    
+    def validate_reference_numbers(self, value):
+        return list(dict.fromkeys(value))
+
+
+class LabelPrintRunRequestSerializer(serializers.Serializer):
+    MAX_REFERENCES = 500
+    
+    reference_numbers = serializers.ListField(
+        child=serializers.CharField(max_length=255),
+        allow_empty=False,
+        max_length=MAX_REFERENCES
+    )
+    
+    def validate_reference_numbers(self, value):
+        return list(dict.fromkeys(value))
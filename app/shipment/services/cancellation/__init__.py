@@ -2,8 +2,12 @@
 
 from .shipment_cancellation_service import ShipmentCancellationService
 from .courier_cancellation_service import CourierCancellationService
+from .cancellation_queue_service import CancellationQueueService
+from .cancellation_queue_processor import CancellationQueueProcessor
 
 __all__ = [
     'ShipmentCancellationService',
-    'CourierCancellationService'
+    'CourierCancellationService',
+    'CancellationQueueService',
+    'CancellationQueueProcessor'
 ]
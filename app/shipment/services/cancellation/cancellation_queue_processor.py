@@ -0,0 +1,127 @@
+import logging
+from datetime import timedelta
+from typing import Any, Dict, List
+from django.db import transaction
+from django.utils import timezone
+from ...models import CancellationQueueEntry
+from ...repositories.repository_factory import repositories
+from ..couriers.cancellable_courier_interface import CancellableCourierInterface
+from ..status.shipment_status_service import ShipmentStatusService
+from .shipment_cancellation_service import ShipmentCancellationService
+
+logger = logging.getLogger(__name__)
+
+
+class CancellationQueueProcessor:
+    """
+    Drains the cancellation queue in batches.
+
+    Claimed entries are grouped per courier and cancelled with the courier's
+    batched call. Cancelled shipments get their `cancelled` status in one bulk
+    insert; retryable failures are retried with exponential backoff.
+    """
+
+    MAX_ATTEMPTS = 5
+    RETRY_BASE_DELAY = timedelta(seconds=30)
+
+    def __init__(self, courier_factory_instance=None):
+        self._courier_factory = courier_factory_instance
+        self._cancellation_queue_repo = repositories.cancellation_queue
+
+    def process_batch(self, batch_size: int = 100) -> Dict[str, Any]:
+        results = {
+            'total': 0,
+            'cancelled': 0,
+            'retried': 0,
+            'failed': 0
+        }
+
+        entries = self._cancellation_queue_repo.claim(batch_size)
+        if not entries:
+            return results
+
+        if not self._courier_factory:
+            from ..couriers.courier_factory import courier_factory
+            self._courier_factory = courier_factory
+
+        entries_by_courier = {}
+        for entry in entries:
+            current_status = ShipmentStatusService.get_current_status(entry.shipment)
+            if current_status in ShipmentCancellationService.NON_CANCELLABLE_STATUSES:
+                # The shipment moved on while the entry was queued
+                self._fail(entry, 'STATUS_NOT_CANCELLABLE', f'Cannot cancel shipment with status: {current_status}')
+                continue
+            entries_by_courier.setdefault(entry.courier, []).append(entry)
+
+        for courier_name, courier_entries in entries_by_courier.items():
+            self._cancel_with_courier(courier_name, courier_entries)
+
+        cancelled = [entry for entry in entries if entry.status == 'cancelled']
+        with transaction.atomic():
+            if cancelled:
+                ShipmentStatusService.create_statuses([
+                    {'shipment': entry.shipment, 'status': 'cancelled'}
+                    for entry in cancelled
+                ])
+            self._cancellation_queue_repo.mark_finished(entries)
+
+        for entry in entries:
+            if entry.status == 'pending':
+                results['retried'] += 1
+            else:
+                results[entry.status] += 1
+        results['total'] = len(entries)
+        logger.info(
+            f"CancellationQueueProcessor: Processed {len(entries)} entries: {results['cancelled']} cancelled, "
+            f"{results['retried']} retried, {results['failed']} failed"
+        )
+        return results
+
+    def _cancel_with_courier(self, courier_name: str, entries: List[CancellationQueueEntry]) -> None:
+        courier_instance = self._courier_factory.get_courier_instance(courier_name, entries[0].shipment.courier)
+        if not courier_instance:
+            for entry in entries:
+                self._retry_or_fail(entry, 'COURIER_NOT_FOUND', 'Courier instance not found')
+            return
+        if not isinstance(courier_instance, CancellableCourierInterface):
+            for entry in entries:
+                self._fail(entry, 'CANCELLATION_NOT_SUPPORTED', 'Courier does not support cancellation')
+            return
+
+        try:
+            outcomes = courier_instance.cancel_shipments([entry.shipment.courier_external_id for entry in entries])
+        except Exception as e:
+            logger.error(f"CancellationQueueProcessor: Error cancelling with {courier_name}: {str(e)}")
+            outcomes = {}
+
+        for entry in entries:
+            outcome = outcomes.get(entry.shipment.courier_external_id)
+            if outcome is None:
+                self._retry_or_fail(entry, 'COURIER_CANCELLATION_ERROR', 'No result from courier')
+            elif outcome.get('success'):
+                entry.status = 'cancelled'
+                entry.error_code = None
+                entry.error = None
+                entry.next_attempt_at = None
+            elif outcome.get('retryable'):
+                self._retry_or_fail(entry, 'COURIER_CANCELLATION_FAILED', outcome.get('message'))
+            else:
+                self._fail(entry, 'COURIER_CANCELLATION_FAILED', outcome.get('message'))
+
+    def _retry_or_fail(self, entry: CancellationQueueEntry, error_code: str, error: str) -> None:
+        if entry.attempts >= self.MAX_ATTEMPTS:
+            self._fail(entry, error_code, error)
+            return
+        delay = self.RETRY_BASE_DELAY * (2 ** (entry.attempts - 1))
+        logger.warning(f"CancellationQueueProcessor: Retrying {entry.reference_number} in {delay}: {error}")
+        entry.status = 'pending'
+        entry.error_code = error_code
+        entry.error = error
+        entry.next_attempt_at = timezone.now() + delay
+
+    def _fail(self, entry: CancellationQueueEntry, error_code: str, error: str) -> None:
+        logger.error(f"CancellationQueueProcessor: Cancellation of {entry.reference_number} failed: {error}")
+        entry.status = 'failed'
+        entry.error_code = error_code
+        entry.error = error
+        entry.next_attempt_at = None
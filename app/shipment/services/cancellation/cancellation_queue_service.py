@@ -0,0 +1,118 @@
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from django.db import transaction
+from ...models import CancellationQueueEntry, Shipment
+from ...repositories.repository_factory import repositories
+from ..status.shipment_status_service import ShipmentStatusService
+from .shipment_cancellation_service import ShipmentCancellationService
+
+logger = logging.getLogger(__name__)
+
+
+class CancellationQueueService:
+    """
+    Accepts bulk cancellations as a job and reports its progress.
+
+    References are checked up front with one query; the ones that can be
+    cancelled are queued for the cancellation worker, the rest are recorded as
+    failed entries of the same job. Entries that lose a race with a concurrent
+    job for the same shipment are recorded as already queued.
+    """
+
+    ALREADY_QUEUED = ('CANCELLATION_ALREADY_QUEUED', 'Shipment is already queued for cancellation')
+
+    def __init__(self):
+        self._shipment_repo = repositories.shipment
+        self._cancellation_queue_repo = repositories.cancellation_queue
+
+    def enqueue(self, reference_numbers: List[str]) -> Dict[str, Any]:
+        shipments = {
+            shipment.reference_number: shipment
+            for shipment in self._shipment_repo.get_by_reference_numbers(reference_numbers, 'with_courier')
+        }
+        queued_ids = self._cancellation_queue_repo.get_open_shipment_ids(shipment.id for shipment in shipments.values())
+
+        entries = []
+        rejected = []
+        for reference_number in reference_numbers:
+            shipment = shipments.get(reference_number)
+            entry = CancellationQueueEntry(
+                shipment=shipment,
+                reference_number=reference_number,
+                courier=shipment.courier.name.lower() if shipment else ''
+            )
+            rejection = self._rejection(shipment, queued_ids)
+            if rejection:
+                rejected.append(self._reject(entry, rejection))
+            entries.append(entry)
+
+        with transaction.atomic():
+            job = self._cancellation_queue_repo.create_job(entries)
+            dropped = self._dropped_entries(entries, job.id)
+            if dropped:
+                for entry in dropped:
+                    rejected.append(self._reject(entry, self.ALREADY_QUEUED))
+                self._cancellation_queue_repo.bulk_create(dropped)
+                logger.warning(f"CancellationQueueService: Job {job.id} lost {len(dropped)} entries to concurrently queued cancellations")
+        logger.info(f"CancellationQueueService: Job {job.id} queued {len(entries) - len(rejected)} of {len(entries)} cancellations")
+        return {
+            'job_id': job.id,
+            'total': len(entries),
+            'queued': len(entries) - len(rejected),
+            'rejected': rejected
+        }
+
+    def get_job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        summary = self._cancellation_queue_repo.get_job_summary(job_id)
+        if summary is None:
+            return None
+        counts = summary['counts']
+        return {
+            'job_id': job_id,
+            'total': sum(counts.values()),
+            'pending': counts.get('pending', 0) + counts.get('processing', 0),
+            'cancelled': counts.get('cancelled', 0),
+            'failed': counts.get('failed', 0),
+            'done': counts.get('pending', 0) + counts.get('processing', 0) == 0,
+            'entries': [
+                {**entry, 'processed_at': entry['processed_at'].isoformat() if entry['processed_at'] else None}
+                for entry in summary['entries']
+            ]
+        }
+
+    def _dropped_entries(self, entries: List[CancellationQueueEntry], job_id: int) -> List[CancellationQueueEntry]:
+        """Open entries the job insert skipped because their shipment was already queued."""
+        inserted_ids = self._cancellation_queue_repo.get_open_shipment_ids(job_id=job_id)
+        dropped = []
+        for entry in entries:
+            if entry.status != 'pending':
+                continue
+            if entry.shipment_id in inserted_ids:
+                # Only the first entry of a shipment is inserted
+                inserted_ids.discard(entry.shipment_id)
+            else:
+                dropped.append(entry)
+        return dropped
+
+    @staticmethod
+    def _reject(entry: CancellationQueueEntry, rejection: Tuple[str, str]) -> Dict[str, Any]:
+        entry.status = 'failed'
+        entry.error_code, entry.error = rejection
+        return {
+            'reference_number': entry.reference_number,
+            'error_code': entry.error_code,
+            'error': entry.error
+        }
+
+    @staticmethod
+    def _rejection(shipment: Optional[Shipment], queued_ids) -> Optional[Tuple[str, str]]:
+        if not shipment:
+            return 'SHIPMENT_NOT_FOUND', 'Shipment not found'
+        if not shipment.courier.supports_cancellation:
+            return 'CANCELLATION_NOT_SUPPORTED', f'Courier {shipment.courier.name} does not support cancellation'
+        if shipment.id in queued_ids:
+            return CancellationQueueService.ALREADY_QUEUED
+        current_status = ShipmentStatusService.get_current_status(shipment)
+        if current_status in ShipmentCancellationService.NON_CANCELLABLE_STATUSES:
+            return 'STATUS_NOT_CANCELLABLE', f'Cannot cancel shipment with status: {current_status}'
+        return None
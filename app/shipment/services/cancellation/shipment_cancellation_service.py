@@ -1,8 +1,9 @@
 import logging
 from typing import Dict, Any, Optional
 from django.db import transaction
-from ...models import Shipment, ShipmentStatus
+from ...models import Shipment
 from ...services.shipments.shipment_lookup_service import ShipmentLookupService
+from ...services.status.shipment_status_service import ShipmentStatusService
 from ...schemas.cancellation_response import CancellationResponse
 from .courier_cancellation_service import CourierCancellationService
 
@@ -10,6 +11,8 @@ logger = logging.getLogger(__name__)
 
 
 class ShipmentCancellationService:
+    NON_CANCELLABLE_STATUSES = ['completed', 'in_transit', 'delivered', 'cancelled']
+    
     def __init__(self, 
                  lookup_service: ShipmentLookupService = None,
                  courier_cancellation_service: CourierCancellationService = None):
@@ -20,7 +23,8 @@ class ShipmentCancellationService:
         try:
             logger.info(f"ShipmentCancellationService: Cancelling shipment for reference {reference_number}")
             
-            shipment = self._lookup_service.get_shipment_by_reference(reference_number)
+            # The status check below must see the latest status, so read from the primary
+            shipment = self._lookup_service.get_shipment_by_reference(reference_number, 'with_courier', use_replica=False)
             if not shipment:
                 return CancellationResponse.create_error_response(
                     'Shipment not found',
@@ -72,20 +76,17 @@ class ShipmentCancellationService:
     def _check_shipment_cancellable(self, shipment: Shipment) -> CancellationResponse:
         """Check if shipment can be cancelled based on its status."""
         try:
-            latest_status = ShipmentStatus.objects.filter(
-                shipment=shipment
-            ).order_by('-created_at').first()
+            current_status = ShipmentStatusService.get_current_status(shipment)
             
-            if not latest_status:
+            if not current_status:
                 return CancellationResponse.create_error_response(
                     'No status found for shipment',
                     'NO_STATUS_FOUND'
                 )
             
-            non_cancellable_statuses = ['completed', 'in_transit', 'delivered', 'cancelled']
-            if latest_status.status in non_cancellable_statuses:
+            if current_status in self.NON_CANCELLABLE_STATUSES:
                 return CancellationResponse.create_error_response(
-                    f'Cannot cancel shipment with status: {latest_status.status}',
+                    f'Cannot cancel shipment with status: {current_status}',
                     'STATUS_NOT_CANCELLABLE'
                 )
             
@@ -104,8 +105,6 @@ class ShipmentCancellationService:
     def _update_shipment_status(self, shipment: Shipment) -> None:
         """Update shipment status to cancelled."""
         try:
-            from ...services.status.shipment_status_service import ShipmentStatusService
-            
             ShipmentStatusService.create_status(
                 shipment=shipment,
                 status='cancelled'
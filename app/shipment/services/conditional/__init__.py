@@ -0,0 +1,7 @@
+"""Conditional request services for HTTP validators."""
+
+from .etag_service import ETagService
+
+__all__ = [
+    'ETagService'
+]
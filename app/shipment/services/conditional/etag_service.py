@@ -0,0 +1,48 @@
+import logging
+from typing import Optional
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+from ...repositories.repository_factory import repositories
+
+logger = logging.getLogger(__name__)
+
+
+class ETagService:
+    """Builds strong validators for tracking and label responses from a single indexed lookup."""
+
+    def __init__(self):
+        self._shipment_repo = repositories.shipment
+        self._shipment_label_repo = repositories.shipment_label
+
+    def tracking_etag(self, reference_number: str) -> Optional[str]:
+        version = self._shipment_repo.get_tracking_version(reference_number)
+        if not version or version[1] is None:
+            return None
+        shipment_id, updated_at = version
+        return quote_etag(f'track-{shipment_id}-{int(updated_at.timestamp() * 1000000)}')
+
+    def label_etag(self, reference_number: str) -> Optional[str]:
+        label_id = self._shipment_label_repo.get_active_id_by_reference_number(reference_number)
+        return self.label_etag_for(label_id) if label_id else None
+
+    @staticmethod
+    def label_etag_for(label_id: int) -> str:
+        return quote_etag(f'label-{label_id}')
+
+    @staticmethod
+    def is_not_modified(request, etag: Optional[str]) -> bool:
+        if not etag:
+            return False
+        if_none_match = request.headers.get('If-None-Match')
+        if not if_none_match:
+            return False
+        # If-None-Match uses weak comparison, so W/ prefixes are ignored
+        client_etags = {tag.removeprefix('W/') for tag in parse_etags(if_none_match)}
+        return '*' in client_etags or etag in client_etags
+
+    @staticmethod
+    def not_modified_response(etag: str) -> Response:
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        response['ETag'] = etag
+        return response
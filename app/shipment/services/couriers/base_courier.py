@@ -1,6 +1,6 @@
 import logging
 from abc import ABC, abstractmethod
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from ...schemas.shipment_request import ShipmentRequest
 from ...schemas.shipment_response import ShipmentResponse
 from ...schemas.tracking_response import TrackingResponse
@@ -32,6 +32,13 @@ class BaseCourier(ABC):
     def fetch_label(self, courier_external_id: str) -> LabelResponse:
         pass
     
+    def fetch_labels(self, courier_external_ids: List[str]) -> Dict[str, LabelResponse]:
+        """Fetch many labels; couriers with a multi-shipment label call override this."""
+        return {
+            courier_external_id: self.fetch_label(courier_external_id)
+            for courier_external_id in courier_external_ids
+        }
+    
     @abstractmethod
     def track_shipment(self, courier_external_id: str) -> TrackingResponse:
         pass
@@ -1,8 +1,21 @@
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Dict, Any, List
 
 
 class CancellableCourierInterface(ABC):
     @abstractmethod
     def cancel_shipment(self, courier_external_id: str) -> Dict[str, Any]:
         pass
+    
+    def cancel_shipments(self, courier_external_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Cancel many shipments; couriers with a multi-shipment cancel call override this.
+        
+        Each result holds success and message, and retryable when a failure
+        may succeed on a later attempt.
+        """
+        results = {}
+        for courier_external_id in courier_external_ids:
+            result = self.cancel_shipment(courier_external_id)
+            results[courier_external_id] = {**result, 'retryable': not result.get('success')}
+        return results
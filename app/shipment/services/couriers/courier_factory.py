@@ -1,5 +1,5 @@
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from .courier_dtos import CourierRequest, CourierResponse
 from .dhl_courier import DHLCourier
 from .base_courier import BaseCourier
@@ -99,6 +99,27 @@ class CourierFactory:
                 'COURIER_API_ERROR'
             )
     
+    def fetch_labels(self, courier_name: str, courier_external_ids: List[str]) -> Dict[str, LabelResponse]:
+        """Fetch many labels from one courier, batched where the courier supports it."""
+        logger.info(f"CourierFactory: Fetching {len(courier_external_ids)} labels with courier '{courier_name}'")
+        try:
+            courier = self.get_courier_instance(courier_name)
+            if not courier:
+                logger.error(f"CourierFactory: Courier '{courier_name}' not found or not configured")
+                error = LabelResponse.create_error_response(
+                    f"Courier '{courier_name}' not found or not configured",
+                    'COURIER_NOT_FOUND'
+                )
+                return {courier_external_id: error for courier_external_id in courier_external_ids}
+            
+            return courier.fetch_labels(courier_external_ids)
+        except Exception as e:
+            error = LabelResponse.create_error_response(
+                f"Failed to fetch labels with {courier_name}: {str(e)}",
+                'COURIER_API_ERROR'
+            )
+            return {courier_external_id: error for courier_external_id in courier_external_ids}
+    
     def track_shipment(self, courier_name: str, courier_external_id: str) -> TrackingResponse:
         logger.info(f"CourierFactory: Tracking shipment with courier '{courier_name}'")
         try:
@@ -1,5 +1,5 @@
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List
 from .base_courier import BaseCourier
 from .cancellable_courier_interface import CancellableCourierInterface
 from ...schemas.shipment_request import ShipmentRequest
@@ -17,6 +17,10 @@ logger = logging.getLogger(__name__)
 
 
 class DHLCourier(BaseCourier, CancellableCourierInterface):
+    # Shipment numbers accepted by one GET or DELETE /orders call
+    LABELS_PER_REQUEST = 30
+    CANCELLATIONS_PER_REQUEST = 30
+    
     def _create_http_client(self):
         return DHLHttpClient(
             base_url=self.config.get('base_url', ''),
@@ -36,6 +40,32 @@ class DHLCourier(BaseCourier, CancellableCourierInterface):
             response_data.get('success', False)
         )
     
+    def fetch_labels(self, courier_external_ids: List[str]) -> Dict[str, LabelResponse]:
+        """Fetch labels with one GET /orders call per LABELS_PER_REQUEST shipments."""
+        labels = {}
+        for start in range(0, len(courier_external_ids), self.LABELS_PER_REQUEST):
+            chunk = courier_external_ids[start:start + self.LABELS_PER_REQUEST]
+            logger.info(f"DHL: Fetching labels for {len(chunk)} shipments")
+            response = self.http_client.get_labels(chunk)
+            
+            if not (response.get('success') and response.get('data')):
+                # DHL answers partial failures with a multi-status error; the
+                # per-shipment calls report each shipment's own error
+                logger.warning(f"DHL: Batch label request failed, fetching {len(chunk)} labels one by one")
+                labels.update(super().fetch_labels(chunk))
+                continue
+            
+            parsed = DHLLabelResponseParser.parse_items(response['data'])
+            for courier_external_id in chunk:
+                if courier_external_id in parsed:
+                    labels[courier_external_id] = LabelResponse.from_dict(parsed[courier_external_id])
+                else:
+                    labels[courier_external_id] = LabelResponse.create_error_response(
+                        'Label URL not found in DHL response',
+                        'LABEL_URL_NOT_FOUND'
+                    )
+        return labels
+    
     def fetch_label(self, courier_external_id: str) -> LabelResponse:
         try:
             logger.info(f"DHL: Fetching label for shipment {courier_external_id}")
@@ -133,6 +163,58 @@ class DHLCourier(BaseCourier, CancellableCourierInterface):
                 'COURIER_API_ERROR'
             )
     
+    def cancel_shipments(self, courier_external_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """Cancel shipments with one DELETE /orders call per CANCELLATIONS_PER_REQUEST shipments."""
+        results = {}
+        for start in range(0, len(courier_external_ids), self.CANCELLATIONS_PER_REQUEST):
+            chunk = courier_external_ids[start:start + self.CANCELLATIONS_PER_REQUEST]
+            logger.info(f"DHL: Cancelling {len(chunk)} shipments")
+            response = self.http_client.cancel_shipments(chunk)
+            
+            if not response.get('success'):
+                status_code = response.get('status_code', 0)
+                if 400 <= status_code < 500 and status_code != 429:
+                    # A rejected batch says nothing about single shipments
+                    logger.warning(f"DHL: Batch cancellation rejected, cancelling {len(chunk)} shipments one by one")
+                    results.update(super().cancel_shipments(chunk))
+                else:
+                    for courier_external_id in chunk:
+                        results[courier_external_id] = {
+                            'success': False,
+                            'message': f"DHL cancellation failed: {response.get('error')}",
+                            'retryable': True
+                        }
+                continue
+            
+            item_statuses = {
+                item.get('shipmentNo'): item.get('sstatus') or {}
+                for item in (response.get('data') or {}).get('items') or []
+            }
+            for courier_external_id in chunk:
+                item_status = item_statuses.get(courier_external_id)
+                if item_status is None:
+                    # A plain 200 without items covers the whole batch
+                    if response.get('status_code') == 200 and not item_statuses:
+                        results[courier_external_id] = {'success': True, 'message': 'Shipment cancelled successfully with DHL'}
+                    else:
+                        results[courier_external_id] = {
+                            'success': False,
+                            'message': 'Shipment missing from DHL cancellation response',
+                            'retryable': True
+                        }
+                    continue
+                
+                status_code = item_status.get('statusCode', 200)
+                if status_code == 200:
+                    results[courier_external_id] = {'success': True, 'message': 'Shipment cancelled successfully with DHL'}
+                else:
+                    results[courier_external_id] = {
+                        'success': False,
+                        'message': f"DHL cancellation failed: {item_status.get('title') or item_status.get('detail') or status_code}",
+                        'retryable': status_code >= 500 or status_code == 429
+                    }
+        return results
+    
     def cancel_shipment(self, courier_external_id: str) -> Dict[str, Any]:
         try:
             logger.info(f"DHL: Cancelling shipment {courier_external_id}")
@@ -1,6 +1,7 @@
 import logging
 import requests
-from typing import Dict, Any, Optional
+from urllib.parse import urlencode
+from typing import Dict, Any, List, Optional
 from .base_client import BaseHttpClient
 
 logger = logging.getLogger(__name__)
@@ -193,6 +194,63 @@ class DHLHttpClient(BaseHttpClient):
                 'status_code': 0
             }
     
+    def cancel_shipments(self, courier_external_ids: List[str]) -> Dict[str, Any]:
+        """Cancel many shipments with one DELETE; DHL answers 207 when only some succeed."""
+        try:
+            query = urlencode(
+                [('profile', 'STANDARD_GRUPPENPROFIL')] +
+                [('shipment', courier_external_id) for courier_external_id in courier_external_ids]
+            )
+            endpoint = f"parcel/de/shipping/v2/orders?{query}"
+            
+            logger.info(f"DHLHttpClient: Cancelling {len(courier_external_ids)} shipments")
+            
+            response = self._make_request('DELETE', endpoint)
+            
+            if response.status_code in (200, 207):
+                return {
+                    'success': True,
+                    'data': response.json() if response.content else {},
+                    'status_code': response.status_code
+                }
+            else:
+                logger.warning(f"DHLHttpClient: Batch cancellation failed with status {response.status_code}")
+                return {
+                    'success': False,
+                    'error': f"DHL API error: HTTP {response.status_code}",
+                    'data': response.text,
+                    'status_code': response.status_code
+                }
+                
+        except Exception as e:
+            logger.error(f"DHLHttpClient: Error cancelling shipments: {str(e)}")
+            return {
+                'success': False,
+                'error': f"Network error: {str(e)}",
+                'data': None,
+                'status_code': 0
+            }
+    
+    def get_labels(self, courier_external_ids: List[str]) -> Dict[str, Any]:
+        try:
+            endpoint = "parcel/de/shipping/v2/orders"
+            params = {
+                'shipment': list(courier_external_ids),
+                'docFormat': 'PDF',
+                'includeDocs': 'URL'
+            }
+            
+            logger.info(f"DHLHttpClient: Getting labels for {len(courier_external_ids)} shipments")
+            return self.get(endpoint, params=params)
+                
+        except Exception as e:
+            logger.error(f"DHLHttpClient: Error getting labels: {str(e)}")
+            return {
+                'success': False,
+                'error': f"DHL API error: {str(e)}",
+                'status_code': 0
+            }
+    
     def get_label(self, courier_external_id: str) -> Dict[str, Any]:
         try:
             endpoint = "parcel/de/shipping/v2/orders"
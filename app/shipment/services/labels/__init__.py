@@ -4,10 +4,27 @@ from .shipment_label_service import ShipmentLabelService
 from .label_cache_service import LabelCacheService
 from .label_response_handler import LabelResponseHandler
 from .dhl_label_response_parser import DHLLabelResponseParser
+from .label_blob_store import LabelBlobStore, label_blob_store
+from .label_document_service import LabelDocumentService
+from .label_prefetch_service import LabelPrefetchService, CourierRateLimiter
+from .single_flight import SingleFlight, label_fetch_flights
+from .label_pdf_merger import LabelPdfMerger
+from .label_print_run_service import LabelPrintRunService
+from .label_refresh_service import LabelRefreshService
 
 __all__ = [
     'ShipmentLabelService',
     'LabelCacheService',
     'LabelResponseHandler',
-    'DHLLabelResponseParser'
+    'DHLLabelResponseParser',
+    'LabelBlobStore',
+    'label_blob_store',
+    'LabelDocumentService',
+    'LabelPrefetchService',
+    'CourierRateLimiter',
+    'SingleFlight',
+    'label_fetch_flights',
+    'LabelPdfMerger',
+    'LabelPrintRunService',
+    'LabelRefreshService'
 ]
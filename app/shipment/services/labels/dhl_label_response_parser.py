@@ -26,6 +26,23 @@ class DHLLabelResponseParser:
             logger.error(f"DHLLabelResponseParser: Error parsing success response: {str(e)}")
             return None
     
+    @staticmethod
+    def parse_items(response_data: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """Parse a multi-shipment label response into label data keyed by shipment number."""
+        labels = {}
+        try:
+            for item in response_data.get('items') or []:
+                label_data = item.get('label') or {}
+                if item.get('shipmentNo') and label_data.get('url'):
+                    labels[item['shipmentNo']] = {
+                        'success': True,
+                        'url': label_data['url'],
+                        'format': label_data.get('fileFormat', 'PDF')
+                    }
+        except Exception as e:
+            logger.error(f"DHLLabelResponseParser: Error parsing label items: {str(e)}")
+        return labels
+    
     @staticmethod
     def parse_error_response(error_message: str) -> Dict[str, Any]:
         try:
@@ -0,0 +1,160 @@
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from typing import Any, Dict, Iterator, Optional
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LabelBlobStore:
+    """
+    Content-addressed store for label documents on local disk.
+
+    Documents live at <root>/<hash[:2]>/<hash>, keyed by their SHA-256. Reads
+    touch the file's mtime, and once the store grows past its byte cap the
+    least recently used documents are evicted down to LOW_WATER_RATIO of it, so
+    the next puts fit without another directory scan. Root and cap are read
+    from the LABEL_STORE_DIR and LABEL_STORE_MAX_BYTES settings.
+    """
+
+    CHUNK_SIZE = 64 * 1024
+    LOW_WATER_RATIO = 0.9
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._total_bytes = None
+        self._total_root = None
+
+    @property
+    def root(self) -> str:
+        return str(settings.LABEL_STORE_DIR)
+
+    @property
+    def max_bytes(self) -> int:
+        return int(settings.LABEL_STORE_MAX_BYTES)
+
+    @staticmethod
+    def is_valid_hash(content_hash: Optional[str]) -> bool:
+        return bool(content_hash) and len(content_hash) == 64 and all(c in '0123456789abcdef' for c in content_hash)
+
+    def path(self, content_hash: str) -> str:
+        return os.path.join(self.root, content_hash[:2], content_hash)
+
+    def exists(self, content_hash: Optional[str]) -> bool:
+        return self.is_valid_hash(content_hash) and os.path.isfile(self.path(content_hash))
+
+    def put_chunks(self, chunks: Iterator[bytes]) -> str:
+        """Store a document streamed in chunks and return its hash; identical content is stored once."""
+        os.makedirs(self.root, exist_ok=True)
+        digest = hashlib.sha256()
+        size = 0
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self.root, prefix='.incoming-')
+        try:
+            with os.fdopen(file_descriptor, 'wb') as temp_file:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    size += len(chunk)
+                    temp_file.write(chunk)
+
+            content_hash = digest.hexdigest()
+            path = self.path(content_hash)
+            if os.path.isfile(path):
+                os.unlink(temp_path)
+                self.touch(content_hash)
+                return content_hash
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(temp_path, path)
+        except Exception:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+
+        logger.info(f"LabelBlobStore: Stored document {content_hash} ({size} bytes)")
+        self._record_added(size)
+        return content_hash
+
+    def put(self, content: bytes) -> str:
+        return self.put_chunks(iter([content]))
+
+    def open(self, content_hash: str):
+        """Open a stored document for reading and mark it recently used; None when missing."""
+        if not self.is_valid_hash(content_hash):
+            return None
+        try:
+            document = open(self.path(content_hash), 'rb')
+        except FileNotFoundError:
+            return None
+        self.touch(content_hash)
+        return document
+
+    def touch(self, content_hash: str) -> None:
+        try:
+            os.utime(self.path(content_hash))
+        except FileNotFoundError:
+            pass
+
+    def evict(self, max_bytes: Optional[int] = None) -> int:
+        """
+        Delete least recently used documents until the store fits in max_bytes,
+        by default the low-water mark of the cap; returns bytes freed.
+        """
+        max_bytes = int(self.max_bytes * self.LOW_WATER_RATIO) if max_bytes is None else max_bytes
+        with self._lock:
+            entries = list(self._scan())
+            total = sum(size for _, size, _ in entries)
+            freed = 0
+            for path, size, _ in sorted(entries, key=lambda entry: entry[2]):
+                if total - freed <= max_bytes:
+                    break
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                freed += size
+
+            self._total_bytes = total - freed
+            self._total_root = self.root
+
+        if freed:
+            logger.info(f"LabelBlobStore: Evicted {freed} bytes, {self._total_bytes} bytes remain")
+        return freed
+
+    def stats(self) -> Dict[str, Any]:
+        entries = list(self._scan())
+        return {
+            'root': self.root,
+            'documents': len(entries),
+            'bytes': sum(size for _, size, _ in entries),
+            'max_bytes': self.max_bytes
+        }
+
+    def _record_added(self, size: int) -> None:
+        # The running total is per process; eviction rescans the directory for the real size
+        with self._lock:
+            if self._total_bytes is None or self._total_root != self.root:
+                self._total_bytes = sum(entry_size for _, entry_size, _ in self._scan())
+                self._total_root = self.root
+            else:
+                self._total_bytes += size
+            over_cap = self._total_bytes > self.max_bytes
+        if over_cap:
+            self.evict()
+
+    def _scan(self):
+        if not os.path.isdir(self.root):
+            return
+        for shard in os.scandir(self.root):
+            if not shard.is_dir() or len(shard.name) != 2:
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.is_file():
+                    stat = entry.stat()
+                    yield entry.path, stat.st_size, stat.st_mtime
+
+
+# Global store instance shared by the label services
+label_blob_store = LabelBlobStore()
@@ -1,5 +1,9 @@
 import logging
+from datetime import datetime, timedelta, timezone as dt_timezone
 from typing import Dict, Any, Optional
+from django.conf import settings
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from ...repositories.repository_factory import repositories
 from ...schemas.label_response import LabelResponse
 
@@ -10,9 +14,14 @@ class LabelCacheService:
     def __init__(self):
         self._shipment_label_repo = repositories.shipment_label
     
-    def get_cached_label(self, reference_number: str) -> Optional[LabelResponse]:
+    def get_cached_label(self, reference_number: str, use_replica: bool = True) -> Optional[LabelResponse]:
         try:
-            existing_label = self._shipment_label_repo.get_active_by_reference_number(reference_number)
+            if use_replica:
+                existing_label = self._shipment_label_repo.read_from_replica(
+                    lambda: self._shipment_label_repo.get_active_by_reference_number(reference_number)
+                )
+            else:
+                existing_label = self._shipment_label_repo.get_active_by_reference_number(reference_number)
             if existing_label:
                 logger.info(f"LabelCacheService: Found active label for reference {reference_number}")
                 return LabelResponse.create_success_response(
@@ -21,7 +30,8 @@ class LabelCacheService:
                     url=existing_label.url,
                     format=existing_label.format,
                     is_active=existing_label.is_active,
-                    created_at=existing_label.created_at.isoformat()
+                    created_at=existing_label.created_at.isoformat(),
+                    expires_at=existing_label.expires_at.isoformat() if existing_label.expires_at else None
                 )
             
             return None
@@ -30,8 +40,24 @@ class LabelCacheService:
             logger.error(f"LabelCacheService: Error getting cached label: {str(e)}")
             return None
     
+    def label_expiry(self, courier_name: str, reported_expires_at: Optional[str] = None) -> Optional[datetime]:
+        """
+        When a freshly fetched label URL expires: the courier's own expiry if it
+        reports one, otherwise now plus the courier's label_url_ttl_seconds or
+        LABEL_URL_TTL_SECONDS. None means the URL is treated as permanent.
+        """
+        if reported_expires_at:
+            expires_at = parse_datetime(reported_expires_at)
+            if expires_at:
+                return expires_at if timezone.is_aware(expires_at) else timezone.make_aware(expires_at, dt_timezone.utc)
+            logger.warning(f"LabelCacheService: Ignoring unparseable label expiry '{reported_expires_at}'")
+        
+        courier_config = repositories.courier_config.get_by_courier_name(courier_name)
+        ttl_seconds = (courier_config and courier_config.label_url_ttl_seconds) or settings.LABEL_URL_TTL_SECONDS
+        return timezone.now() + timedelta(seconds=ttl_seconds) if ttl_seconds else None
+    
     def save_label(self, shipment_id: int, reference_number: str, 
-                   url: str, format: str) -> Optional[LabelResponse]:
+                   url: str, format: str, expires_at: Optional[datetime] = None) -> Optional[LabelResponse]:
         try:
             self._shipment_label_repo.deactivate_labels_by_shipment(shipment_id)
             
@@ -40,7 +66,8 @@ class LabelCacheService:
                 reference_number=reference_number,
                 url=url,
                 format=format,
-                is_active=True
+                is_active=True,
+                expires_at=expires_at
             )
             
             logger.info(f"LabelCacheService: Saved label {label.id} for shipment {shipment_id}")
@@ -50,7 +77,8 @@ class LabelCacheService:
                 url=label.url,
                 format=label.format,
                 is_active=label.is_active,
-                created_at=label.created_at.isoformat()
+                created_at=label.created_at.isoformat(),
+                expires_at=label.expires_at.isoformat() if label.expires_at else None
             )
             
         except Exception as e:
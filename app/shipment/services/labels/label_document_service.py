@@ -0,0 +1,94 @@
+import logging
+from typing import Optional, Tuple
+import requests
+from ...models import ShipmentLabel
+from ...repositories.repository_factory import repositories
+from ...schemas.label_response import LabelResponse
+from .label_blob_store import LabelBlobStore, label_blob_store
+
+logger = logging.getLogger(__name__)
+
+
+class LabelDocumentService:
+    """Keeps a local copy of each label document so printing does not depend on the courier."""
+
+    DOWNLOAD_TIMEOUT = 30
+    MAX_DOCUMENT_BYTES = 20 * 1024 * 1024
+    CONTENT_TYPES = {
+        'PDF': 'application/pdf',
+        'ZPL2': 'application/zpl',
+        'PNG': 'image/png'
+    }
+
+    def __init__(self, blob_store: LabelBlobStore = None, session: requests.Session = None):
+        self._blob_store = blob_store or label_blob_store
+        self._session = session or requests.Session()
+        self._shipment_label_repo = repositories.shipment_label
+
+    def ensure_document(self, label: ShipmentLabel) -> Optional[str]:
+        """Return the hash of the label's stored document, downloading it first if needed."""
+        content_hash = self.store_document(label.id, label.url, label.content_hash)
+        if content_hash:
+            label.content_hash = content_hash
+        return content_hash
+
+    def store_document(self, label_id: int, url: str, content_hash: Optional[str] = None) -> Optional[str]:
+        """Download a label document into the blob store unless it is already there."""
+        if self._blob_store.exists(content_hash):
+            return content_hash
+
+        try:
+            stored_hash = self._blob_store.put_chunks(self._download(url))
+        except Exception as e:
+            logger.error(f"LabelDocumentService: Error downloading label {label_id} document: {str(e)}")
+            return None
+
+        if stored_hash != content_hash:
+            self._shipment_label_repo.set_content_hash(label_id, stored_hash)
+        logger.info(f"LabelDocumentService: Stored label {label_id} document as {stored_hash}")
+        return stored_hash
+
+    def get_document(self, reference_number: str) -> Tuple[Optional[ShipmentLabel], Optional[object], Optional[LabelResponse]]:
+        """
+        Open the active label's document for a reference, fetching the label from the courier if there is none.
+
+        Returns:
+            (label, open file, None) on success, or (None, None, error response)
+        """
+        label = self._shipment_label_repo.get_active_by_reference_number(reference_number)
+        if not label:
+            from .shipment_label_service import ShipmentLabelService
+            result = ShipmentLabelService(document_service=self).get_shipment_label_by_reference(reference_number)
+            if not result.success:
+                return None, None, result
+            label = self._shipment_label_repo.get_by_id(result.id)
+
+        document = self._blob_store.open(label.content_hash) if label.content_hash else None
+        if document is None and self.ensure_document(label):
+            document = self._blob_store.open(label.content_hash)
+        if document is None:
+            return None, None, LabelResponse.create_error_response(
+                'Label document is not available',
+                'LABEL_DOCUMENT_UNAVAILABLE'
+            )
+        return label, document, None
+
+    @classmethod
+    def content_type(cls, label: ShipmentLabel) -> str:
+        return cls.CONTENT_TYPES.get((label.format or '').upper(), 'application/octet-stream')
+
+    @staticmethod
+    def filename(label: ShipmentLabel) -> str:
+        extension = (label.format or 'bin').lower()
+        return f'{label.reference_number}.{extension}'
+
+    def _download(self, url: str):
+        response = self._session.get(url, stream=True, timeout=self.DOWNLOAD_TIMEOUT)
+        with response:
+            response.raise_for_status()
+            received = 0
+            for chunk in response.iter_content(chunk_size=LabelBlobStore.CHUNK_SIZE):
+                received += len(chunk)
+                if received > self.MAX_DOCUMENT_BYTES:
+                    raise ValueError(f'Label document exceeds {self.MAX_DOCUMENT_BYTES} bytes')
+                yield chunk
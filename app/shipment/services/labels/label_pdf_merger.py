@@ -0,0 +1,163 @@
+import io
+from collections import deque
+from typing import Dict, List, Tuple
+from pypdf import PdfReader
+from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject, PdfObject
+
+
+class LabelPdfMerger:
+    """
+    Writes the pages of many PDF documents into one PDF as a byte stream.
+
+    Documents are added one at a time and their pages copied out with
+    renumbered objects, so only the xref offsets and page ids are kept for the
+    whole output. The catalog and page tree are written last.
+    """
+
+    CATALOG_ID = 1
+    PAGES_ID = 2
+    PAGE_SIZE = (595, 842)
+
+    def __init__(self):
+        self._position = 0
+        self._offsets: Dict[int, int] = {}
+        self._page_ids: List[int] = []
+        self._next_id = self.PAGES_ID + 1
+
+    @property
+    def page_count(self) -> int:
+        return len(self._page_ids)
+
+    def begin(self) -> bytes:
+        # The binary comment marks the file as binary for transfer tools
+        return self._emit(b'%PDF-1.7\n%\xe2\xe3\xcf\xd3\n')
+
+    def add_document(self, document) -> bytes:
+        """
+        Copy every page of an open PDF file and return the bytes to write.
+
+        Raises if the file is not a readable PDF; the output is then left as it
+        was, so the caller can skip the document and carry on.
+        """
+        position = self._position
+        page_count = len(self._page_ids)
+        written = []
+        try:
+            reader = PdfReader(document)
+            if reader.is_encrypted:
+                raise ValueError('Encrypted label documents cannot be merged')
+
+            new_ids: Dict[Tuple[int, int], int] = {}
+            pending = deque()
+            source_pages = dict.get(reader.trailer['/Root'].get_object(), '/Pages')
+            if isinstance(source_pages, IndirectObject):
+                new_ids[(source_pages.idnum, source_pages.generation)] = self.PAGES_ID
+
+            # Pages are numbered up front so cross-page references resolve
+            for page in reader.pages:
+                reference = page.indirect_reference
+                new_ids[(reference.idnum, reference.generation)] = self._allocate_id()
+                self._page_ids.append(new_ids[(reference.idnum, reference.generation)])
+                pending.append((reference, True))
+
+            chunks = []
+            while pending:
+                reference, is_page = pending.popleft()
+                new_id = new_ids[(reference.idnum, reference.generation)]
+                pdf_object = reader.get_object(reference)
+                self._renumber(pdf_object, new_ids, pending)
+                if is_page:
+                    pdf_object[NameObject('/Parent')] = IndirectObject(self.PAGES_ID, 0, None)
+                chunks.append(self._write_object(new_id, pdf_object))
+                written.append(new_id)
+        except Exception:
+            # Ids already handed out stay unused and are listed as free in the xref
+            self._position = position
+            del self._page_ids[page_count:]
+            for object_id in written:
+                del self._offsets[object_id]
+            raise
+        return b''.join(chunks)
+
+    def add_text_page(self, lines: List[str]) -> bytes:
+        """Append a plain text page, e.g. to list labels missing from the run."""
+        font_id = self._allocate_id()
+        content_id = self._allocate_id()
+        page_id = self._allocate_id()
+        self._page_ids.append(page_id)
+
+        text = ['BT', '/F1 11 Tf', '14 TL', f'40 {self.PAGE_SIZE[1] - 50} Td']
+        for line in lines:
+            text.append(f'({self._escape(line)}) Tj T*')
+        text.append('ET')
+        content = '\n'.join(text).encode('latin-1', 'replace')
+
+        output = self._write_raw(font_id, b'<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>')
+        output += self._write_raw(content_id, b'<< /Length %d >>\nstream\n%s\nendstream' % (len(content), content))
+        output += self._write_raw(
+            page_id,
+            b'<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %d %d] /Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>'
+            % (self.PAGES_ID, self.PAGE_SIZE[0], self.PAGE_SIZE[1], font_id, content_id)
+        )
+        return output
+
+    def finish(self) -> bytes:
+        kids = ' '.join(f'{page_id} 0 R' for page_id in self._page_ids)
+        output = self._write_raw(
+            self.PAGES_ID,
+            f'<< /Type /Pages /Kids [{kids}] /Count {len(self._page_ids)} >>'.encode()
+        )
+        output += self._write_raw(self.CATALOG_ID, f'<< /Type /Catalog /Pages {self.PAGES_ID} 0 R >>'.encode())
+
+        size = self._next_id
+        xref = [f'xref\n0 {size}\n', '0000000000 65535 f \n']
+        for object_id in range(1, size):
+            offset = self._offsets.get(object_id)
+            xref.append(f'{offset:010d} 00000 n \n' if offset is not None else '0000000000 65535 f \n')
+        xref.append(f'trailer\n<< /Size {size} /Root {self.CATALOG_ID} 0 R >>\nstartxref\n{self._position}\n%%EOF\n')
+        return output + self._emit(''.join(xref).encode())
+
+    def _renumber(self, pdf_object: PdfObject, new_ids: Dict[Tuple[int, int], int], pending: deque) -> None:
+        # Rewrites references in place; raw dict/list access avoids resolving them
+        if isinstance(pdf_object, DictionaryObject):
+            items = list(dict.items(pdf_object))
+        elif isinstance(pdf_object, ArrayObject):
+            items = list(enumerate(list.__iter__(pdf_object)))
+        else:
+            return
+
+        for key, value in items:
+            if isinstance(value, IndirectObject):
+                source = (value.idnum, value.generation)
+                if source not in new_ids:
+                    new_ids[source] = self._allocate_id()
+                    pending.append((value, False))
+                new_reference = IndirectObject(new_ids[source], 0, None)
+                if isinstance(pdf_object, DictionaryObject):
+                    dict.__setitem__(pdf_object, key, new_reference)
+                else:
+                    list.__setitem__(pdf_object, key, new_reference)
+            else:
+                self._renumber(value, new_ids, pending)
+
+    def _write_object(self, object_id: int, pdf_object: PdfObject) -> bytes:
+        body = io.BytesIO()
+        pdf_object.write_to_stream(body)
+        return self._write_raw(object_id, body.getvalue())
+
+    def _write_raw(self, object_id: int, body: bytes) -> bytes:
+        self._offsets[object_id] = self._position
+        return self._emit(b'%d 0 obj\n' % object_id + body + b'\nendobj\n')
+
+    def _emit(self, data: bytes) -> bytes:
+        self._position += len(data)
+        return data
+
+    def _allocate_id(self) -> int:
+        object_id = self._next_id
+        self._next_id += 1
+        return object_id
+
+    @staticmethod
+    def _escape(text: str) -> str:
+        return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
@@ -0,0 +1,107 @@
+import logging
+import threading
+import time
+from datetime import timedelta
+from typing import Any, Dict
+from django.conf import settings
+from django.utils import timezone
+from ...models import LabelPrefetchTask
+from ...repositories.repository_factory import repositories
+from .label_cache_service import LabelCacheService
+from .shipment_label_service import ShipmentLabelService
+
+logger = logging.getLogger(__name__)
+
+
+class CourierRateLimiter:
+    """Spaces calls to each courier at least 1 / rate seconds apart within this process."""
+
+    def __init__(self, rate_per_second: float):
+        self._interval = 1.0 / rate_per_second if rate_per_second > 0 else 0.0
+        self._next_call = {}
+        self._lock = threading.Lock()
+
+    def wait(self, courier: str) -> None:
+        with self._lock:
+            now = time.monotonic()
+            call_at = max(now, self._next_call.get(courier, now))
+            self._next_call[courier] = call_at + self._interval
+        if call_at > now:
+            time.sleep(call_at - now)
+
+
+class LabelPrefetchService:
+    """
+    Fetches and caches labels of new shipments ahead of their first print.
+
+    Shipments are queued when they are persisted, if LABEL_PREFETCH_ENABLED is
+    set, and drained in batches by the prefetch_labels command. Calls to each
+    courier are capped at LABEL_PREFETCH_RATE_PER_SECOND; labels that are
+    already cached cost no courier call. Failed fetches are retried with
+    exponential backoff.
+    """
+
+    MAX_ATTEMPTS = 3
+    RETRY_BASE_DELAY = timedelta(minutes=1)
+    # Courier answers that will not change on a retry
+    PERMANENT_ERRORS = ('SHIPMENT_NOT_FOUND',)
+
+    def __init__(self, label_service: ShipmentLabelService = None, rate_limiter: CourierRateLimiter = None):
+        self._cache_service = LabelCacheService()
+        self._label_service = label_service or ShipmentLabelService(cache_service=self._cache_service)
+        self._rate_limiter = rate_limiter or CourierRateLimiter(settings.LABEL_PREFETCH_RATE_PER_SECOND)
+        self._label_prefetch_repo = repositories.label_prefetch
+
+    def process_batch(self, batch_size: int = 20) -> Dict[str, Any]:
+        results = {
+            'total': 0,
+            'fetched': 0,
+            'cached': 0,
+            'retried': 0,
+            'failed': 0
+        }
+
+        tasks = self._label_prefetch_repo.claim(batch_size)
+        if not tasks:
+            return results
+
+        for task in tasks:
+            results[self._prefetch(task)] += 1
+
+        self._label_prefetch_repo.mark_finished(tasks)
+        results['total'] = len(tasks)
+        logger.info(
+            f"LabelPrefetchService: Processed {len(tasks)} tasks: {results['fetched']} fetched, "
+            f"{results['cached']} cached, {results['retried']} retried, {results['failed']} failed"
+        )
+        return results
+
+    def _prefetch(self, task: LabelPrefetchTask) -> str:
+        task.next_attempt_at = None
+        reference_number = task.shipment.reference_number
+        if self._cache_service.get_cached_label(reference_number):
+            task.status = 'done'
+            task.error = None
+            return 'cached'
+
+        self._rate_limiter.wait(task.courier)
+        label = self._label_service.get_shipment_label_by_reference(reference_number)
+        if label.success:
+            task.status = 'done'
+            task.error = None
+            return 'fetched'
+
+        task.error = f"{label.error_code}: {label.error}"
+        if label.error_code in self.PERMANENT_ERRORS or task.attempts >= self.MAX_ATTEMPTS:
+            logger.error(f"LabelPrefetchService: Giving up on label for {reference_number}: {task.error}")
+            task.status = 'failed'
+            return 'failed'
+
+        delay = self.RETRY_BASE_DELAY * (2 ** (task.attempts - 1))
+        logger.warning(f"LabelPrefetchService: Label for {reference_number} failed, retrying in {delay}: {task.error}")
+        task.status = 'pending'
+        task.next_attempt_at = timezone.now() + delay
+        return 'retried'
+
+    def pending_count(self) -> int:
+        return self._label_prefetch_repo.count_open()
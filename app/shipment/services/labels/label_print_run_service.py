@@ -0,0 +1,112 @@
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, List, Optional, Tuple
+from django.conf import settings
+from django.db import connections
+from .label_document_service import LabelDocumentService
+from .label_pdf_merger import LabelPdfMerger
+
+logger = logging.getLogger(__name__)
+
+
+class LabelPrintRunService:
+    """
+    Streams the labels of many shipments as one PDF for a print run.
+
+    Documents come from the label blob store, or from the courier when a label
+    has not been fetched yet, with up to LABEL_PRINT_RUN_WORKERS fetched
+    concurrently. Pages are written in the order of the references as soon as
+    each label is ready. References without a printable PDF label are listed
+    on a final page.
+    """
+
+    def __init__(self,
+                 document_service_factory: Callable[[], LabelDocumentService] = None,
+                 max_workers: int = None):
+        self._document_service_factory = document_service_factory or LabelDocumentService
+        self._max_workers = max_workers or settings.LABEL_PRINT_RUN_WORKERS
+        self._local = threading.local()
+
+    def stream(self, reference_numbers: List[str]) -> Iterator[bytes]:
+        merger = LabelPdfMerger()
+        missing = []
+        yield merger.begin()
+
+        for reference_number, document, error in self._documents(reference_numbers):
+            if document is None:
+                missing.append(f'{reference_number}: {error}')
+                continue
+            try:
+                yield merger.add_document(document)
+            except Exception as e:
+                logger.error(f"LabelPrintRunService: Label document for {reference_number} is not a usable PDF: {str(e)}")
+                missing.append(f'{reference_number}: label document is not a usable PDF')
+            finally:
+                document.close()
+
+        if missing:
+            yield merger.add_text_page([f'Labels missing from this print run ({len(missing)}):'] + missing)
+        yield merger.finish()
+        logger.info(
+            f"LabelPrintRunService: Streamed {len(reference_numbers) - len(missing)} of "
+            f"{len(reference_numbers)} labels in {merger.page_count} pages"
+        )
+
+    def _documents(self, reference_numbers: List[str]) -> Iterator[Tuple[str, Optional[object], Optional[str]]]:
+        if self._max_workers == 1:
+            for reference_number in reference_numbers:
+                yield self._open_document(reference_number)
+            return
+
+        # A bounded window of fetches runs ahead of the reference being written
+        window = self._max_workers * 2
+        references = iter(reference_numbers)
+        futures = deque()
+        executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix='label-print-run')
+        try:
+            for reference_number in references:
+                futures.append(executor.submit(self._open_document_in_worker, reference_number))
+                if len(futures) >= window:
+                    break
+            while futures:
+                result = futures.popleft().result()
+                next_reference = next(references, None)
+                if next_reference is not None:
+                    futures.append(executor.submit(self._open_document_in_worker, next_reference))
+                yield result
+        finally:
+            # The client may disconnect mid-run: drop queued fetches and close opened files
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=True)
+            for future in futures:
+                if not future.cancelled() and future.exception() is None:
+                    _, document, _ = future.result()
+                    if document is not None:
+                        document.close()
+
+    def _open_document_in_worker(self, reference_number: str) -> Tuple[str, Optional[object], Optional[str]]:
+        try:
+            return self._open_document(reference_number)
+        finally:
+            # Worker threads hold their own database connections
+            connections.close_all()
+
+    def _open_document(self, reference_number: str) -> Tuple[str, Optional[object], Optional[str]]:
+        try:
+            document_service = getattr(self._local, 'document_service', None)
+            if document_service is None:
+                document_service = self._local.document_service = self._document_service_factory()
+
+            label, document, error = document_service.get_document(reference_number)
+            if error:
+                return reference_number, None, error.error
+            if (label.format or '').upper() != 'PDF':
+                document.close()
+                return reference_number, None, f'label format is {label.format}, not PDF'
+            return reference_number, document, None
+        except Exception as e:
+            logger.error(f"LabelPrintRunService: Error loading label for {reference_number}: {str(e)}")
+            return reference_number, None, 'label could not be loaded'
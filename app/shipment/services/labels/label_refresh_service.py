@@ -0,0 +1,100 @@
+import logging
+from datetime import timedelta
+from typing import Any, Dict
+from django.conf import settings
+from django.utils import timezone
+from ...repositories.repository_factory import repositories
+from .label_cache_service import LabelCacheService
+
+logger = logging.getLogger(__name__)
+
+
+class LabelRefreshService:
+    """
+    Re-fetches labels shortly before their courier URL expires.
+
+    Labels expiring within LABEL_REFRESH_LEAD_SECONDS are grouped by courier
+    and fetched with the courier's batched label call, then saved as the new
+    active label, so requests keep hitting the cache. A label whose refresh
+    fails is retried after RETRY_DELAY, up to MAX_ATTEMPTS times; after that it
+    is left to expire and fetched again on its next request.
+    """
+
+    MAX_ATTEMPTS = 3
+    RETRY_DELAY = timedelta(minutes=5)
+
+    def __init__(self, courier_factory_instance=None, cache_service: LabelCacheService = None, document_service=None):
+        self._courier_factory = courier_factory_instance
+        self._cache_service = cache_service or LabelCacheService()
+        self._document_service = document_service
+        self._shipment_label_repo = repositories.shipment_label
+
+    @property
+    def document_service(self):
+        if not self._document_service:
+            from .label_document_service import LabelDocumentService
+            self._document_service = LabelDocumentService()
+        return self._document_service
+
+    def refresh_expiring(self, batch_size: int = 100, lead_seconds: int = None) -> Dict[str, Any]:
+        results = {
+            'total': 0,
+            'refreshed': 0,
+            'failed': 0
+        }
+
+        lead_seconds = settings.LABEL_REFRESH_LEAD_SECONDS if lead_seconds is None else lead_seconds
+        labels = self._shipment_label_repo.get_expiring_labels(
+            timezone.now() + timedelta(seconds=lead_seconds),
+            batch_size,
+            retry_after=self.RETRY_DELAY,
+            max_attempts=self.MAX_ATTEMPTS
+        )
+        if not labels:
+            return results
+
+        if not self._courier_factory:
+            from ..couriers.courier_factory import courier_factory
+            self._courier_factory = courier_factory
+
+        failed_ids = []
+        labels_by_courier = {}
+        for label in labels:
+            labels_by_courier.setdefault(label.shipment.courier.name.lower(), []).append(label)
+
+        for courier_name, courier_labels in labels_by_courier.items():
+            fetched = self._courier_factory.fetch_labels(
+                courier_name,
+                [label.shipment.courier_external_id for label in courier_labels]
+            )
+            for label in courier_labels:
+                if self._refresh(label, courier_name, fetched.get(label.shipment.courier_external_id)):
+                    results['refreshed'] += 1
+                else:
+                    failed_ids.append(label.id)
+
+        self._shipment_label_repo.record_refresh_failures(failed_ids)
+        results['failed'] = len(failed_ids)
+        results['total'] = len(labels)
+        logger.info(f"LabelRefreshService: Refreshed {results['refreshed']} of {results['total']} expiring labels")
+        return results
+
+    def _refresh(self, label, courier_name: str, label_data) -> bool:
+        if label_data is None or not label_data.success:
+            error = label_data.error if label_data else 'no label returned'
+            logger.error(f"LabelRefreshService: Could not refresh label for {label.reference_number}: {error}")
+            return False
+
+        saved_label = self._cache_service.save_label(
+            shipment_id=label.shipment_id,
+            reference_number=label.reference_number,
+            url=label_data.url,
+            format=label_data.format,
+            expires_at=self._cache_service.label_expiry(courier_name, label_data.expires_at)
+        )
+        if not saved_label:
+            return False
+
+        # Identical documents are stored once, so an unchanged label costs only the download
+        self.document_service.store_document(saved_label.id, saved_label.url)
+        return True
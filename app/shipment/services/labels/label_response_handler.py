@@ -1,3 +1,6 @@
+from django.conf import settings
+from django.http import FileResponse, HttpResponse
+from django.utils.http import content_disposition_header
 from rest_framework import status
 from rest_framework.response import Response
 from typing import Dict, Any
@@ -83,6 +86,31 @@ class LabelResponseHandler:
                 status=http_status
             )
     
+    @staticmethod
+    def document_response(label, document, as_attachment: bool = False) -> HttpResponse:
+        """
+        Stream a stored label document.
+        
+        FileResponse hands the open file to the server's wsgi.file_wrapper
+        (sendfile where available). With LABEL_STORE_SENDFILE_HEADER set, e.g.
+        to X-Accel-Redirect, the web server sends the file itself.
+        """
+        from .label_document_service import LabelDocumentService
+        
+        content_type = LabelDocumentService.content_type(label)
+        filename = LabelDocumentService.filename(label)
+        
+        sendfile_header = getattr(settings, 'LABEL_STORE_SENDFILE_HEADER', '')
+        if sendfile_header:
+            document.close()
+            response = HttpResponse(content_type=content_type)
+            prefix = settings.LABEL_STORE_SENDFILE_PREFIX.rstrip('/')
+            response[sendfile_header] = f'{prefix}/{label.content_hash[:2]}/{label.content_hash}'
+            response['Content-Disposition'] = content_disposition_header(as_attachment, filename)
+            return response
+        
+        return FileResponse(document, as_attachment=as_attachment, filename=filename, content_type=content_type)
+    
     @staticmethod
     def _map_error_code_to_http_status(error_code: str) -> int:
         """
@@ -96,7 +124,7 @@ class LabelResponseHandler:
             return status.HTTP_401_UNAUTHORIZED
         elif error_code == 'COURIER_FORBIDDEN':
             return status.HTTP_403_FORBIDDEN
-        elif error_code in ['COURIER_API_ERROR', 'LABEL_URL_NOT_FOUND', 'COURIER_SERVER_ERROR']:
+        elif error_code in ['COURIER_API_ERROR', 'LABEL_URL_NOT_FOUND', 'COURIER_SERVER_ERROR', 'LABEL_DOCUMENT_UNAVAILABLE']:
             return status.HTTP_502_BAD_GATEWAY
         elif error_code == 'DATABASE_ERROR':
             return status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -1,7 +1,9 @@
 import logging
 from typing import Dict, Any
 from .label_cache_service import LabelCacheService
+from .single_flight import SingleFlight, label_fetch_flights
 from ..shipments.shipment_lookup_service import ShipmentLookupService
+from ...repositories.repository_factory import repositories
 from ...schemas.label_response import LabelResponse
 
 logger = logging.getLogger(__name__)
@@ -11,10 +13,22 @@ class ShipmentLabelService:
     def __init__(self, 
                  courier_factory_instance=None,
                  cache_service: LabelCacheService = None,
-                 lookup_service: ShipmentLookupService = None):
+                 lookup_service: ShipmentLookupService = None,
+                 document_service=None,
+                 flights: SingleFlight = None):
         self._courier_factory = courier_factory_instance
         self._cache_service = cache_service or LabelCacheService()
         self._lookup_service = lookup_service or ShipmentLookupService()
+        self._document_service = document_service
+        self._flights = flights or label_fetch_flights
+        self._shipment_label_repo = repositories.shipment_label
+    
+    @property
+    def document_service(self):
+        if not self._document_service:
+            from .label_document_service import LabelDocumentService
+            self._document_service = LabelDocumentService()
+        return self._document_service
     
     def get_shipment_label_by_reference(self, reference_number: str) -> LabelResponse:
         try:
@@ -25,40 +39,9 @@ class ShipmentLabelService:
                 logger.info(f"ShipmentLabelService: Found cached label for reference {reference_number}")
                 return cached_label
             
-            shipment = self._lookup_service.get_shipment_by_reference(reference_number)
-            if not shipment:
-                return LabelResponse.create_error_response(
-                    'Shipment not found',
-                    'SHIPMENT_NOT_FOUND'
-                )
-            
-            if not self._courier_factory:
-                from ..couriers.courier_factory import courier_factory
-                self._courier_factory = courier_factory
-            
-            courier_name = shipment.courier.name.lower()
-            label_data = self._courier_factory.fetch_label(courier_name, shipment.courier_external_id)
-            if not label_data.success:
-                return LabelResponse.create_error_response(
-                    label_data.error,
-                    label_data.error_code
-                )
-            
-            saved_label = self._cache_service.save_label(
-                shipment_id=shipment.id,
-                reference_number=reference_number,
-                url=label_data.url,
-                format=label_data.format
-            )
-            
-            if not saved_label:
-                return LabelResponse.create_error_response(
-                    'Failed to save label to database',
-                    'DATABASE_ERROR'
-                )
-            
-            logger.info(f"ShipmentLabelService: Successfully retrieved and saved label for reference {reference_number}")
-            return saved_label
+            # Concurrent requests for one reference share a single courier call:
+            # threads of this process wait on the first, other processes on its lock
+            return self._flights.run(reference_number, lambda: self._fetch_label_exclusively(reference_number))
             
         except Exception as e:
             logger.error(f"ShipmentLabelService: Error getting label for reference {reference_number}: {str(e)}")
@@ -66,3 +49,55 @@ class ShipmentLabelService:
                 f'Internal server error: {str(e)}',
                 'INTERNAL_ERROR'
             )
+    
+    def _fetch_label_exclusively(self, reference_number: str) -> LabelResponse:
+        self._shipment_label_repo.acquire_fetch_lock(reference_number)
+        try:
+            # Another process may have saved the label while this one waited
+            cached_label = self._cache_service.get_cached_label(reference_number, use_replica=False)
+            if cached_label:
+                logger.info(f"ShipmentLabelService: Label for reference {reference_number} was fetched concurrently")
+                return cached_label
+            return self._fetch_label(reference_number)
+        finally:
+            self._shipment_label_repo.release_fetch_lock(reference_number)
+    
+    def _fetch_label(self, reference_number: str) -> LabelResponse:
+        shipment = self._lookup_service.get_shipment_by_reference(reference_number, 'with_courier')
+        if not shipment:
+            return LabelResponse.create_error_response(
+                'Shipment not found',
+                'SHIPMENT_NOT_FOUND'
+            )
+        
+        if not self._courier_factory:
+            from ..couriers.courier_factory import courier_factory
+            self._courier_factory = courier_factory
+        
+        courier_name = shipment.courier.name.lower()
+        label_data = self._courier_factory.fetch_label(courier_name, shipment.courier_external_id)
+        if not label_data.success:
+            return LabelResponse.create_error_response(
+                label_data.error,
+                label_data.error_code
+            )
+        
+        saved_label = self._cache_service.save_label(
+            shipment_id=shipment.id,
+            reference_number=reference_number,
+            url=label_data.url,
+            format=label_data.format,
+            expires_at=self._cache_service.label_expiry(courier_name, label_data.expires_at)
+        )
+        
+        if not saved_label:
+            return LabelResponse.create_error_response(
+                'Failed to save label to database',
+                'DATABASE_ERROR'
+            )
+        
+        # Keep a local copy now, while the courier link is fresh
+        self.document_service.store_document(saved_label.id, saved_label.url)
+        
+        logger.info(f"ShipmentLabelService: Successfully retrieved and saved label for reference {reference_number}")
+        return saved_label
@@ -0,0 +1,68 @@
+import logging
+import threading
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls for the same key within a process into one.
+
+    The first caller for a key runs the function; callers arriving while it
+    runs wait for it and get the same result, or the same exception. The key
+    is released as soon as the call finishes, so later calls run again.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights: Dict[str, _Flight] = {}
+
+    def run(self, key: str, function: Callable[[], Any]) -> Any:
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                flight.waiters += 1
+
+        if not leader:
+            logger.info(f"SingleFlight: Waiting for the running call for {key}")
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.result
+
+        try:
+            flight.result = function()
+        except Exception as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.result
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._flights)
+
+    def waiters(self, key: str) -> int:
+        """Number of callers waiting on the running call for key."""
+        with self._lock:
+            flight = self._flights.get(key)
+            return flight.waiters if flight else 0
+
+
+# Shared by every ShipmentLabelService in the process
+label_fetch_flights = SingleFlight()
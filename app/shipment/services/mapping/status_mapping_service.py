@@ -18,6 +18,11 @@ class StatusMappingService:
         'failed': 'failed'
     }
     
+    # Statuses that may legitimately be reported more than once per shipment;
+    # every other status is recorded at most once.
+    REPEATABLE_STATUSES = {'exception'}
+    TERMINAL_STATUSES = {'delivered', 'cancelled', 'returned'}
+    
     DHL_STATUS_MAPPING = {
         'OK': 'delivered',
         'SUCCESS': 'delivered',
@@ -90,6 +95,16 @@ class StatusMappingService:
         """Check if a status is valid."""
         return status.lower() in cls.STANDARD_STATUSES
     
+    @classmethod
+    def is_deduplicated_status(cls, status: str) -> bool:
+        """Check if repeated reports of a status should be ignored."""
+        return status.lower() not in cls.REPEATABLE_STATUSES
+    
+    @classmethod
+    def is_terminal_status(cls, status: str) -> bool:
+        """Check if a status ends the shipment's lifecycle."""
+        return status.lower() in cls.TERMINAL_STATUSES
+    
     @classmethod
     def get_status_display_name(cls, status: str) -> str:
         """Get display name for a status."""
@@ -4,10 +4,12 @@ from .request_processor import RequestProcessor
 from .request_batch_processor import RequestBatchProcessor
 from .request_data_converter import RequestDataConverter
 from .shipment_request_service import ShipmentRequestService
+from .request_importer import ShipmentRequestImporter
 
 __all__ = [
     'RequestProcessor',
     'RequestBatchProcessor',
     'RequestDataConverter',
-    'ShipmentRequestService'
+    'ShipmentRequestService',
+    'ShipmentRequestImporter'
 ]
@@ -0,0 +1,181 @@
+import json
+import logging
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from django.db import IntegrityError, transaction
+from ...repositories.repository_factory import repositories
+from .shipment_request_service import ShipmentRequestService
+
+logger = logging.getLogger(__name__)
+
+
+class ShipmentRequestImporter:
+    """Bulk-imports NDJSON shipment requests without going through HTTP."""
+
+    def __init__(self, chunk_size: int = 1000, status: str = 'pending'):
+        self.chunk_size = chunk_size
+        self.status = status
+        self._shipment_request_repo = repositories.shipment_request
+
+    def iter_records(self, lines: Iterable[str]) -> Iterator[Tuple[int, Optional[Dict[str, Any]], Optional[Any]]]:
+        """Yield (line_number, record, error) for each non-blank line."""
+        for line_number, line in enumerate(lines, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_number, None, f'Invalid JSON: {str(e)}'
+                continue
+            if not isinstance(record, dict):
+                yield line_number, None, 'Record must be a JSON object'
+                continue
+            yield line_number, record, None
+
+    def import_lines(self,
+                     lines: Iterable[str],
+                     on_error: Optional[Callable[[int, Any], None]] = None,
+                     on_chunk: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+        from ...serializers import ShipmentRequestCreateSerializer
+
+        results = {
+            'total': 0,
+            'imported': 0,
+            'skipped': 0,
+            'failed': 0,
+            'elapsed_seconds': 0.0,
+            'rows_per_second': 0.0
+        }
+        started_at = time.monotonic()
+        chunk: List[Tuple[int, Dict[str, Any]]] = []
+        chunk_references = set()
+
+        for line_number, record, error in self.iter_records(lines):
+            results['total'] += 1
+
+            if error is None:
+                serializer = ShipmentRequestCreateSerializer(data=record)
+                if serializer.is_valid():
+                    validated_data = serializer.validated_data
+                    reference_number = validated_data['reference_number']
+                    if reference_number in chunk_references or validated_data.get('action') == 'existing_shipment_found':
+                        results['skipped'] += 1
+                        continue
+                    chunk.append((line_number, validated_data))
+                    chunk_references.add(reference_number)
+                    if len(chunk) >= self.chunk_size:
+                        self._flush(chunk, results, on_error)
+                        chunk = []
+                        chunk_references.clear()
+                        self._update_throughput(results, started_at)
+                        if on_chunk:
+                            on_chunk(results)
+                    continue
+                error = serializer.errors
+
+            self._reject(line_number, error, results, on_error)
+
+        if chunk:
+            self._flush(chunk, results, on_error)
+        self._update_throughput(results, started_at)
+        if on_chunk:
+            on_chunk(results)
+
+        logger.info(f"ShipmentRequestImporter: Finished import - imported={results['imported']}, skipped={results['skipped']}, failed={results['failed']}")
+        return results
+
+    def _flush(self,
+               chunk: List[Tuple[int, Dict[str, Any]]],
+               results: Dict[str, Any],
+               on_error: Optional[Callable[[int, Any], None]]) -> None:
+        """
+        Insert a chunk with a fixed number of queries: active references and parties are resolved per chunk.
+        
+        A request inserted concurrently for one of the chunk's references makes
+        the insert fail; the chunk is then retried once with the active
+        references read again, so those lines are skipped as duplicates.
+        """
+        try:
+            outcome = self._insert_chunk(chunk)
+        except IntegrityError as e:
+            logger.warning(f"ShipmentRequestImporter: Chunk conflicted with a concurrent insert, retrying: {str(e)}")
+            try:
+                outcome = self._insert_chunk(chunk)
+            except IntegrityError as e:
+                for line_number, _ in chunk:
+                    self._reject(line_number, f'Failed to insert request: {str(e)}', results, on_error)
+                return
+        
+        created, skipped, rejected = outcome
+        results['imported'] += created
+        results['skipped'] += skipped
+        for line_number, error in rejected:
+            self._reject(line_number, error, results, on_error)
+        logger.info(f"ShipmentRequestImporter: Inserted chunk of {created} shipment requests")
+
+    def _insert_chunk(self, chunk: List[Tuple[int, Dict[str, Any]]]) -> Tuple[int, int, List[Tuple[int, str]]]:
+        """Insert a chunk in one transaction; returns (created, skipped, rejected lines)."""
+        with transaction.atomic():
+            active_references = self._shipment_request_repo.get_active_reference_numbers(
+                [validated_data['reference_number'] for _, validated_data in chunk]
+            )
+            rows = [
+                (line_number, validated_data) for line_number, validated_data in chunk
+                if validated_data['reference_number'] not in active_references
+            ]
+
+            shippers = self._resolve_parties(repositories.shipper, rows, 'shipper')
+            consignees = self._resolve_parties(repositories.consignee, rows, 'consignee')
+
+            rejected = []
+            shipment_requests = []
+            for line_number, validated_data in rows:
+                shipper = self._party_for(shippers, validated_data, 'shipper')
+                consignee = self._party_for(consignees, validated_data, 'consignee')
+                if shipper is None or consignee is None:
+                    rejected.append((line_number, 'Failed to prepare request: shipper or consignee not found'))
+                    continue
+                shipment_requests.append(self._shipment_request_repo.build_request(
+                    reference_number=validated_data['reference_number'],
+                    request_body=ShipmentRequestService.prepare_request_body(validated_data, shipper, consignee),
+                    status=self.status
+                ))
+
+            created = self._shipment_request_repo.bulk_create(shipment_requests, batch_size=self.chunk_size)
+        return len(created), len(chunk) - len(rows), rejected
+
+    @staticmethod
+    def _resolve_parties(repository, rows: List[Tuple[int, Dict[str, Any]]], party: str) -> Tuple[Dict[int, Any], Dict[str, Any]]:
+        """Load the parties referenced by id and get or create those given inline, keyed by email."""
+        party_ids = set()
+        inline_parties = {}
+        for _, validated_data in rows:
+            if validated_data.get(f'{party}_id'):
+                party_ids.add(validated_data[f'{party}_id'])
+            else:
+                inline_parties.setdefault(validated_data[party]['email'], validated_data[party])
+        return repository.get_by_ids(party_ids), repository.get_or_create_many('email', inline_parties)
+
+    @staticmethod
+    def _party_for(parties: Tuple[Dict[int, Any], Dict[str, Any]], validated_data: Dict[str, Any], party: str):
+        by_id, by_email = parties
+        if validated_data.get(f'{party}_id'):
+            return by_id.get(validated_data[f'{party}_id'])
+        return by_email.get(validated_data[party]['email'])
+
+    @staticmethod
+    def _reject(line_number: int,
+                error: Any,
+                results: Dict[str, Any],
+                on_error: Optional[Callable[[int, Any], None]]) -> None:
+        results['failed'] += 1
+        logger.warning(f"ShipmentRequestImporter: Line {line_number} rejected: {error}")
+        if on_error:
+            on_error(line_number, error)
+
+    @staticmethod
+    def _update_throughput(results: Dict[str, Any], started_at: float) -> None:
+        elapsed = time.monotonic() - started_at
+        results['elapsed_seconds'] = round(elapsed, 3)
+        results['rows_per_second'] = round(results['total'] / elapsed, 1) if elapsed > 0 else 0.0
@@ -54,25 +54,24 @@ class ShipmentRequestService:
         existing_request = repositories.shipment_request.get_latest_by_reference_number(reference_number)
         
         if existing_request:
-            if existing_request.status in ['pending', 'processing']:
+            if existing_request.is_active:
                 return existing_request, 'already_processing'
-            else:  # completed, cancelled
+            else:  # completed, cancelled, failed without retries left
                 return existing_request, 'can_create_new'
         
         return None, 'can_create_new'
     
     @classmethod
-    def create_shipment_request(cls, validated_data):
-        reference_number = validated_data['reference_number']
-        
+    def create_shipment_request(cls, validated_data, idempotency_key=None):
         if validated_data.get('action') == 'existing_shipment_found':
             existing_shipment = validated_data.get('existing_shipment')
             return ShipmentRequestResponse.create_response('existing_shipment', existing_shipment=existing_shipment)
         
-        existing_request, status = cls.check_existing_request(reference_number)
-        
-        if status == 'already_processing':
-            return ShipmentRequestResponse.create_response('already_processing', shipment_request=existing_request)
+        if idempotency_key:
+            replayed_request = repositories.shipment_request.get_by_idempotency_key(idempotency_key)
+            if replayed_request:
+                logger.info(f"ShipmentRequestService: Replaying request {replayed_request.id} for idempotency key {idempotency_key}")
+                return ShipmentRequestResponse.create_response('idempotent_replay', shipment_request=replayed_request)
         
         with transaction.atomic():
             shipper = cls.get_or_create_shipper(
@@ -88,12 +87,17 @@ class ShipmentRequestService:
             request_body = cls.prepare_request_body(validated_data, shipper, consignee)
             logger.info(f"ShipmentRequestService: Creating shipment request with body: {request_body}")
             
-            shipment_request = repositories.shipment_request.create(
+            shipment_request, created = repositories.shipment_request.create_or_get_active(
                 reference_number=validated_data['reference_number'],
                 request_body=request_body,
-                status='pending'
+                status='pending',
+                idempotency_key=idempotency_key
             )
             
+            if not created:
+                logger.info(f"ShipmentRequestService: Active request {shipment_request.id} already exists for reference {shipment_request.reference_number}")
+                return ShipmentRequestResponse.create_response('already_processing', shipment_request=shipment_request)
+            
             return ShipmentRequestResponse.create_response(
                 'new',
                 shipment_request=shipment_request,
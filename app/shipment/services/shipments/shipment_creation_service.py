@@ -1,5 +1,6 @@
 import logging
 from typing import Optional
+from django.conf import settings
 from django.db import transaction
 from core.models import Courier
 from ...models import Shipment
@@ -92,6 +93,10 @@ class ShipmentCreationService:
                     weight_unit=request.weight.unit
                 )
                 
+                if settings.LABEL_PREFETCH_ENABLED:
+                    # Fetched ahead of the first print by the prefetch_labels command
+                    transaction.on_commit(lambda: repositories.label_prefetch.enqueue(shipment.id, courier.name.lower()))
+                
                 logger.info(f"ShipmentCreationService: Persisted shipment {shipment.id} to database")
                 return shipment
                 
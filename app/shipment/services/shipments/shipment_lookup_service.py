@@ -8,10 +8,19 @@ class ShipmentLookupService:
     def __init__(self):
         self._shipment_repo = repositories.shipment
     
-    def get_shipment_by_reference(self, reference_number: str):
+    def get_shipment_by_reference(self, reference_number: str, relations: str = 'bare', use_replica: bool = True):
+        """
+        Look up a shipment; relations names the ShipmentRepository profile to join in.
+        Reads go to the read replica unless use_replica is False.
+        """
         try:
             logger.info(f"ShipmentLookupService: Looking up shipment for reference {reference_number}")
-            shipment = self._shipment_repo.get_by_reference_number(reference_number)
+            if use_replica:
+                shipment = self._shipment_repo.read_from_replica(
+                    lambda: self._shipment_repo.get_by_reference_number(reference_number, relations)
+                )
+            else:
+                shipment = self._shipment_repo.get_by_reference_number(reference_number, relations)
             if shipment:
                 logger.info(f"ShipmentLookupService: Found shipment {shipment.id} for reference {reference_number}")
             else:
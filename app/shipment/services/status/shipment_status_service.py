@@ -1,7 +1,11 @@
 import logging
-from typing import Optional, List
+from typing import Any, Optional, List, Dict
+from datetime import datetime
 from django.db import transaction
+from django.utils import timezone
+from core.db_routing import read_from_replica
 from ...models import Shipment, ShipmentStatus
+from ...repositories.repository_factory import repositories
 from ..mapping.status_mapping_service import StatusMappingService
 
 logger = logging.getLogger(__name__)
@@ -13,30 +17,172 @@ class ShipmentStatusService:
                      status: str, 
                      address: Optional[str] = None,
                      postal_code: Optional[str] = None,
-                     country: Optional[str] = None) -> ShipmentStatus:
-        if not StatusMappingService.is_valid_status(status):
-            logger.warning(f"ShipmentStatusService: Invalid status '{status}' for shipment {shipment.reference_number}")
-            status = 'unknown'
+                     country: Optional[str] = None,
+                     created_at: Optional[datetime] = None) -> ShipmentStatus:
+        return cls.create_statuses([{
+            'shipment': shipment,
+            'status': status,
+            'address': address,
+            'postal_code': postal_code,
+            'country': country,
+            'created_at': created_at
+        }])[0]
+    
+    @classmethod
+    def create_statuses(cls, items: List[Dict[str, Any]], register_markers: bool = True) -> List[ShipmentStatus]:
+        """
+        Insert many status updates with one bulk insert.
         
-        with transaction.atomic():
-            status_entry = ShipmentStatus.objects.create(
+        Each item holds the create_status arguments; created_at defaults to now
+        and carries the carrier's event time for webhook statuses. Current status, tracking
+        projection and cached responses of every affected shipment are synced
+        once, in the same transaction. Dedup markers are recorded unless the
+        caller already claimed them.
+        
+        Terminal statuses raised locally (no created_at, e.g. a cancellation)
+        always become current: if a carrier clock ran ahead, they are stamped
+        at the current status time instead of now.
+        """
+        status_entries = []
+        local_terminal_entries = []
+        for item in items:
+            shipment = item['shipment']
+            status = item['status']
+            if not StatusMappingService.is_valid_status(status):
+                logger.warning(f"ShipmentStatusService: Invalid status '{status}' for shipment {shipment.reference_number}")
+                status = 'unknown'
+            status_entry = ShipmentStatus(
                 shipment=shipment,
                 status=status.lower(),
-                address=address,
-                postal_code=postal_code,
-                country=country
+                address=item.get('address'),
+                postal_code=item.get('postal_code'),
+                country=item.get('country'),
+                created_at=item.get('created_at') or timezone.now()
             )
-            
-            logger.info(f"ShipmentStatusService: Created status '{status}' for shipment {shipment.reference_number}")
-            return status_entry
+            status_entries.append(status_entry)
+            if item.get('created_at') is None and StatusMappingService.is_terminal_status(status_entry.status):
+                local_terminal_entries.append(status_entry)
+        
+        shipments = {}
+        for status_entry in status_entries:
+            shipments.setdefault(status_entry.shipment_id, status_entry.shipment)
+        
+        with transaction.atomic():
+            # Serializes writers per shipment so projection updates never interleave;
+            # rows are locked in id order to avoid deadlocks between batches
+            projections = {}
+            for shipment_id, projection, current_status, current_status_at in Shipment.objects.select_for_update().filter(
+                id__in=shipments.keys()
+            ).order_by('id').values_list('id', 'tracking_projection', 'current_status', 'current_status_at'):
+                # The caller's instance may predate a concurrent writer; compare against the locked row
+                shipments[shipment_id].current_status = current_status
+                shipments[shipment_id].current_status_at = current_status_at
+                projections[shipment_id] = projection
+            for status_entry in local_terminal_entries:
+                current_status_at = shipments[status_entry.shipment_id].current_status_at
+                if current_status_at and status_entry.created_at < current_status_at:
+                    status_entry.created_at = current_status_at
+            ShipmentStatus.objects.bulk_create(status_entries)
+            if register_markers:
+                repositories.shipment_status.register_markers(
+                    (status_entry.shipment_id, status_entry.status)
+                    for status_entry in status_entries
+                    if StatusMappingService.is_deduplicated_status(status_entry.status)
+                )
+            cls._sync_shipments(shipments, status_entries, projections)
+        
+        for status_entry in status_entries:
+            logger.info(f"ShipmentStatusService: Created status '{status_entry.status}' for shipment {status_entry.shipment.reference_number}")
+        return status_entries
+    
+    @classmethod
+    def sync_inserted_statuses(cls, status_entries: List[ShipmentStatus]) -> None:
+        """
+        Sync shipments for statuses that were inserted outside create_statuses.
+        
+        Must run in the transaction that inserted them. Shipments are loaded and
+        locked here and attached to the entries.
+        """
+        with transaction.atomic():
+            shipments = {
+                shipment.id: shipment
+                for shipment in Shipment.objects.select_for_update().filter(
+                    id__in={status_entry.shipment_id for status_entry in status_entries}
+                ).order_by('id')
+            }
+            for status_entry in status_entries:
+                status_entry.shipment = shipments[status_entry.shipment_id]
+            projections = {shipment_id: shipment.tracking_projection for shipment_id, shipment in shipments.items()}
+            cls._sync_shipments(shipments, status_entries, projections)
+    
+    @classmethod
+    def _sync_shipments(cls,
+                        shipments: Dict[int, Shipment],
+                        status_entries: List[ShipmentStatus],
+                        projections: Dict[int, Optional[dict]]) -> None:
+        from ..tracking.tracking_cache_service import TrackingCacheService
+        
+        entries_by_shipment = {}
+        for status_entry in status_entries:
+            entries_by_shipment.setdefault(status_entry.shipment_id, []).append(status_entry)
+        
+        for shipment_id, shipment in shipments.items():
+            cls._apply_statuses(shipment, entries_by_shipment[shipment_id], projections.get(shipment_id))
+            TrackingCacheService.invalidate(shipment.reference_number)
+        Shipment.objects.bulk_update(
+            list(shipments.values()),
+            ['current_status', 'current_status_at', 'tracking_projection', 'updated_at']
+        )
+    
+    @classmethod
+    def _apply_statuses(cls,
+                        shipment: Shipment,
+                        status_entries: List[ShipmentStatus],
+                        projection: Optional[dict] = None) -> None:
+        from ..tracking.tracking_projection_builder import TrackingProjectionBuilder
+        
+        status_entries = sorted(status_entries, key=lambda status_entry: status_entry.created_at)
+        latest_entry = status_entries[-1]
+        # Events reported late join the history without moving the current status back
+        if shipment.current_status_at is None or latest_entry.created_at >= shipment.current_status_at:
+            shipment.current_status = latest_entry.status
+            shipment.current_status_at = latest_entry.created_at
+        # bulk_update skips auto_now, and updated_at versions the tracking ETag
+        shipment.updated_at = timezone.now()
+        if projection:
+            for status_entry in status_entries:
+                projection = TrackingProjectionBuilder.apply_status(projection, status_entry)
+        else:
+            projection = TrackingProjectionBuilder.build(shipment, cls.get_status_history(shipment))
+        shipment.tracking_projection = projection
+    
+    @classmethod
+    def get_current_status(cls, shipment: Shipment) -> Optional[str]:
+        """Read the denormalized current status, falling back to history for unsynced rows."""
+        if shipment.current_status:
+            return shipment.current_status
+        latest_status = cls.get_latest_status(shipment)
+        return latest_status.status if latest_status else None
     
     @classmethod
     def get_latest_status(cls, shipment: Shipment) -> Optional[ShipmentStatus]:
         return ShipmentStatus.objects.filter(shipment=shipment).order_by('-created_at').first()
     
     @classmethod
-    def get_status_history(cls, shipment: Shipment) -> List[ShipmentStatus]:
-        return list(ShipmentStatus.objects.filter(shipment=shipment).order_by('created_at'))
+    def get_status_history(cls, shipment: Shipment, use_replica: bool = True) -> List[ShipmentStatus]:
+        read = lambda: list(ShipmentStatus.objects.filter(shipment=shipment).order_by('created_at'))
+        return read_from_replica(read) if use_replica else read()
+    
+    @classmethod
+    def get_status_histories(cls, shipments: List[Shipment]) -> Dict[int, List[ShipmentStatus]]:
+        """Load the status history of many shipments with a single query."""
+        histories = {shipment.id: [] for shipment in shipments}
+        if not histories:
+            return histories
+        
+        for status in ShipmentStatus.objects.filter(shipment_id__in=histories.keys()).order_by('created_at'):
+            histories[status.shipment_id].append(status)
+        return histories
     
     @classmethod
     def update_status_from_courier(cls, 
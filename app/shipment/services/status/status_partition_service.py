@@ -0,0 +1,236 @@
+import gzip
+import logging
+import os
+import re
+import time
+from datetime import date
+from typing import List, Optional
+from django.db import OperationalError, connection, transaction
+from django.utils import timezone
+from ...models import ShipmentStatus
+
+logger = logging.getLogger(__name__)
+
+
+class StatusPartitionService:
+    """Manages the monthly range partitions of shipment_statuses on PostgreSQL."""
+
+    PARENT_TABLE = ShipmentStatus._meta.db_table
+    DEFAULT_PARTITION = f'{PARENT_TABLE}_default'
+    PARTITION_NAME_PATTERN = re.compile(rf'^{PARENT_TABLE}_p(\d{{4}})_(\d{{2}})$')
+    DETACH_LOCK_TIMEOUT = '5s'
+    DETACH_ATTEMPTS = 5
+
+    @classmethod
+    def is_supported(cls) -> bool:
+        return connection.vendor == 'postgresql'
+
+    @classmethod
+    def partition_name(cls, month: date) -> str:
+        return f'{cls.PARENT_TABLE}_p{month.year:04d}_{month.month:02d}'
+
+    @classmethod
+    def parse_partition_month(cls, name: str) -> Optional[date]:
+        match = cls.PARTITION_NAME_PATTERN.match(name)
+        if not match:
+            return None
+        return date(int(match.group(1)), int(match.group(2)), 1)
+
+    @staticmethod
+    def add_months(month: date, months: int) -> date:
+        index = month.year * 12 + month.month - 1 + months
+        return date(index // 12, index % 12 + 1, 1)
+
+    @classmethod
+    def current_month(cls) -> date:
+        return timezone.now().date().replace(day=1)
+
+    @classmethod
+    def list_partitions(cls) -> List[str]:
+        """Return attached monthly partition names, oldest first."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT child.relname
+                FROM pg_inherits
+                JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+                JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                WHERE parent.relname = %s
+                """,
+                [cls.PARENT_TABLE]
+            )
+            names = [row[0] for row in cursor.fetchall()]
+        return sorted(name for name in names if cls.parse_partition_month(name))
+
+    @classmethod
+    def create_partition(cls, month: date) -> bool:
+        """Create the partition for the month starting at `month`; return False if it already exists."""
+        name = cls.partition_name(month)
+        if name in cls.list_partitions():
+            return False
+
+        moved = cls._create_and_attach(name, month, cls.add_months(month, 1))
+        logger.info(f"StatusPartitionService: Created partition {name}, moved {moved} rows from {cls.DEFAULT_PARTITION}")
+        return True
+
+    @classmethod
+    def _create_and_attach(cls, name: str, start: date, end: date) -> int:
+        """
+        Create a partition and move the month's rows out of the default partition into it.
+
+        Postgres refuses to add a partition while the default partition holds
+        rows of its range, which happens whenever partitions were not created
+        in time. Inserts are blocked until the partition is attached.
+        """
+        bounds = [start.isoformat(), end.isoformat()]
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute(f'LOCK TABLE "{cls.DEFAULT_PARTITION}" IN SHARE ROW EXCLUSIVE MODE')
+                cursor.execute(f'CREATE TABLE "{name}" (LIKE "{cls.PARENT_TABLE}" INCLUDING DEFAULTS)')
+                cursor.execute(
+                    f"""
+                    WITH moved AS (
+                        DELETE FROM "{cls.DEFAULT_PARTITION}"
+                        WHERE created_at >= %s AND created_at < %s
+                        RETURNING *
+                    )
+                    INSERT INTO "{name}" SELECT * FROM moved
+                    """,
+                    bounds
+                )
+                moved = cursor.rowcount
+                cursor.execute(
+                    f'ALTER TABLE "{cls.PARENT_TABLE}" ATTACH PARTITION "{name}" FOR VALUES FROM (%s) TO (%s)',
+                    bounds
+                )
+        return moved
+
+    @classmethod
+    def ensure_future_partitions(cls, months_ahead: int = 3) -> List[str]:
+        """Create partitions from the current month through `months_ahead` months ahead."""
+        start = cls.current_month()
+        created = []
+        for offset in range(months_ahead + 1):
+            month = cls.add_months(start, offset)
+            if cls.create_partition(month):
+                created.append(cls.partition_name(month))
+        return created
+
+    @classmethod
+    def list_detached_partitions(cls) -> List[str]:
+        """Return monthly tables that were detached but not dropped, e.g. by an archive run whose dump failed."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT relname FROM pg_class WHERE relkind = 'r' AND NOT relispartition AND relname LIKE %s",
+                [f'{cls.PARENT_TABLE}\\_p%']
+            )
+            names = [row[0] for row in cursor.fetchall()]
+        return sorted(name for name in names if cls.parse_partition_month(name))
+
+    @classmethod
+    def partitions_older_than(cls, months: int) -> List[str]:
+        """Return partitions, attached or left detached, whose whole range ends before the cutoff month."""
+        cutoff = cls.add_months(cls.current_month(), -months)
+        return sorted(
+            name for name in cls.list_partitions() + cls.list_detached_partitions()
+            if cls.add_months(cls.parse_partition_month(name), 1) <= cutoff
+        )
+
+    @classmethod
+    def archive_partition(cls, name: str, output_dir: str) -> str:
+        """
+        Detach a partition, dump it as gzipped CSV and return the file path.
+
+        The partition is detached first, without holding up status writes, so
+        the dump reads a table that no longer receives rows and needs no lock.
+        A failed dump leaves the detached table in place; it is picked up
+        again by partitions_older_than and the archive file is only put in
+        place once the dump is complete, so a detached table that already has
+        one is not dumped again.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        path = os.path.join(output_dir, f'{name}.csv.gz')
+        partial_path = f'{path}.partial'
+        if not cls.detach_partition(name) and os.path.exists(path):
+            return path
+
+        try:
+            with connection.cursor() as cursor:
+                with gzip.open(partial_path, 'wt', encoding='utf-8') as archive_file:
+                    cursor.copy_expert(f'COPY "{name}" TO STDOUT WITH (FORMAT csv, HEADER true)', archive_file)
+        except Exception:
+            if os.path.exists(partial_path):
+                os.unlink(partial_path)
+            raise
+        os.replace(partial_path, path)
+        logger.info(f"StatusPartitionService: Archived detached partition {name} to {path}")
+        return path
+
+    @classmethod
+    def detach_partition(cls, name: str) -> bool:
+        """
+        Detach a partition from shipment_statuses; return False if it was already detached.
+
+        DETACH PARTITION ... CONCURRENTLY keeps the parent writable but must
+        run outside a transaction, and PostgreSQL refuses it while a default
+        partition exists. With the default partition, the plain DETACH runs in
+        its own short transaction under DETACH_LOCK_TIMEOUT, so it gives up
+        instead of queueing status writes behind its lock, and is retried.
+        """
+        if connection.in_atomic_block:
+            raise RuntimeError('Partitions must be detached outside a transaction')
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                """
+                SELECT pg_inherits.inhdetachpending
+                FROM pg_inherits
+                JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+                WHERE child.relname = %s
+                """,
+                [name]
+            )
+            row = cursor.fetchone()
+            if row is None:
+                return False
+            if row[0]:
+                # A concurrent detach was interrupted
+                cursor.execute(f'ALTER TABLE "{cls.PARENT_TABLE}" DETACH PARTITION "{name}" FINALIZE')
+                return True
+            if not cls._has_default_partition(cursor):
+                cursor.execute(f'ALTER TABLE "{cls.PARENT_TABLE}" DETACH PARTITION "{name}" CONCURRENTLY')
+                logger.info(f"StatusPartitionService: Detached partition {name} concurrently")
+                return True
+
+        for attempt in range(1, cls.DETACH_ATTEMPTS + 1):
+            try:
+                with transaction.atomic():
+                    with connection.cursor() as cursor:
+                        cursor.execute(f"SET LOCAL lock_timeout = '{cls.DETACH_LOCK_TIMEOUT}'")
+                        cursor.execute(f'ALTER TABLE "{cls.PARENT_TABLE}" DETACH PARTITION "{name}"')
+                logger.info(f"StatusPartitionService: Detached partition {name}")
+                return True
+            except OperationalError as e:
+                if attempt == cls.DETACH_ATTEMPTS:
+                    raise
+                logger.warning(f"StatusPartitionService: Detaching {name} timed out waiting for its lock, retrying: {str(e)}")
+                time.sleep(attempt)
+
+    @classmethod
+    def _has_default_partition(cls, cursor) -> bool:
+        cursor.execute(
+            """
+            SELECT 1
+            FROM pg_partitioned_table
+            JOIN pg_class parent ON parent.oid = pg_partitioned_table.partrelid
+            WHERE parent.relname = %s AND pg_partitioned_table.partdefid <> 0
+            """,
+            [cls.PARENT_TABLE]
+        )
+        return cursor.fetchone() is not None
+
+    @classmethod
+    def drop_partition(cls, name: str) -> None:
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE "{name}"')
+        logger.info(f"StatusPartitionService: Dropped partition {name}")
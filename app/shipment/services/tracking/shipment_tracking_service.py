@@ -1,10 +1,12 @@
 import logging
 from typing import Dict, Any, List
-from datetime import datetime
+from core.db_routing import derived_writes
 from ..shipments.shipment_lookup_service import ShipmentLookupService
+from ...models import ShipmentStatus
+from ...repositories.repository_factory import repositories
 from ..status.shipment_status_service import ShipmentStatusService
-from ..mapping.status_mapping_service import StatusMappingService
-from ...schemas.tracking_response import TrackingResponse, TrackingLocation, TrackingEvent, TrackingDetails
+from .tracking_projection_builder import TrackingProjectionBuilder
+from ...schemas.tracking_response import TrackingResponse
 
 logger = logging.getLogger(__name__)
 
@@ -15,28 +17,36 @@ class ShipmentTrackingService:
                  lookup_service: ShipmentLookupService = None):
         self._courier_factory = courier_factory_instance
         self._lookup_service = lookup_service or ShipmentLookupService()
+        self._shipment_repo = repositories.shipment
     
-    def track_shipment_by_reference(self, reference_number: str) -> TrackingResponse:
+    def track_shipment_by_reference(self, reference_number: str, use_replica: bool = True) -> TrackingResponse:
+        """Reads go to the read replica unless use_replica is False."""
         try:
             logger.info(f"ShipmentTrackingService: Tracking shipment for reference {reference_number}")
             
-            shipment = self._lookup_service.get_shipment_by_reference(reference_number)
+            shipment = self._lookup_service.get_shipment_by_reference(reference_number, 'bare', use_replica)
             if not shipment:
                 return TrackingResponse.create_error_response(
                     'Shipment not found',
                     'SHIPMENT_NOT_FOUND'
                 )
             
-            status_summary = ShipmentStatusService.get_status_summary(shipment)
-            latest_status = ShipmentStatusService.get_latest_status(shipment)
+            if shipment.tracking_projection:
+                logger.info(f"ShipmentTrackingService: Serving stored projection for reference {reference_number}")
+                return TrackingResponse.from_dict(shipment.tracking_projection)
             
-            if not latest_status:
+            # Projections are rendered from the courier and both parties, which only a rebuild needs
+            shipment = self._lookup_service.get_shipment_by_reference(reference_number, 'with_all', use_replica) or shipment
+            status_history = ShipmentStatusService.get_status_history(shipment, use_replica)
+            
+            if not status_history:
                 return TrackingResponse.create_error_response(
                     'No status information available for this shipment',
                     'NO_STATUS_FOUND'
                 )
             
-            tracking_response = self._build_tracking_response_from_status(shipment, status_summary)
+            tracking_response = self._build_tracking_response_from_status(shipment, status_history)
+            self._store_projection(shipment, tracking_response)
             
             logger.info(f"ShipmentTrackingService: Successfully tracked shipment for reference {reference_number}")
             return tracking_response
@@ -48,57 +58,54 @@ class ShipmentTrackingService:
                 'INTERNAL_ERROR'
             )
     
-    def _build_tracking_response_from_status(self, shipment, status_summary: dict) -> TrackingResponse:
-        
-        latest_status = ShipmentStatusService.get_latest_status(shipment)
+    def track_shipments_by_references(self, reference_numbers: List[str]) -> List[TrackingResponse]:
+        """Track many shipments with one shipment query and one status query."""
+        logger.info(f"ShipmentTrackingService: Batch tracking {len(reference_numbers)} references")
         
-        current_location = TrackingLocation(
-            address=latest_status.address or '',
-            country=latest_status.country or '',
-            postal_code=latest_status.postal_code or ''
-        )
-        
-        events = []
-        for status_entry in status_summary['status_history']:
-            location = TrackingLocation(
-                address=status_entry['address'] or '',
-                country=status_entry['country'] or '',
-                postal_code=status_entry['postal_code'] or ''
+        shipments = self._shipment_repo.get_by_reference_numbers(reference_numbers, 'bare')
+        shipments_by_reference = {shipment.reference_number: shipment for shipment in shipments}
+        # Only shipments without a stored projection are rendered, which needs the courier and both parties
+        unprojected = [shipment.reference_number for shipment in shipments if not shipment.tracking_projection]
+        if unprojected:
+            shipments_by_reference.update(
+                (shipment.reference_number, shipment)
+                for shipment in self._shipment_repo.get_by_reference_numbers(unprojected, 'with_all')
             )
-            
-            event = TrackingEvent(
-                timestamp=status_entry['created_at'].isoformat() if status_entry['created_at'] else '',
-                status=status_entry['status'],
-                description=status_entry['status_display'],
-                location=location
-            )
-            events.append(event)
-        
-        origin = TrackingLocation(
-            address=shipment.shipper.address if shipment.shipper else '',
-            country=shipment.shipper.country if shipment.shipper else '',
-            postal_code=shipment.shipper.postal_code if shipment.shipper else '',
-            city=shipment.shipper.city if shipment.shipper else ''
+        status_histories = ShipmentStatusService.get_status_histories(
+            [shipments_by_reference[reference_number] for reference_number in unprojected]
         )
         
-        destination = TrackingLocation(
-            address=shipment.consignee.address if shipment.consignee else '',
-            country=shipment.consignee.country if shipment.consignee else '',
-            postal_code=shipment.consignee.postal_code if shipment.consignee else '',
-            city=shipment.consignee.city if shipment.consignee else ''
-        )
+        results = []
+        for reference_number in reference_numbers:
+            shipment = shipments_by_reference.get(reference_number)
+            if not shipment:
+                result = TrackingResponse.create_error_response('Shipment not found', 'SHIPMENT_NOT_FOUND')
+            elif shipment.tracking_projection:
+                result = TrackingResponse.from_dict(shipment.tracking_projection)
+            elif not status_histories[shipment.id]:
+                result = TrackingResponse.create_error_response(
+                    'No status information available for this shipment',
+                    'NO_STATUS_FOUND'
+                )
+            else:
+                result = self._build_tracking_response_from_status(shipment, status_histories[shipment.id])
+            
+            result.reference_number = reference_number
+            results.append(result)
         
-        return TrackingResponse(
-            success=True,
-            tracking_number='',
-            service=shipment.courier.name if shipment.courier else '',
-            current_status=latest_status.status,
-            status_description=StatusMappingService.get_status_display_name(latest_status.status),
-            current_location=current_location,
-            events=events,
-            origin=origin,
-            destination=destination,
-            details=TrackingDetails('', {}, []),
-            reference_number=shipment.reference_number,
-            shipment_id=shipment.id
-        )
+        return results
+    
+    def _store_projection(self, shipment, tracking_response: TrackingResponse) -> None:
+        """Persist a projection rendered on read for shipments that predate projections."""
+        try:
+            # Rebuilt from the primary's history, so the replica is not stale without it
+            with derived_writes():
+                self._shipment_repo.model.objects.filter(
+                    id=shipment.id,
+                    tracking_projection__isnull=True
+                ).update(tracking_projection=tracking_response.to_dict())
+        except Exception as e:
+            logger.warning(f"ShipmentTrackingService: Could not store projection for shipment {shipment.id}: {str(e)}")
+    
+    def _build_tracking_response_from_status(self, shipment, status_history: List[ShipmentStatus]) -> TrackingResponse:
+        return TrackingProjectionBuilder.build_response(shipment, status_history)
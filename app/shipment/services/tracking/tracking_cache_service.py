@@ -0,0 +1,68 @@
+import logging
+from typing import Any, Dict, Optional
+from django.core.cache import caches
+from django.db import transaction
+
+logger = logging.getLogger(__name__)
+
+
+class TrackingCacheService:
+    """Read-through cache of rendered tracking responses, keyed by reference number.
+
+    Every entry records the reference's generation at the time it was read from
+    the database. Invalidation bumps the generation, so a reader that raced a
+    status write cannot re-publish the stale response it built.
+    """
+
+    CACHE_ALIAS = 'tracking'
+
+    @classmethod
+    def _cache(cls):
+        return caches[cls.CACHE_ALIAS]
+
+    @staticmethod
+    def _entry_key(reference_number: str) -> str:
+        return f'tracking:response:{reference_number}'
+
+    @staticmethod
+    def _generation_key(reference_number: str) -> str:
+        return f'tracking:generation:{reference_number}'
+
+    @classmethod
+    def get_generation(cls, reference_number: str) -> int:
+        """Read before loading from the database and pass to set()."""
+        return cls._cache().get(cls._generation_key(reference_number), 0)
+
+    @classmethod
+    def get(cls, reference_number: str) -> Optional[Dict[str, Any]]:
+        entry_key = cls._entry_key(reference_number)
+        generation_key = cls._generation_key(reference_number)
+        values = cls._cache().get_many([entry_key, generation_key])
+        entry = values.get(entry_key)
+        if not entry or entry['generation'] != values.get(generation_key, 0):
+            return None
+        return entry
+
+    @classmethod
+    def set(cls, reference_number: str, generation: int, etag: str, data: Dict[str, Any]) -> None:
+        cls._cache().set(
+            cls._entry_key(reference_number),
+            {'generation': generation, 'etag': etag, 'data': data}
+        )
+
+    @classmethod
+    def invalidate(cls, reference_number: str) -> None:
+        """Drop the cached response now and again once the surrounding transaction commits."""
+        cls._invalidate(reference_number)
+        transaction.on_commit(lambda: cls._invalidate(reference_number))
+
+    @classmethod
+    def _invalidate(cls, reference_number: str) -> None:
+        cache = cls._cache()
+        generation_key = cls._generation_key(reference_number)
+        try:
+            cache.incr(generation_key)
+        except ValueError:
+            cache.set(generation_key, 1, timeout=None)
+        cache.delete(cls._entry_key(reference_number))
+        logger.info(f"TrackingCacheService: Invalidated tracking cache for reference {reference_number}")
@@ -0,0 +1,106 @@
+from typing import Any, Dict, List
+from django.utils.dateparse import parse_datetime
+from ...models import ShipmentStatus
+from ..mapping.status_mapping_service import StatusMappingService
+from ...schemas.tracking_response import TrackingResponse, TrackingLocation, TrackingEvent, TrackingDetails
+
+
+class TrackingProjectionBuilder:
+    """Renders the tracking payload stored on Shipment.tracking_projection."""
+
+    @classmethod
+    def build_response(cls, shipment, status_history: List[ShipmentStatus]) -> TrackingResponse:
+        latest_status = status_history[-1]
+        current_status = shipment.current_status or latest_status.status
+
+        current_location = cls._location(latest_status)
+
+        events = []
+        for status_entry in status_history:
+            event = TrackingEvent(
+                timestamp=status_entry.created_at.isoformat() if status_entry.created_at else '',
+                status=status_entry.status,
+                description=StatusMappingService.get_status_display_name(status_entry.status),
+                location=cls._location(status_entry)
+            )
+            events.append(event)
+
+        origin = TrackingLocation(
+            address=shipment.shipper.address if shipment.shipper else '',
+            country=shipment.shipper.country if shipment.shipper else '',
+            postal_code=shipment.shipper.postal_code if shipment.shipper else '',
+            city=shipment.shipper.city if shipment.shipper else ''
+        )
+
+        destination = TrackingLocation(
+            address=shipment.consignee.address if shipment.consignee else '',
+            country=shipment.consignee.country if shipment.consignee else '',
+            postal_code=shipment.consignee.postal_code if shipment.consignee else '',
+            city=shipment.consignee.city if shipment.consignee else ''
+        )
+
+        return TrackingResponse(
+            success=True,
+            tracking_number='',
+            service=shipment.courier.name if shipment.courier else '',
+            current_status=current_status,
+            status_description=StatusMappingService.get_status_display_name(current_status),
+            current_location=current_location,
+            events=events,
+            origin=origin,
+            destination=destination,
+            details=TrackingDetails('', {}, []),
+            reference_number=shipment.reference_number,
+            shipment_id=shipment.id
+        )
+
+    @classmethod
+    def build(cls, shipment, status_history: List[ShipmentStatus]) -> Dict[str, Any]:
+        """Render the full projection from the status history."""
+        return cls.build_response(shipment, status_history).to_dict()
+
+    @classmethod
+    def apply_status(cls, projection: Dict[str, Any], status_entry: ShipmentStatus) -> Dict[str, Any]:
+        """Return a copy of the projection with one new status event inserted in event time order."""
+        location = cls._location_dict(status_entry)
+        event = {
+            'timestamp': status_entry.created_at.isoformat() if status_entry.created_at else '',
+            'status': status_entry.status,
+            'description': StatusMappingService.get_status_display_name(status_entry.status),
+            'location': location
+        }
+
+        events = list(projection.get('events', []))
+        position = len(events)
+        while position and status_entry.created_at and cls._is_later(events[position - 1], status_entry):
+            position -= 1
+        events.insert(position, event)
+        
+        latest_event = events[-1]
+        updated = dict(projection)
+        updated['events'] = events
+        updated['current_status'] = latest_event['status']
+        updated['status_description'] = latest_event['description']
+        updated['current_location'] = dict(latest_event['location'])
+        return updated
+    
+    @staticmethod
+    def _is_later(event: Dict[str, Any], status_entry: ShipmentStatus) -> bool:
+        event_time = parse_datetime(event.get('timestamp') or '')
+        return event_time is not None and event_time > status_entry.created_at
+
+    @staticmethod
+    def _location(status_entry: ShipmentStatus) -> TrackingLocation:
+        return TrackingLocation(
+            address=status_entry.address or '',
+            country=status_entry.country or '',
+            postal_code=status_entry.postal_code or ''
+        )
+
+    @staticmethod
+    def _location_dict(status_entry: ShipmentStatus) -> Dict[str, str]:
+        return {
+            'address': status_entry.address or '',
+            'country': status_entry.country or '',
+            'postal_code': status_entry.postal_code or ''
+        }
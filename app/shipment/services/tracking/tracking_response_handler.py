@@ -1,7 +1,7 @@
 import logging
 from rest_framework.response import Response
 from rest_framework import status
-from typing import Dict, Any
+from typing import Dict, Any, List
 from ...schemas.tracking_response import TrackingResponse
 
 logger = logging.getLogger(__name__)
@@ -35,6 +35,33 @@ class TrackingResponseHandler:
                 status=http_status
             )
 
+    @staticmethod
+    def handle_batch_result(results: List[TrackingResponse]) -> Response:
+        items = []
+        for result in results:
+            if result.success:
+                items.append(result.to_dict())
+            else:
+                items.append({
+                    'success': False,
+                    'reference_number': result.reference_number,
+                    'error': result.error,
+                    'error_code': result.error_code or 'UNKNOWN_ERROR'
+                })
+        
+        return Response(
+            {
+                'success': True,
+                'message': 'Tracking information retrieved successfully',
+                'data': {
+                    'total': len(items),
+                    'found': sum(1 for result in results if result.success),
+                    'results': items
+                }
+            },
+            status=status.HTTP_200_OK
+        )
+
     @staticmethod
     def _map_error_code_to_http_status(error_code: str) -> int:
         if error_code in ['SHIPMENT_NOT_FOUND', 'SHIPMENT_NOT_FOUND_IN_COURIER', 'COURIER_NOT_FOUND']:
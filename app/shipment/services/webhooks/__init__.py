@@ -3,9 +3,14 @@
 from .dhl_webhook_parser import DHLWebhookParser
 from .dhl_webhook_validator import DHLWebhookValidator
 from .dhl_webhook_processor import DHLWebhookProcessor
+from .webhook_inbox_processor import WebhookInboxProcessor
+from .tracking_number_filter import TrackingNumberFilter, tracking_number_filter
 
 __all__ = [
     'DHLWebhookParser',
     'DHLWebhookValidator', 
-    'DHLWebhookProcessor'
+    'DHLWebhookProcessor',
+    'WebhookInboxProcessor',
+    'TrackingNumberFilter',
+    'tracking_number_filter'
 ]
@@ -1,6 +1,8 @@
 from dataclasses import dataclass
 from typing import Dict, Any, Optional
-from datetime import datetime
+from datetime import datetime, timezone as dt_timezone
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
 
 @dataclass
@@ -11,12 +13,17 @@ class DHLWebhookData:
     location_address: Optional[str] = None
     location_country: Optional[str] = None
     location_postal_code: Optional[str] = None
+    received_at: Optional[datetime] = None
+    
+    @property
+    def event_time(self) -> datetime:
+        return datetime.fromisoformat(self.timestamp)
 
 
 class DHLWebhookParser:
     
     @classmethod
-    def parse(cls, payload: Dict[str, Any]) -> Optional[DHLWebhookData]:
+    def parse(cls, payload: Dict[str, Any], received_at: Optional[datetime] = None) -> Optional[DHLWebhookData]:
         try:
             tracking_number = payload.get('tracking_number')
             status = payload.get('status')
@@ -29,11 +36,25 @@ class DHLWebhookParser:
             return DHLWebhookData(
                 tracking_number=str(tracking_number),
                 status=str(status).upper(),
-                timestamp=datetime.utcnow().isoformat(),
+                timestamp=cls._event_time(payload.get('timestamp'), received_at).isoformat(),
                 location_address=location.get('addressLocality'),
                 location_country=location.get('countryCode'),
-                location_postal_code=location.get('postalCode')
+                location_postal_code=location.get('postalCode'),
+                received_at=received_at
             )
             
         except Exception:
             return None
+    
+    @staticmethod
+    def _event_time(value: Any, received_at: Optional[datetime]) -> datetime:
+        """Carrier event time in UTC, falling back to when the webhook was received."""
+        try:
+            event_time = parse_datetime(value) if isinstance(value, str) else None
+        except ValueError:
+            event_time = None
+        if event_time is None:
+            event_time = received_at or timezone.now()
+        if timezone.is_naive(event_time):
+            event_time = timezone.make_aware(event_time, dt_timezone.utc)
+        return event_time.astimezone(dt_timezone.utc)
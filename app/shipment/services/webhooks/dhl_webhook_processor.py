@@ -1,10 +1,12 @@
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 from django.db import transaction
 from ...models import Shipment
+from ...repositories.repository_factory import repositories
 from ...services.status.shipment_status_service import ShipmentStatusService
 from ...services.mapping.status_mapping_service import StatusMappingService
 from .dhl_webhook_parser import DHLWebhookData
+from .tracking_number_filter import tracking_number_filter
 
 logger = logging.getLogger(__name__)
 
@@ -12,6 +14,8 @@ logger = logging.getLogger(__name__)
 class DHLWebhookProcessor:
     def __init__(self):
         self._shipment_lookup_service = None
+        self._shipment_repo = repositories.shipment
+        self._status_repo = repositories.shipment_status
     
     @property
     def shipment_lookup_service(self):
@@ -24,69 +28,206 @@ class DHLWebhookProcessor:
         try:
             logger.info(f"DHLWebhookProcessor: Processing webhook for tracking number {webhook_data.tracking_number}")
             
+            if not tracking_number_filter.might_contain(webhook_data.tracking_number, webhook_data.received_at):
+                logger.warning(f"DHLWebhookProcessor: Unknown tracking number {webhook_data.tracking_number}, rejected by filter")
+                return self._not_found_result()
+            
+            standardized_status = self._map_dhl_status(webhook_data.status)
             shipment = self._find_shipment_by_tracking_number(webhook_data.tracking_number)
             if not shipment:
                 logger.warning(f"DHLWebhookProcessor: Shipment not found for tracking number {webhook_data.tracking_number}")
-                return {
-                    'success': False,
-                    'message': 'Shipment not found',
-                    'error_code': 'SHIPMENT_NOT_FOUND'
-                }
-            
-            # Check if shipment is already cancelled
-            if self._is_shipment_cancelled(shipment):
+                return self._not_found_result()
+            
+            if shipment.current_status == 'cancelled':
                 logger.info(f"DHLWebhookProcessor: Shipment {shipment.reference_number} is already cancelled, ignoring webhook")
-                return {
-                    'success': True,
-                    'message': 'Shipment already cancelled, webhook ignored',
-                    'shipment_id': shipment.id,
-                    'reference_number': shipment.reference_number,
-                    'status_entry_id': None,
-                    'mapped_status': None,
-                    'status': 'cancelled_ignored'
-                }
-            
-            # Map DHL status to our standardized status
-            standardized_status = self._map_dhl_status(webhook_data.status)
+                return self._ignored_result(shipment.id, shipment.reference_number, 'cancelled_ignored')
             
-            # Check for duplicate status before updating
-            if self._is_duplicate_status(shipment, standardized_status):
-                logger.info(f"DHLWebhookProcessor: Duplicate status '{standardized_status}' for shipment {shipment.reference_number}, ignoring webhook")
-                return {
-                    'success': True,
-                    'message': 'Duplicate status ignored',
-                    'shipment_id': shipment.id,
-                    'reference_number': shipment.reference_number,
-                    'status_entry_id': None,
-                    'mapped_status': None,
-                    'status': 'duplicate_ignored'
-                }
-            
-            # Update shipment status in database
-            status_entry = self._update_shipment_status(
-                shipment=shipment,
-                dhl_status=webhook_data.status,
-                standardized_status=standardized_status,
-                webhook_data=webhook_data
-            )
+            status = self._stored_status(standardized_status)
+            with transaction.atomic():
+                # Cancelled since it was loaded; the lock keeps it from being cancelled until commit
+                if self._shipment_repo.lock_cancelled_ids([shipment.id]):
+                    logger.info(f"DHLWebhookProcessor: Shipment {shipment.reference_number} was cancelled, ignoring webhook")
+                    return self._ignored_result(shipment.id, shipment.reference_number, 'cancelled_ignored')
+                if StatusMappingService.is_deduplicated_status(status) and not self._status_repo.claim_markers([(shipment.id, status)]):
+                    logger.info(f"DHLWebhookProcessor: Duplicate status '{standardized_status}' for shipment {shipment.reference_number}, ignoring webhook")
+                    return self._ignored_result(shipment.id, shipment.reference_number, 'duplicate_ignored')
+                
+                status_entry = self._update_shipment_status(
+                    shipment=shipment,
+                    dhl_status=webhook_data.status,
+                    standardized_status=standardized_status,
+                    webhook_data=webhook_data
+                )
             
             logger.info(f"DHLWebhookProcessor: Successfully processed webhook for shipment {shipment.reference_number}")
-            return {
-                'success': True,
-                'message': 'Webhook processed successfully',
-                'shipment_id': shipment.id,
-                'reference_number': shipment.reference_number,
-                'status_entry_id': status_entry.id,
-                'mapped_status': standardized_status
-            }
+            return self._processed_result(shipment.id, shipment.reference_number, status_entry.id, standardized_status)
             
         except Exception as e:
             logger.error(f"DHLWebhookProcessor: Error processing webhook: {str(e)}")
-            return {
-                'success': False,
-                'message': f'Error processing webhook: {str(e)}',
-                'error_code': 'PROCESSING_ERROR'
-            }
+            return self._error_result(e)
+    
+    def process_webhooks(self, webhook_data_list: List[DHLWebhookData]) -> List[Dict[str, Any]]:
+        """
+        Process many webhooks with set-based queries.
+        
+        Shipments are loaded with one query, then locked and re-checked for a
+        cancellation that raced the batch, dedup markers for all candidate
+        statuses are claimed with one insert-on-conflict and all new statuses
+        are inserted with one bulk insert. If the bulk insert fails, the events
+        are applied one at a time so only the failing ones report an error.
+        Results are returned in input order with the same shape as process_webhook.
+        """
+        tracking_numbers = tracking_number_filter.filter_known(
+            (webhook_data.tracking_number, webhook_data.received_at) for webhook_data in webhook_data_list
+        )
+        shipments = {
+            shipment.courier_external_id: shipment
+            for shipment in Shipment.objects.filter(courier_external_id__in=tracking_numbers)
+        } if tracking_numbers else {}
+        # Status each shipment will have once this batch is applied
+        batch_statuses = {shipment.id: shipment.current_status for shipment in shipments.values()}
+        batch_pairs = set()
+        
+        results = []
+        candidates = []
+        for webhook_data in webhook_data_list:
+            shipment = shipments.get(webhook_data.tracking_number)
+            if not shipment:
+                logger.warning(f"DHLWebhookProcessor: Shipment not found for tracking number {webhook_data.tracking_number}")
+                results.append(self._not_found_result())
+                continue
+            
+            if batch_statuses[shipment.id] == 'cancelled':
+                results.append(self._ignored_result(shipment.id, shipment.reference_number, 'cancelled_ignored'))
+                continue
+            
+            standardized_status = self._map_dhl_status(webhook_data.status)
+            status = self._stored_status(standardized_status)
+            deduplicate = StatusMappingService.is_deduplicated_status(status)
+            if deduplicate and (shipment.id, status) in batch_pairs:
+                results.append(self._ignored_result(shipment.id, shipment.reference_number, 'duplicate_ignored'))
+                continue
+            
+            batch_pairs.add((shipment.id, status))
+            batch_statuses[shipment.id] = status
+            result = self._processed_result(shipment.id, shipment.reference_number, None, standardized_status)
+            results.append(result)
+            candidates.append((result, deduplicate, {
+                'shipment': shipment,
+                'status': standardized_status,
+                'address': webhook_data.location_address,
+                'postal_code': webhook_data.location_postal_code,
+                'country': webhook_data.location_country,
+                'created_at': webhook_data.event_time
+            }))
+        
+        if not candidates:
+            return results
+        
+        try:
+            with transaction.atomic():
+                cancelled = self._shipment_repo.lock_cancelled_ids(item['shipment'].id for _, _, item in candidates)
+                claimed = self._status_repo.claim_markers(
+                    (item['shipment'].id, self._stored_status(item['status']))
+                    for _, deduplicate, item in candidates
+                    if deduplicate and item['shipment'].id not in cancelled
+                )
+                new_items = []
+                for result, deduplicate, item in candidates:
+                    if item['shipment'].id in cancelled:
+                        result.update(self._ignored_result(result['shipment_id'], result['reference_number'], 'cancelled_ignored'))
+                    elif deduplicate and (item['shipment'].id, self._stored_status(item['status'])) not in claimed:
+                        result.update(self._ignored_result(result['shipment_id'], result['reference_number'], 'duplicate_ignored'))
+                    else:
+                        new_items.append((result, item))
+                
+                status_entries = ShipmentStatusService.create_statuses(
+                    [item for _, item in new_items],
+                    register_markers=False
+                ) if new_items else []
+        except Exception as e:
+            logger.error(f"DHLWebhookProcessor: Error inserting batch of {len(candidates)} statuses, applying them one at a time: {str(e)}")
+            for candidate in candidates:
+                self._apply_candidate(*candidate)
+            return results
+        
+        for (result, _), status_entry in zip(new_items, status_entries):
+            result['status_entry_id'] = status_entry.id
+        
+        logger.info(f"DHLWebhookProcessor: Inserted {len(status_entries)} statuses from batch of {len(webhook_data_list)} webhooks")
+        return results
+    
+    def _apply_candidate(self, result: Dict[str, Any], deduplicate: bool, item: Dict[str, Any]) -> None:
+        """Insert one status of a batch whose bulk insert failed, updating its result in place."""
+        shipment = item['shipment']
+        status = self._stored_status(item['status'])
+        # The failed batch may already have marked this result as a duplicate
+        result.clear()
+        result.update(self._processed_result(shipment.id, shipment.reference_number, None, item['status']))
+        try:
+            with transaction.atomic():
+                if self._shipment_repo.lock_cancelled_ids([shipment.id]):
+                    result.update(self._ignored_result(shipment.id, shipment.reference_number, 'cancelled_ignored'))
+                    return
+                if deduplicate and not self._status_repo.claim_markers([(shipment.id, status)]):
+                    result.update(self._ignored_result(shipment.id, shipment.reference_number, 'duplicate_ignored'))
+                    return
+                status_entry = ShipmentStatusService.create_statuses([item], register_markers=False)[0]
+            result['status_entry_id'] = status_entry.id
+        except Exception as e:
+            logger.error(f"DHLWebhookProcessor: Error inserting status for shipment {shipment.reference_number}: {str(e)}")
+            result.clear()
+            result.update(self._error_result(e))
+    
+    @staticmethod
+    def _stored_status(standardized_status: str) -> str:
+        """Status value as ShipmentStatusService stores it."""
+        if not StatusMappingService.is_valid_status(standardized_status):
+            return 'unknown'
+        return standardized_status.lower()
+    
+    @staticmethod
+    def _not_found_result() -> Dict[str, Any]:
+        return {
+            'success': False,
+            'message': 'Shipment not found',
+            'error_code': 'SHIPMENT_NOT_FOUND'
+        }
+    
+    @staticmethod
+    def _ignored_result(shipment_id: int, reference_number: str, ignored_status: str) -> Dict[str, Any]:
+        messages = {
+            'cancelled_ignored': 'Shipment already cancelled, webhook ignored',
+            'duplicate_ignored': 'Duplicate status ignored'
+        }
+        return {
+            'success': True,
+            'message': messages[ignored_status],
+            'shipment_id': shipment_id,
+            'reference_number': reference_number,
+            'status_entry_id': None,
+            'mapped_status': None,
+            'status': ignored_status
+        }
+    
+    @staticmethod
+    def _processed_result(shipment_id: int, reference_number: str, status_entry_id: Optional[int], mapped_status: str) -> Dict[str, Any]:
+        return {
+            'success': True,
+            'message': 'Webhook processed successfully',
+            'shipment_id': shipment_id,
+            'reference_number': reference_number,
+            'status_entry_id': status_entry_id,
+            'mapped_status': mapped_status
+        }
+    
+    @staticmethod
+    def _error_result(error: Exception) -> Dict[str, Any]:
+        return {
+            'success': False,
+            'message': f'Error processing webhook: {str(error)}',
+            'error_code': 'PROCESSING_ERROR'
+        }
     
     def _find_shipment_by_tracking_number(self, tracking_number: str) -> Optional[Shipment]:
         """
@@ -162,7 +303,8 @@ class DHLWebhookProcessor:
                     status=standardized_status,
                     address=webhook_data.location_address,
                     postal_code=webhook_data.location_postal_code,
-                    country=webhook_data.location_country
+                    country=webhook_data.location_country,
+                    created_at=webhook_data.event_time
                 )
                 
                 logger.info(f"DHLWebhookProcessor: Created status entry {status_entry.id} with status '{standardized_status}'")
@@ -172,66 +314,6 @@ class DHLWebhookProcessor:
             logger.error(f"DHLWebhookProcessor: Error updating shipment status: {str(e)}")
             raise
     
-    def _is_duplicate_status(self, shipment: Shipment, standardized_status: str) -> bool:
-        """
-        Check if the same status already exists for the shipment.
-        
-        Args:
-            shipment: Shipment object
-            standardized_status: Standardized status to check
-            
-        Returns:
-            True if duplicate status exists, False otherwise
-        """
-        try:
-            from ...models import ShipmentStatus
-            
-            # Check if the same status already exists for this shipment
-            existing_status = ShipmentStatus.objects.filter(
-                shipment=shipment,
-                status=standardized_status.lower()
-            ).first()
-            
-            if existing_status:
-                logger.info(f"DHLWebhookProcessor: Found existing status '{standardized_status}' for shipment {shipment.reference_number}")
-                return True
-            
-            return False
-            
-        except Exception as e:
-            logger.error(f"DHLWebhookProcessor: Error checking for duplicate status: {str(e)}")
-            # If there's an error checking for duplicates, we'll process the webhook anyway
-            return False
-    
-    def _is_shipment_cancelled(self, shipment: Shipment) -> bool:
-        """
-        Check if the shipment is already cancelled.
-        
-        Args:
-            shipment: Shipment object
-            
-        Returns:
-            True if shipment is cancelled, False otherwise
-        """
-        try:
-            from ...models import ShipmentStatus
-            
-            # Get the latest status for this shipment
-            latest_status = ShipmentStatus.objects.filter(
-                shipment=shipment
-            ).order_by('-created_at').first()
-            
-            if latest_status and latest_status.status.lower() == 'cancelled':
-                logger.info(f"DHLWebhookProcessor: Shipment {shipment.reference_number} has latest status 'cancelled'")
-                return True
-            
-            return False
-            
-        except Exception as e:
-            logger.error(f"DHLWebhookProcessor: Error checking if shipment is cancelled: {str(e)}")
-            # If there's an error checking, we'll process the webhook anyway
-            return False
-    
     def get_webhook_summary(self, webhook_data: DHLWebhookData) -> Dict[str, Any]:
         """
         Get summary of webhook data for logging/debugging.
@@ -1,101 +1,49 @@
+import hmac
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
 from django.http import HttpRequest
 
 logger = logging.getLogger(__name__)
 
 
 class DHLWebhookValidator:
+    MAX_BATCH_EVENTS = 500
+    
     @classmethod
-    def validate_request(cls, request: HttpRequest) -> bool:
-        try:
-            logger.info("DHLWebhookValidator: Starting request validation")
-            
-            if not cls._validate_http_method(request):
-                logger.warning("DHLWebhookValidator: Invalid HTTP method")
-                return False
-            
-            if not cls._validate_content_type(request):
-                logger.warning("DHLWebhookValidator: Invalid content type")
-                return False
-            
-            if not cls._validate_headers(request):
-                logger.warning("DHLWebhookValidator: Invalid headers")
-                return False
-            
-            logger.info("DHLWebhookValidator: Request validation successful")
-            return True
-            
-        except Exception as e:
-            logger.error(f"DHLWebhookValidator: Error validating request: {str(e)}")
+    def is_authorized(cls, request: HttpRequest) -> bool:
+        """Method, content type and API key checks, read straight from request.META."""
+        from django.conf import settings
+        
+        meta = request.META
+        content_type = meta.get('CONTENT_TYPE')
+        if request.method != 'POST' or not content_type or 'application/json' not in content_type.lower():
             return False
+        
+        api_key = meta.get('HTTP_X_API_KEY') or meta.get('HTTP_AUTHORIZATION', '').replace('Bearer ', '')
+        expected_key = getattr(settings, 'DHL_WEBHOOK_API_KEY', None)
+        return bool(api_key and expected_key and hmac.compare_digest(api_key, expected_key))
     
     @classmethod
-    def validate_payload(cls, payload: Dict[str, Any]) -> bool:
+    def check_event(cls, payload: Any) -> Tuple[Optional[str], Optional[str]]:
         """
-        Validate the webhook payload structure and content.
+        Validate one webhook event and check that it can be parsed.
+        
+        Runs the required-field and data-type checks, then the checks of
+        DHLWebhookParser.parse without building the parsed object.
         
         Args:
-            payload: Parsed JSON payload from webhook
+            payload: Decoded JSON event
             
         Returns:
-            True if payload is valid, False otherwise
+            (error_code, tracking_number); error_code is None for an accepted event
         """
-        try:
-            logger.info("DHLWebhookValidator: Starting payload validation")
-            
-            # Check if payload is not empty
-            if not payload:
-                logger.warning("DHLWebhookValidator: Empty payload")
-                return False
-            
-            # Check required fields
-            if not cls._validate_required_fields(payload):
-                logger.warning("DHLWebhookValidator: Missing required fields")
-                return False
-            
-            # Check data types
-            if not cls._validate_data_types(payload):
-                logger.warning("DHLWebhookValidator: Invalid data types")
-                return False
-            
-            logger.info("DHLWebhookValidator: Payload validation successful")
-            return True
-            
-        except Exception as e:
-            logger.error(f"DHLWebhookValidator: Error validating payload: {str(e)}")
-            return False
-    
-    @classmethod
-    def _validate_http_method(cls, request: HttpRequest) -> bool:
-        """Validate HTTP method is POST."""
-        return request.method == 'POST'
-    
-    @classmethod
-    def _validate_content_type(cls, request: HttpRequest) -> bool:
-        """Validate content type is JSON."""
-        content_type = request.content_type
-        return content_type and 'application/json' in content_type.lower()
-    
-    @classmethod
-    def _validate_headers(cls, request: HttpRequest) -> bool:
-        """Validate required headers including API key."""
-        from django.conf import settings
-        
-        # Check content type
-        if 'content-type' not in request.headers:
-            logger.warning("DHLWebhookValidator: Missing content-type header")
-            return False
+        if not payload or not cls._validate_data_types(payload) or not cls._validate_required_fields(payload):
+            return 'INVALID_PAYLOAD', None
         
-        # Check API key
-        api_key = request.headers.get('X-API-Key') or request.headers.get('Authorization', '').replace('Bearer ', '')
-        expected_key = getattr(settings, 'DHL_WEBHOOK_API_KEY', None)
-        
-        if not api_key or not expected_key or api_key != expected_key:
-            logger.warning("DHLWebhookValidator: Invalid or missing API key")
-            return False
-        
-        return True
+        tracking_number = payload.get('tracking_number')
+        if not tracking_number or not payload.get('status') or not isinstance(payload.get('location', {}), dict):
+            return 'PARSE_ERROR', None
+        return None, str(tracking_number)
     
     @classmethod
     def _validate_required_fields(cls, payload: Dict[str, Any]) -> bool:
@@ -0,0 +1,171 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Optional, Tuple
+from django.utils import timezone
+from ...models import Shipment
+
+logger = logging.getLogger(__name__)
+
+
+class TrackingNumberFilter:
+    """
+    Process-local Bloom filter of known courier_external_ids.
+
+    A negative answer for a webhook received before the filter was last synced
+    means the tracking number is not ours, so the webhook can be rejected
+    without a database lookup. Webhooks received later may belong to shipments
+    the filter has not seen yet, so they are always checked in the database.
+    Lookups never query, and the filter learns of new shipments only through
+    refresh(), called by the worker loop: a catch-up query on recent shipment
+    ids at most once per catch_up_interval, and a rebuild every
+    rebuild_interval or once it is over capacity. Shipments created after the
+    last sync are covered by the received_at cutoff, not by the filter.
+    """
+
+    MIN_CAPACITY = 1024
+    # Ids are assigned at insert but become visible at commit, so catch-up
+    # rescans a window below the highest id seen to pick up late commits
+    CATCH_UP_OVERLAP_IDS = 1000
+    # received_at is stamped by the web processes, whose clocks may run ahead
+    CLOCK_SKEW = timedelta(seconds=5)
+    BUILD_CHUNK_SIZE = 10000
+
+    def __init__(self,
+                 false_positive_rate: float = 0.01,
+                 rebuild_interval: float = 3600,
+                 catch_up_interval: float = 1.0):
+        self.false_positive_rate = false_positive_rate
+        self.rebuild_interval = rebuild_interval
+        self.catch_up_interval = catch_up_interval
+        self._lock = threading.Lock()
+        self._bits = None
+        self._size = 0
+        self._hash_count = 0
+        self._capacity = 0
+        self._count = 0
+        self._high_water_id = 0
+        self._built_at = None
+        self._caught_up_at = 0.0
+        self._synced_at = None
+        self._lookups = 0
+        self._rejections = 0
+
+    def build(self) -> None:
+        """Stream every courier_external_id in chunks and replace the filter."""
+        started_at = time.monotonic()
+        synced_at = timezone.now()
+        # Sized from a count so the ids never have to be held in memory at once;
+        # shipments created meanwhile fit in the headroom _allocate leaves
+        expected = Shipment.objects.count()
+        rows = Shipment.objects.order_by().values_list('id', 'courier_external_id').iterator(chunk_size=self.BUILD_CHUNK_SIZE)
+
+        with self._lock:
+            self._allocate(expected)
+            for shipment_id, courier_external_id in rows:
+                self._add(courier_external_id)
+                self._high_water_id = max(self._high_water_id, shipment_id)
+            self._built_at = time.monotonic()
+            self._caught_up_at = self._built_at
+            self._synced_at = synced_at
+
+        logger.info(f"TrackingNumberFilter: Built filter with {self._count} tracking numbers in {round(self._built_at - started_at, 3)}s")
+
+    def refresh(self) -> None:
+        """Build, rebuild or catch up the filter when due; meant for the worker loop, not for lookups."""
+        if self._bits is None or time.monotonic() - self._built_at > self.rebuild_interval or self._count > self._capacity:
+            self.build()
+        elif time.monotonic() - self._caught_up_at >= self.catch_up_interval:
+            self._catch_up()
+
+    def might_contain(self, courier_external_id: str, received_at: Optional[datetime] = None) -> bool:
+        """False only if the tracking number is unknown and was received before the last sync; never queries."""
+        if self._bits is None:
+            return True
+
+        self._lookups += 1
+        if self._contains(courier_external_id):
+            return True
+
+        if (received_at or timezone.now()) >= self._synced_at - self.CLOCK_SKEW:
+            return True
+
+        self._rejections += 1
+        return False
+
+    def filter_known(self, tracking_numbers: Iterable[Tuple[str, Optional[datetime]]]) -> set:
+        """Tracking numbers of (tracking_number, received_at) pairs that might be ours."""
+        return {
+            courier_external_id
+            for courier_external_id, received_at in tracking_numbers
+            if self.might_contain(courier_external_id, received_at)
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'count': self._count,
+            'capacity': self._capacity,
+            'size_bits': self._size,
+            'hash_count': self._hash_count,
+            'memory_bytes': len(self._bits) if self._bits is not None else 0,
+            'false_positive_rate': round(self._estimated_false_positive_rate(), 6),
+            'lookups': self._lookups,
+            'rejections': self._rejections,
+            'age_seconds': round(time.monotonic() - self._built_at, 1) if self._built_at else None
+        }
+
+    def _catch_up(self) -> None:
+        synced_at = timezone.now()
+        rows = list(
+            Shipment.objects.filter(id__gt=self._high_water_id - self.CATCH_UP_OVERLAP_IDS).order_by().values_list('id', 'courier_external_id')
+        )
+        with self._lock:
+            count_before = self._count
+            for shipment_id, courier_external_id in rows:
+                self._add(courier_external_id)
+                self._high_water_id = max(self._high_water_id, shipment_id)
+            self._caught_up_at = time.monotonic()
+            self._synced_at = synced_at
+            added = self._count - count_before
+        if added:
+            logger.info(f"TrackingNumberFilter: Caught up with {added} new tracking numbers")
+
+    def _allocate(self, count: int) -> None:
+        # Leave headroom so the filter keeps its false-positive target until the next rebuild
+        capacity = max(count * 2, self.MIN_CAPACITY)
+        size = int(math.ceil(-capacity * math.log(self.false_positive_rate) / (math.log(2) ** 2)))
+        self._size = size
+        self._hash_count = max(1, int(round(size / capacity * math.log(2))))
+        self._capacity = capacity
+        self._count = 0
+        self._high_water_id = 0
+        self._bits = bytearray((size + 7) // 8)
+
+    def _positions(self, courier_external_id: str):
+        digest = hashlib.blake2b(courier_external_id.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self._size for i in range(self._hash_count))
+
+    def _add(self, courier_external_id: str) -> None:
+        if self._contains(courier_external_id):
+            return
+        for position in self._positions(courier_external_id):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self._count += 1
+
+    def _contains(self, courier_external_id: str) -> bool:
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(courier_external_id))
+
+    def _estimated_false_positive_rate(self) -> float:
+        if not self._size:
+            return 0.0
+        return (1 - math.exp(-self._hash_count * self._count / self._size)) ** self._hash_count
+
+
+# Global filter instance shared by webhook processing in this process
+tracking_number_filter = TrackingNumberFilter()
@@ -0,0 +1,130 @@
+import logging
+import zlib
+from datetime import timedelta
+from typing import Any, Dict, List, Optional
+from django.db import transaction
+from django.utils import timezone
+from ...models import WebhookInboxEntry
+from ...repositories.repository_factory import repositories
+from .dhl_webhook_parser import DHLWebhookData, DHLWebhookParser
+from .dhl_webhook_processor import DHLWebhookProcessor
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookInboxProcessor:
+    """
+    Drains DHL webhook payloads from the inbox in batches.
+
+    Entries are spread over `lanes` by a hash of their tracking number. Each
+    processor drains one lane, so events of one parcel are applied serially, in
+    carrier event time order, while different lanes run in parallel. Entries
+    that cannot be parsed fail for good; other failures, such as a webhook
+    racing the creation of its shipment, are retried with exponential backoff.
+    The attempt is recorded even when applying the batch raises, so a batch
+    that keeps failing is given up on instead of being retried forever.
+    """
+
+    COURIER = 'dhl'
+    MAX_ATTEMPTS = 5
+    RETRY_BASE_DELAY = timedelta(seconds=30)
+    TERMINAL_ERROR_CODES = ('PARSE_ERROR',)
+
+    def __init__(self, processor: DHLWebhookProcessor = None, lane: int = 0, lanes: int = 1):
+        if not 0 <= lane < lanes:
+            raise ValueError(f"Lane {lane} is outside 0..{lanes - 1}")
+        self._processor = processor or DHLWebhookProcessor()
+        self._webhook_inbox_repo = repositories.webhook_inbox
+        self.lane = lane
+        self.lanes = lanes
+
+    @staticmethod
+    def lane_hash(tracking_number: Optional[str]) -> int:
+        """Stable across processes, unlike hash()."""
+        return zlib.crc32(str(tracking_number or '').encode('utf-8'))
+
+    def process_batch(self, batch_size: int = 100) -> Dict[str, Any]:
+        results = {
+            'total': 0,
+            'processed': 0,
+            'ignored': 0,
+            'retried': 0,
+            'failed': 0,
+            'lane_busy': False
+        }
+
+        with transaction.atomic():
+            if not self._webhook_inbox_repo.try_lock_lane(self.COURIER, self.lane):
+                logger.warning(f"WebhookInboxProcessor: Lane {self.lane} is held by another worker")
+                results['lane_busy'] = True
+                return results
+
+            entries = self._webhook_inbox_repo.claim_pending(self.COURIER, batch_size, self.lane, self.lanes)
+            if not entries:
+                return results
+
+            parsed_entries = []
+            for entry in entries:
+                entry.attempts += 1
+                webhook_data = DHLWebhookParser.parse(entry.payload, received_at=entry.received_at)
+                if webhook_data:
+                    parsed_entries.append((entry, webhook_data))
+                else:
+                    entry.status = 'failed'
+                    entry.result = {
+                        'success': False,
+                        'message': 'Failed to parse webhook data',
+                        'error_code': 'PARSE_ERROR'
+                    }
+
+            # Apply each parcel's events in carrier order; arrival order breaks ties
+            parsed_entries.sort(key=lambda parsed: (parsed[1].event_time, parsed[0].id))
+            outcomes = self._apply([webhook_data for _, webhook_data in parsed_entries])
+            for (entry, _), outcome in zip(parsed_entries, outcomes):
+                entry.result = outcome
+                entry.next_attempt_at = None
+                if not outcome['success']:
+                    self._retry_or_fail(entry)
+                elif outcome.get('status') in ('duplicate_ignored', 'cancelled_ignored'):
+                    entry.status = 'ignored'
+                else:
+                    entry.status = 'processed'
+
+            self._webhook_inbox_repo.mark_processed(entries)
+
+        for entry in entries:
+            results['total'] += 1
+            results['retried' if entry.status == 'pending' else entry.status] += 1
+            if entry.status == 'failed':
+                logger.warning(f"WebhookInboxProcessor: Entry {entry.id} failed: {entry.result.get('message')}")
+
+        logger.info(f"WebhookInboxProcessor: Processed batch of {results['total']} entries - processed={results['processed']}, ignored={results['ignored']}, retried={results['retried']}, failed={results['failed']}")
+        return results
+
+    def _apply(self, webhooks: List[DHLWebhookData]) -> List[Dict[str, Any]]:
+        """
+        Apply the batch in a savepoint, so its writes roll back on an error while
+        the attempts and retry schedule of the claimed entries are still saved.
+        """
+        try:
+            with transaction.atomic():
+                return self._processor.process_webhooks(webhooks)
+        except Exception as e:
+            logger.exception(f"WebhookInboxProcessor: Batch of {len(webhooks)} webhooks failed: {e}")
+            return [
+                {
+                    'success': False,
+                    'message': f'Error processing webhook: {str(e)}',
+                    'error_code': 'PROCESSING_ERROR'
+                }
+                for _ in webhooks
+            ]
+
+    def _retry_or_fail(self, entry: WebhookInboxEntry) -> None:
+        if entry.result.get('error_code') in self.TERMINAL_ERROR_CODES or entry.attempts >= self.MAX_ATTEMPTS:
+            entry.status = 'failed'
+            return
+        delay = self.RETRY_BASE_DELAY * (2 ** (entry.attempts - 1))
+        logger.warning(f"WebhookInboxProcessor: Retrying entry {entry.id} in {delay}: {entry.result.get('message')}")
+        entry.status = 'pending'
+        entry.next_attempt_at = timezone.now() + delay
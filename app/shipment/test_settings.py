@@ -2,6 +2,7 @@
 Test settings for shipment app tests
 """
 import os
+import tempfile
 from app.settings import *
 
 DATABASES = {
@@ -38,3 +39,14 @@ DEBUG = False
 ALLOWED_HOSTS = ['testserver']
 
 DHL_WEBHOOK_API_KEY = 'test-webhook-key'
+
+LABEL_STORE_DIR = tempfile.mkdtemp(prefix='label-store-')
+
+# Tests run in one process, so a process-local tracking cache is shared by every writer
+CACHES = {
+    **CACHES,
+    'tracking': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tracking',
+    },
+}
@@ -1,8 +1,41 @@
+import gzip
+import importlib
 import json
-from django.test import TestCase, Client
+import os
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+from io import BytesIO, StringIO
+from unittest import skipUnless
+from django.core.cache.backends.db import DatabaseCache
+from django.core.management import call_command
+from django.db import OperationalError, connection
+from django.http import HttpResponse
+from django.test import TestCase, TransactionTestCase, Client, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
+from pypdf import PdfReader, PdfWriter
+from core.db_routing import PrimaryStickinessMiddleware, ReadReplicaRouter, derived_writes, read_from_replica, replica_health, replica_reads
 from core.models import Courier, CourierConfig, ShipmentType, Route, CourierRoute, CourierShipmentType
-from .models import Shipment, Shipper, Consignee, ShipmentRequest, ShipmentLabel, ShipmentStatus
+from .models import (
+    Shipment, Shipper, Consignee, ShipmentRequest, ShipmentLabel, ShipmentStatus, ShipmentStatusMarker,
+    WebhookInboxEntry, LabelPrefetchTask, CancellationQueueEntry
+)
+from .services.cancellation import CancellationQueueProcessor, CancellationQueueService
+from .services.couriers.cancellable_courier_interface import CancellableCourierInterface
+from .services.requests.request_importer import ShipmentRequestImporter
+from .services.status.shipment_status_service import ShipmentStatusService
+from .services.status.status_partition_service import StatusPartitionService
+from .services.tracking.tracking_cache_service import TrackingCacheService
+from .repositories.repository_factory import repositories
+from .repositories.cancellation_queue_repository import CancellationQueueRepository
+from .repositories.shipment_request_repository import ShipmentRequestRepository
+from .repositories.shipment_status_repository import ShipmentStatusRepository
+from .schemas.label_response import LabelResponse
+from .services.labels import CourierRateLimiter, LabelBlobStore, LabelCacheService, LabelPrefetchService, LabelRefreshService, ShipmentLabelService, SingleFlight, label_blob_store
+from .services.webhooks import DHLWebhookParser, DHLWebhookProcessor, TrackingNumberFilter, WebhookInboxProcessor
 
 
 class ShipmentAPITestCase(TestCase):
@@ -91,7 +124,7 @@ class ShipmentAPITestCase(TestCase):
             is_active=True
         )
         
-        self.shipment_status = ShipmentStatus.objects.create(
+        self.shipment_status = ShipmentStatusService.create_status(
             shipment=self.shipment,
             status="created",
             address="123 Main Street, Al Olaya, Berlin",
@@ -193,6 +226,69 @@ class ShipmentAPITestCase(TestCase):
         response_data = json.loads(response.content)
         self.assertIn('success', response_data)
 
+    def test_bulk_cancellation_is_queued_and_batched_per_courier(self):
+        response = self.client.post(
+            reverse('cancel_shipments_bulk'),
+            {'reference_numbers': ['REF123437', 'REF-UNKNOWN']},
+            content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 202)
+        job = response.json()['data']
+        self.assertEqual((job['total'], job['queued']), (2, 1))
+        self.assertEqual(job['rejected'][0]['error_code'], 'SHIPMENT_NOT_FOUND')
+        
+        calls = []
+        
+        class StubCourier(CancellableCourierInterface):
+            def cancel_shipment(self, courier_external_id):
+                raise AssertionError('expected a batched call')
+            
+            def cancel_shipments(self, courier_external_ids):
+                calls.append(list(courier_external_ids))
+                success = len(calls) > 1
+                return {
+                    courier_external_id: {'success': success, 'message': 'DHL unavailable', 'retryable': True}
+                    for courier_external_id in courier_external_ids
+                }
+        
+        class StubCourierFactory:
+            def get_courier_instance(self, courier_name, courier_obj=None):
+                return StubCourier()
+        
+        processor = CancellationQueueProcessor(courier_factory_instance=StubCourierFactory())
+        self.assertEqual(processor.process_batch()['retried'], 1)
+        self.assertEqual(processor.process_batch()['total'], 0)
+        
+        CancellationQueueEntry.objects.filter(status='pending').update(next_attempt_at=timezone.now())
+        self.assertEqual(processor.process_batch()['cancelled'], 1)
+        self.assertEqual(calls, [["0034043333301020017128697"]] * 2)
+        self.shipment.refresh_from_db()
+        self.assertEqual(self.shipment.current_status, 'cancelled')
+        
+        status_response = self.client.get(reverse('get_cancellation_job', kwargs={'job_id': job['job_id']}))
+        summary = status_response.json()['data']
+        self.assertTrue(summary['done'])
+        self.assertEqual((summary['cancelled'], summary['failed']), (1, 1))
+        self.assertEqual(self.client.get(reverse('get_cancellation_job', kwargs={'job_id': 999})).status_code, 404)
+
+    def test_bulk_cancellation_reports_entries_queued_by_a_concurrent_job(self):
+        service = CancellationQueueService()
+        job = service.enqueue(['REF123437', 'REF123437'])
+        self.assertEqual(job['queued'], 1)
+        self.assertEqual(job['rejected'][0]['error_code'], 'CANCELLATION_ALREADY_QUEUED')
+        
+        class RacingRepository(CancellationQueueRepository):
+            def get_open_shipment_ids(self, shipment_ids=None, job_id=None):
+                # The concurrent job commits after this job's up-front check
+                return set() if job_id is None else super().get_open_shipment_ids(shipment_ids, job_id)
+        
+        service._cancellation_queue_repo = RacingRepository()
+        job = service.enqueue(['REF123437'])
+        self.assertEqual((job['total'], job['queued']), (1, 0))
+        self.assertEqual(job['rejected'][0]['error_code'], 'CANCELLATION_ALREADY_QUEUED')
+        summary = service.get_job(job['job_id'])
+        self.assertEqual((summary['total'], summary['failed'], summary['pending']), (1, 1, 0))
+
     def test_cancel_shipment_not_found(self):
         url = reverse('cancel_shipment', kwargs={'reference_number': 'NONEXISTENT'})
         response = self.client.post(url)
@@ -380,3 +476,1063 @@ class ShipmentAPITestCase(TestCase):
         
         self.assertEqual(status.status, "created")
         self.assertEqual(status.country, "DEU")
+
+    def test_import_shipment_requests_command(self):
+        valid_record = {
+            "shipment_type_id": self.shipment_type.id,
+            "reference_number": "IMPORT001",
+            "shipper_id": self.shipper.id,
+            "consignee_id": self.consignee.id,
+            "weight": 1.5,
+            "dimensions": {"length": 50, "width": 30, "height": 20}
+        }
+        lines = [
+            json.dumps(valid_record),
+            json.dumps({**valid_record, "reference_number": "IMPORT002"}),
+            "not json",
+            json.dumps({"reference_number": "IMPORT003"}),
+            json.dumps({**valid_record, "reference_number": "REF123437"}),
+        ]
+        
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson', delete=False) as ndjson_file:
+            ndjson_file.write('\n'.join(lines))
+        
+        try:
+            out = StringIO()
+            call_command('import_shipment_requests', ndjson_file.name, '--chunk-size', '1', stdout=out)
+        finally:
+            os.unlink(ndjson_file.name)
+        
+        output = out.getvalue()
+        self.assertIn('Imported: 2', output)
+        self.assertIn('Skipped: 1', output)
+        self.assertIn('Failed: 2', output)
+        self.assertIn('Line 3', output)
+        self.assertEqual(
+            ShipmentRequest.objects.filter(reference_number__startswith='IMPORT', status='pending').count(),
+            2
+        )
+
+    def test_import_resolves_parties_and_active_references_per_chunk(self):
+        ShipmentRequest.objects.create(request_body={}, reference_number='IMPORT_ACTIVE', status='pending')
+        inline_shipper = {
+            "name": "Jane Roe", "address": "1 Berliner Strasse", "postal_code": "10115",
+            "city": "Berlin", "country": "DEU", "phone": "+49301234567", "email": "jane.roe@example.com"
+        }
+        base_record = {
+            "shipment_type_id": self.shipment_type.id,
+            "shipper": inline_shipper,
+            "consignee_id": self.consignee.id,
+            "weight": 1.5,
+            "dimensions": {"length": 50, "width": 30, "height": 20}
+        }
+        lines = [
+            json.dumps({**base_record, "reference_number": reference_number})
+            for reference_number in ('IMPORT_A', 'IMPORT_B', 'IMPORT_ACTIVE')
+        ]
+        
+        results = ShipmentRequestImporter(chunk_size=10).import_lines(lines)
+        
+        self.assertEqual((results['imported'], results['skipped'], results['failed']), (2, 1, 0))
+        self.assertEqual(Shipper.objects.filter(email='jane.roe@example.com').count(), 1)
+        shipper_id = Shipper.objects.get(email='jane.roe@example.com').id
+        self.assertEqual(
+            {request.request_body['shipper_id'] for request in ShipmentRequest.objects.filter(reference_number__in=['IMPORT_A', 'IMPORT_B'])},
+            {shipper_id}
+        )
+
+    def test_import_skips_references_inserted_concurrently(self):
+        class RacingRepository(ShipmentRequestRepository):
+            raced = False
+            
+            def get_active_reference_numbers(self, reference_numbers):
+                if not self.raced:
+                    # The first check misses a request another writer commits before the insert
+                    self.raced = True
+                    return set()
+                return super().get_active_reference_numbers(reference_numbers)
+        
+        ShipmentRequest.objects.create(request_body={}, reference_number='IMPORT_RACED', status='pending')
+        
+        lines = [
+            json.dumps({
+                "shipment_type_id": self.shipment_type.id,
+                "reference_number": reference_number,
+                "shipper_id": self.shipper.id,
+                "consignee_id": self.consignee.id,
+                "weight": 1.5,
+                "dimensions": {"length": 50, "width": 30, "height": 20}
+            })
+            for reference_number in ('IMPORT_C', 'IMPORT_RACED')
+        ]
+        importer = ShipmentRequestImporter(chunk_size=10)
+        importer._shipment_request_repo = RacingRepository()
+        results = importer.import_lines(lines)
+        
+        self.assertEqual((results['imported'], results['skipped'], results['failed']), (1, 1, 0))
+        self.assertEqual(ShipmentRequest.objects.filter(reference_number='IMPORT_RACED').count(), 1)
+        self.assertTrue(ShipmentRequest.objects.filter(reference_number='IMPORT_C').exists())
+
+    def test_create_shipment_request_idempotency(self):
+        url = reverse('create_shipment_request')
+        data = {
+            "shipment_type_id": self.shipment_type.id,
+            "reference_number": "IDEMPOTENT001",
+            "shipper_id": self.shipper.id,
+            "consignee_id": self.consignee.id,
+            "weight": 1.5,
+            "dimensions": {"length": 50, "width": 30, "height": 20}
+        }
+        
+        first = self.client.post(url, data=json.dumps(data), content_type='application/json', HTTP_IDEMPOTENCY_KEY='key-1')
+        replay = self.client.post(url, data=json.dumps(data), content_type='application/json', HTTP_IDEMPOTENCY_KEY='key-1')
+        duplicate = self.client.post(url, data=json.dumps(data), content_type='application/json', HTTP_IDEMPOTENCY_KEY='key-2')
+        
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual(replay.status_code, 200)
+        self.assertEqual(duplicate.status_code, 200)
+        request_id = json.loads(first.content)['data']['id']
+        self.assertEqual(json.loads(replay.content)['data']['id'], request_id)
+        self.assertEqual(json.loads(duplicate.content)['data']['id'], request_id)
+        self.assertIn('already under process', json.loads(duplicate.content)['message'])
+        self.assertEqual(ShipmentRequest.objects.filter(reference_number='IDEMPOTENT001').count(), 1)
+
+    def test_track_shipments_batch(self):
+        url = reverse('track_shipments_batch')
+        data = {"reference_numbers": ["REF123437", "NONEXISTENT", "REF123437"]}
+        
+        with self.assertNumQueries(1):
+            response = self.client.post(url, data=json.dumps(data), content_type='application/json')
+        
+        self.assertEqual(response.status_code, 200)
+        results = json.loads(response.content)['data']['results']
+        self.assertEqual([result['reference_number'] for result in results], ["REF123437", "NONEXISTENT"])
+        self.assertTrue(results[0]['success'])
+        self.assertEqual(results[0]['current_status'], 'created')
+        self.assertEqual(results[0]['origin']['city'], 'Berlin')
+        self.assertEqual(results[1]['error_code'], 'SHIPMENT_NOT_FOUND')
+
+    def test_track_shipments_batch_validation_error(self):
+        url = reverse('track_shipments_batch')
+        response = self.client.post(url, data=json.dumps({"reference_numbers": []}), content_type='application/json')
+        
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(json.loads(response.content)['success'])
+
+    def test_create_status_syncs_current_status(self):
+        self.assertEqual(self.shipment.current_status, 'created')
+        
+        ShipmentStatusService.create_status(shipment=self.shipment, status='in_transit')
+        
+        self.shipment.refresh_from_db()
+        self.assertEqual(self.shipment.current_status, 'in_transit')
+        self.assertIsNotNone(self.shipment.current_status_at)
+        self.assertEqual(list(Shipment.objects.filter(current_status='in_transit')), [self.shipment])
+
+    def test_create_status_compares_against_locked_current_status(self):
+        stale = Shipment.objects.get(id=self.shipment.id)
+        # A carrier event whose clock runs ahead of ours, written after stale was loaded
+        skewed_at = timezone.now() + timedelta(minutes=10)
+        ShipmentStatusService.create_status(shipment=self.shipment, status='out_for_delivery', created_at=skewed_at)
+        
+        ShipmentStatusService.create_status(shipment=stale, status='in_transit', created_at=timezone.now())
+        self.shipment.refresh_from_db()
+        self.assertEqual((self.shipment.current_status, self.shipment.current_status_at), ('out_for_delivery', skewed_at))
+        
+        cancelled = ShipmentStatusService.create_status(shipment=stale, status='cancelled')
+        self.shipment.refresh_from_db()
+        self.assertEqual(self.shipment.current_status, 'cancelled')
+        self.assertEqual(cancelled.created_at, skewed_at)
+        self.assertEqual(self.shipment.tracking_projection['current_status'], 'cancelled')
+
+    def test_repository_update_writes_only_given_fields(self):
+        request = ShipmentRequest.objects.create(request_body={}, reference_number='REF_PARTIAL', status='pending')
+        updated_at = request.updated_at
+        
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(repositories.shipment_request.mark_as_completed(request.id))
+        self.assertEqual(len(queries), 1)
+        self.assertTrue(queries[0]['sql'].startswith('UPDATE'))
+        self.assertNotIn('request_body', queries[0]['sql'])
+        
+        processing = repositories.shipment_request.mark_as_processing(request.id)
+        self.assertEqual((processing.status, processing.retries), ('processing', 1))
+        self.assertGreater(processing.updated_at, updated_at)
+        self.assertFalse(repositories.shipment_request.mark_as_completed(0))
+        
+        processing.failed_reason = 'courier timeout'
+        with CaptureQueriesContext(connection) as queries:
+            repositories.shipment_request.save(processing, update_fields=['failed_reason'])
+        self.assertIn('updated_at', queries[0]['sql'])
+        self.assertNotIn('retries', queries[0]['sql'])
+
+    def test_repository_iterators_stream_projections(self):
+        old = timezone.now() - timedelta(days=10)
+        ShipmentRequest.objects.bulk_create([
+            ShipmentRequest(request_body={'n': i}, reference_number=f'REF_OLD_{i}', status='failed')
+            for i in range(5)
+        ])
+        ShipmentRequest.objects.filter(reference_number__startswith='REF_OLD_').update(created_at=old)
+        
+        references = repositories.shipment_request.iter_old_failed_requests(
+            values_list=['reference_number'], flat=True, chunk_size=2
+        )
+        self.assertNotIsInstance(references, list)
+        self.assertEqual(sorted(references), [f'REF_OLD_{i}' for i in range(5)])
+        
+        labels = list(repositories.shipment_label.iter_active_labels(only=['id', 'url']))
+        self.assertEqual([label.id for label in labels], [self.shipment_label.id])
+        self.assertEqual(labels[0].get_deferred_fields() & {'url', 'id'}, set())
+        self.assertIn('format', labels[0].get_deferred_fields())
+        
+        self.assertEqual(list(repositories.shipment.iter_all(values_list=['id'], flat=True)), [self.shipment.id])
+        with self.assertRaises(ValueError):
+            repositories.shipment.iter_all(values_list=['id'], only=['id'])
+
+    def test_shipment_lookup_joins_relation_profile(self):
+        with self.assertNumQueries(1):
+            shipment = repositories.shipment.get_by_reference_number('REF123437', 'with_all')
+            self.assertEqual(
+                (shipment.courier.name, shipment.shipper.id, shipment.consignee.id),
+                ('DHL', self.shipper.id, self.consignee.id)
+            )
+        
+        with self.assertNumQueries(2):
+            shipment = repositories.shipment.get_by_reference_number('REF123437', 'with_courier')
+            shipment.courier.name
+            shipment.shipper.id
+        
+        with self.assertRaises(ValueError):
+            repositories.shipment.get_by_reference_number('REF123437', 'with_everything')
+
+    def test_status_partition_months_and_retention(self):
+        self.assertEqual(StatusPartitionService.add_months(date(2025, 11, 1), 3), date(2026, 2, 1))
+        self.assertEqual(StatusPartitionService.add_months(date(2025, 1, 1), -1), date(2024, 12, 1))
+        self.assertEqual(StatusPartitionService.parse_partition_month('shipment_statuses_p2025_03'), date(2025, 3, 1))
+        self.assertIsNone(StatusPartitionService.parse_partition_month('shipment_statuses_default'))
+        self.assertIsNone(StatusPartitionService.parse_partition_month('shipment_statuses_p2025_3'))
+        
+        class StubPartitionService(StatusPartitionService):
+            partitions = ['shipment_statuses_p2024_12', 'shipment_statuses_p2025_01', 'shipment_statuses_p2025_02']
+            created = []
+            
+            @classmethod
+            def current_month(cls):
+                return date(2025, 2, 1)
+            
+            @classmethod
+            def list_partitions(cls):
+                return sorted(cls.partitions)
+            
+            @classmethod
+            def list_detached_partitions(cls):
+                return ['shipment_statuses_p2024_10']
+            
+            @classmethod
+            def _create_and_attach(cls, name, start, end):
+                cls.created.append((name, start, end))
+                cls.partitions.append(name)
+                return 0
+        
+        self.assertEqual(StubPartitionService.partitions_older_than(1), ['shipment_statuses_p2024_10', 'shipment_statuses_p2024_12'])
+        self.assertEqual(StubPartitionService.partitions_older_than(2), ['shipment_statuses_p2024_10'])
+        self.assertEqual(StubPartitionService.partitions_older_than(4), [])
+        
+        self.assertEqual(
+            StubPartitionService.ensure_future_partitions(2),
+            ['shipment_statuses_p2025_03', 'shipment_statuses_p2025_04']
+        )
+        self.assertEqual(StubPartitionService.created[0], ('shipment_statuses_p2025_03', date(2025, 3, 1), date(2025, 4, 1)))
+        self.assertEqual(StubPartitionService.ensure_future_partitions(2), [])
+
+    def test_shipment_status_queries_use_composite_indexes(self):
+        statuses = ['created', 'picked_up', 'in_transit', 'out_for_delivery', 'exception']
+        ShipmentStatus.objects.bulk_create([
+            ShipmentStatus(shipment=self.shipment, status=statuses[i % len(statuses)], country="DEU")
+            for i in range(5000)
+        ])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+        latest_index, status_index = [index.name for index in ShipmentStatus._meta.indexes]
+        
+        latest_plan = ShipmentStatus.objects.filter(shipment=self.shipment).order_by('-created_at')[:1].explain()
+        self.assertIn(latest_index, latest_plan)
+        
+        exists_plan = ShipmentStatus.objects.filter(shipment=self.shipment, status='delivered').order_by()[:1].explain()
+        self.assertIn(status_index, exists_plan)
+
+    def test_track_shipment_serves_tracking_projection(self):
+        ShipmentStatusService.create_status(shipment=self.shipment, status='in_transit', country="FRA")
+        url = reverse('track_shipment', kwargs={'reference_number': 'REF123437'})
+        
+        # One query for the ETag validator, one for the shipment and its projection, without joins
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn('JOIN', queries[1]['sql'])
+        
+        data = json.loads(response.content)['data']
+        self.assertEqual(data['current_status'], 'in_transit')
+        self.assertEqual(data['current_location']['country'], 'FRA')
+        self.assertEqual([event['status'] for event in data['events']], ['created', 'in_transit'])
+        
+        Shipment.objects.filter(id=self.shipment.id).update(tracking_projection=None)
+        TrackingCacheService.invalidate('REF123437')
+        rebuilt = json.loads(self.client.get(url).content)['data']
+        self.assertEqual(rebuilt, data)
+        self.shipment.refresh_from_db()
+        self.assertIsNotNone(self.shipment.tracking_projection)
+
+    def test_conditional_get_returns_not_modified(self):
+        track_url = reverse('track_shipment', kwargs={'reference_number': 'REF123437'})
+        label_url = reverse('get_shipment_label', kwargs={'reference_number': 'REF123437'})
+        
+        # The tracking validator is served from the response cache
+        for url, expected_queries in ((track_url, 0), (label_url, 1)):
+            etag = self.client.get(url)['ETag']
+            with self.assertNumQueries(expected_queries):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 304)
+            self.assertEqual(response['ETag'], etag)
+        
+        stale_etag = self.client.get(track_url)['ETag']
+        ShipmentStatusService.create_status(shipment=self.shipment, status='in_transit')
+        response = self.client.get(track_url, HTTP_IF_NONE_MATCH=stale_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], stale_etag)
+
+    def test_track_shipment_cache_hit_and_invalidation(self):
+        url = reverse('track_shipment', kwargs={'reference_number': 'REF123437'})
+        first = self.client.get(url)
+        
+        with self.assertNumQueries(0):
+            cached = self.client.get(url)
+        self.assertEqual(json.loads(cached.content), json.loads(first.content))
+        self.assertEqual(cached['ETag'], first['ETag'])
+        
+        ShipmentStatusService.create_status(shipment=self.shipment, status='in_transit')
+        refreshed = json.loads(self.client.get(url).content)
+        self.assertEqual(refreshed['data']['current_status'], 'in_transit')
+
+    def test_dhl_webhook_queues_to_inbox(self):
+        url = reverse('dhl_webhook')
+        payloads = [
+            {"tracking_number": "0034043333301020017128697", "status": "in_transit", "location": {"countryCode": "FRA"}},
+            {"tracking_number": "0034043333301020017128697", "status": "in_transit"},
+            {"tracking_number": "UNKNOWN", "status": "delivered"},
+        ]
+        
+        for payload in payloads:
+            with self.assertNumQueries(1):
+                response = self.client.post(
+                    url,
+                    data=json.dumps(payload),
+                    content_type='application/json',
+                    HTTP_X_API_KEY='test-webhook-key'
+                )
+            self.assertEqual(response.status_code, 202)
+        self.assertFalse(ShipmentStatus.objects.filter(status='in_transit').exists())
+        
+        out = StringIO()
+        call_command('process_webhook_inbox', stdout=out)
+        
+        self.assertEqual(
+            list(WebhookInboxEntry.objects.values_list('status', flat=True)),
+            ['processed', 'ignored', 'pending']
+        )
+        self.shipment.refresh_from_db()
+        self.assertEqual(self.shipment.current_status, 'in_transit')
+        self.assertIn('Processed: 1', out.getvalue())
+        self.assertIn('Retried: 1', out.getvalue())
+        
+        # The unknown parcel is retried with backoff until it gives up
+        unknown = WebhookInboxEntry.objects.get(status='pending')
+        self.assertEqual(unknown.attempts, 1)
+        self.assertGreater(unknown.next_attempt_at, timezone.now())
+        self.assertEqual(WebhookInboxProcessor().process_batch()['total'], 0)
+        for _ in range(WebhookInboxProcessor.MAX_ATTEMPTS - 1):
+            WebhookInboxEntry.objects.filter(id=unknown.id).update(next_attempt_at=timezone.now())
+            WebhookInboxProcessor().process_batch()
+        unknown.refresh_from_db()
+        self.assertEqual((unknown.status, unknown.attempts), ('failed', WebhookInboxProcessor.MAX_ATTEMPTS))
+        self.assertEqual(unknown.result['error_code'], 'SHIPMENT_NOT_FOUND')
+
+    def test_dhl_webhook_accepts_event_batches(self):
+        url = reverse('dhl_webhook')
+        events = [
+            {"tracking_number": "0034043333301020017128697", "status": "in_transit"},
+            {"unexpected": "event"},
+            {"tracking_number": "0034043333301020017128697", "status": "delivered", "location": {"countryCode": "DEU"}},
+            {"tracking_number": "UNKNOWN", "status": "delivered"},
+        ]
+        
+        with self.assertNumQueries(1):
+            response = self.client.post(
+                url,
+                data=json.dumps(events),
+                content_type='application/json',
+                HTTP_X_API_KEY='test-webhook-key'
+            )
+        
+        self.assertEqual(response.status_code, 202)
+        data = json.loads(response.content)['data']
+        self.assertEqual((data['accepted'], data['rejected']), (3, 1))
+        self.assertEqual([result['success'] for result in data['results']], [True, False, True, True])
+        
+        call_command('process_webhook_inbox', stdout=StringIO())
+        
+        self.assertEqual(
+            list(WebhookInboxEntry.objects.values_list('status', flat=True)),
+            ['processed', 'processed', 'pending']
+        )
+        self.shipment.refresh_from_db()
+        self.assertEqual(self.shipment.current_status, 'delivered')
+        self.assertEqual(
+            [event['status'] for event in self.shipment.tracking_projection['events']],
+            ['created', 'in_transit', 'delivered']
+        )
+
+    def test_dhl_webhook_response_contract(self):
+        url = reverse('dhl_webhook')
+        
+        def post(payload):
+            return self.client.post(
+                url,
+                data=json.dumps(payload),
+                content_type='application/json',
+                HTTP_X_API_KEY='test-webhook-key'
+            )
+        
+        response = post({"tracking_number": "0034043333301020017128697", "status": "in_transit"})
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(response.content), {
+            'success': True,
+            'message': 'Webhook accepted for processing',
+            'data': {
+                'inbox_id': WebhookInboxEntry.objects.get().id,
+                'tracking_number': '0034043333301020017128697'
+            }
+        })
+        
+        self.assertEqual(json.loads(post({"trackingNumber": "X1", "status": "delivered"}).content)['error_code'], 'PARSE_ERROR')
+        self.assertEqual(json.loads(post({"tracking_number": "X1"}).content)['error_code'], 'INVALID_PAYLOAD')
+        self.assertEqual(json.loads(post({"tracking_number": "X1", "status": 5}).content)['error_code'], 'INVALID_PAYLOAD')
+        self.assertEqual(self.client.get(url).status_code, 405)
+
+    def test_webhook_inbox_lanes_apply_events_in_carrier_order(self):
+        url = reverse('dhl_webhook')
+        tracking_number = "0034043333301020017128697"
+        started_at = timezone.now()
+        
+        def post(status, minutes):
+            self.client.post(
+                url,
+                data=json.dumps({
+                    "tracking_number": tracking_number,
+                    "status": status,
+                    "timestamp": (started_at + timedelta(minutes=minutes)).isoformat()
+                }),
+                content_type='application/json',
+                HTTP_X_API_KEY='test-webhook-key'
+            )
+        
+        post('delivered', 30)
+        post('out_for_delivery', 20)
+        
+        lane = WebhookInboxProcessor.lane_hash(tracking_number) % 2
+        self.assertEqual(WebhookInboxProcessor(lane=1 - lane, lanes=2).process_batch()['total'], 0)
+        self.assertEqual(WebhookInboxProcessor(lane=lane, lanes=2).process_batch()['processed'], 2)
+        
+        # Reported after delivery but older, so it only joins the history
+        post('in_transit', 10)
+        WebhookInboxProcessor(lane=lane, lanes=2).process_batch()
+        
+        self.shipment.refresh_from_db()
+        self.assertEqual(self.shipment.current_status, 'delivered')
+        self.assertEqual(self.shipment.current_status_at, started_at + timedelta(minutes=30))
+        self.assertEqual(
+            list(ShipmentStatus.objects.filter(shipment=self.shipment).order_by('created_at').values_list('status', flat=True)),
+            ['created', 'in_transit', 'out_for_delivery', 'delivered']
+        )
+        self.assertEqual(
+            [event['status'] for event in self.shipment.tracking_projection['events']],
+            ['created', 'in_transit', 'out_for_delivery', 'delivered']
+        )
+        self.assertEqual(self.shipment.tracking_projection['current_status'], 'delivered')
+
+    def test_webhook_inbox_records_attempts_when_batch_raises(self):
+        class FailingProcessor(DHLWebhookProcessor):
+            def process_webhooks(self, webhooks):
+                super().process_webhooks(webhooks)
+                raise OperationalError('connection reset')
+        
+        class BusyLaneRepository(type(repositories.webhook_inbox)):
+            def try_lock_lane(self, courier, lane):
+                return False
+        
+        self.client.post(
+            reverse('dhl_webhook'),
+            data=json.dumps({"tracking_number": "0034043333301020017128697", "status": "in_transit"}),
+            content_type='application/json',
+            HTTP_X_API_KEY='test-webhook-key'
+        )
+        
+        busy = WebhookInboxProcessor()
+        busy._webhook_inbox_repo = BusyLaneRepository()
+        results = busy.process_batch()
+        self.assertTrue(results['lane_busy'])
+        self.assertEqual(results['total'], 0)
+        
+        results = WebhookInboxProcessor(processor=FailingProcessor()).process_batch()
+        self.assertEqual((results['retried'], results['lane_busy']), (1, False))
+        entry = WebhookInboxEntry.objects.get()
+        self.assertEqual((entry.status, entry.attempts), ('pending', 1))
+        self.assertEqual(entry.result['error_code'], 'PROCESSING_ERROR')
+        # The statuses written before the error were rolled back with the savepoint
+        self.shipment.refresh_from_db()
+        self.assertEqual(self.shipment.current_status, 'created')
+        self.assertFalse(ShipmentStatus.objects.filter(shipment=self.shipment, status='in_transit').exists())
+
+    def test_label_document_served_from_blob_store(self):
+        document = b'%PDF-1.4 label'
+        content_hash = label_blob_store.put(document)
+        self.assertEqual(label_blob_store.put(document), content_hash)
+        ShipmentLabel.objects.filter(id=self.shipment_label.id).update(content_hash=content_hash)
+        url = reverse('get_shipment_label', kwargs={'reference_number': 'REF123437'})
+        
+        inline = self.client.get(url, {'document': '1'})
+        self.assertEqual(inline.status_code, 200)
+        self.assertEqual(inline['Content-Type'], 'application/pdf')
+        self.assertTrue(inline['Content-Disposition'].startswith('inline'))
+        self.assertEqual(b''.join(inline.streaming_content), document)
+        
+        download = self.client.get(url, {'download': '1'})
+        self.assertEqual(download['Content-Disposition'], 'attachment; filename="REF123437.pdf"')
+        download.close()
+        
+        self.assertEqual(self.client.get(url)['Content-Type'], 'application/json')
+
+    def test_label_print_run_streams_one_merged_pdf(self):
+        writer = PdfWriter()
+        writer.add_blank_page(288, 432)
+        document = BytesIO()
+        writer.write(document)
+        ShipmentLabel.objects.filter(id=self.shipment_label.id).update(
+            content_hash=label_blob_store.put(document.getvalue())
+        )
+        url = reverse('print_label_run')
+        
+        with self.settings(LABEL_PRINT_RUN_WORKERS=1):
+            response = self.client.post(
+                url,
+                {'reference_numbers': ['REF123437', 'REF-UNKNOWN', 'REF123437']},
+                content_type='application/json'
+            )
+            merged = PdfReader(BytesIO(b''.join(response.streaming_content)), strict=True)
+        
+        self.assertEqual(response['Content-Type'], 'application/pdf')
+        self.assertEqual(len(merged.pages), 2)
+        self.assertEqual(merged.pages[0].mediabox.height, 432)
+        self.assertIn('REF-UNKNOWN: Shipment not found', merged.pages[1].extract_text())
+        self.assertEqual(self.client.post(url, {'reference_numbers': []}, content_type='application/json').status_code, 400)
+
+    def test_label_blob_store_evicts_least_recently_used(self):
+        with self.settings(LABEL_STORE_DIR=tempfile.mkdtemp(), LABEL_STORE_MAX_BYTES=25):
+            store = LabelBlobStore()
+            first = store.put(b'a' * 10)
+            second = store.put(b'b' * 10)
+            os.utime(store.path(second), (0, 0))
+            store.open(first).close()
+            third = store.put(b'c' * 10)
+            
+            self.assertTrue(store.exists(first))
+            self.assertFalse(store.exists(second))
+            self.assertTrue(store.exists(third))
+            self.assertEqual(store.stats()['bytes'], 20)
+
+    def test_label_blob_store_evicts_to_low_water_mark(self):
+        class CountingStore(LabelBlobStore):
+            scans = 0
+            
+            def _scan(self):
+                self.scans += 1
+                return super()._scan()
+        
+        with self.settings(LABEL_STORE_DIR=tempfile.mkdtemp(), LABEL_STORE_MAX_BYTES=100):
+            store = CountingStore()
+            for i in range(11):
+                store.put(bytes([i]) * 10)
+            self.assertEqual(store.stats()['bytes'], 90)
+            
+            scans = store.scans
+            store.put(b'x' * 10)
+            self.assertEqual(store.scans, scans)
+
+    def test_label_prefetch_caches_labels_of_new_shipments(self):
+        new_shipment = Shipment.objects.create(
+            courier=self.courier,
+            shipment_type=self.shipment_type,
+            courier_external_id="0034043333301020017128700",
+            reference_number="REF123500",
+            shipper=self.shipper,
+            route=self.route,
+            consignee=self.consignee,
+            height=20,
+            width=30,
+            length=50,
+            dimension_unit="mm",
+            weight=1.2,
+            weight_unit="kg"
+        )
+        fetched = []
+        
+        class StubCourierFactory:
+            def fetch_label(self, courier_name, courier_external_id):
+                fetched.append(courier_external_id)
+                return LabelResponse.create_success_response(
+                    id=0,
+                    reference_number=courier_external_id,
+                    url="https://api-sandbox.dhl.com/labels?token=new",
+                    format="PDF",
+                    is_active=True,
+                    created_at=timezone.now().isoformat()
+                )
+        
+        class StubDocumentService:
+            def store_document(self, label_id, url, content_hash=None):
+                return None
+        
+        repositories.label_prefetch.enqueue(self.shipment.id, 'dhl')
+        repositories.label_prefetch.enqueue(new_shipment.id, 'dhl')
+        repositories.label_prefetch.enqueue(new_shipment.id, 'dhl')
+        self.assertEqual(LabelPrefetchTask.objects.count(), 2)
+        
+        service = LabelPrefetchService(
+            label_service=ShipmentLabelService(
+                courier_factory_instance=StubCourierFactory(),
+                document_service=StubDocumentService()
+            ),
+            rate_limiter=CourierRateLimiter(0)
+        )
+        results = service.process_batch(10)
+        
+        self.assertEqual((results['total'], results['cached'], results['fetched']), (2, 1, 1))
+        self.assertEqual(fetched, ["0034043333301020017128700"])
+        self.assertTrue(ShipmentLabel.objects.filter(shipment=new_shipment, is_active=True).exists())
+        self.assertEqual(set(LabelPrefetchTask.objects.values_list('status', flat=True)), {'done'})
+        self.assertEqual(service.process_batch(10)['total'], 0)
+
+    def test_label_prefetch_backs_off_failed_fetches(self):
+        new_shipment = Shipment.objects.create(
+            courier=self.courier,
+            shipment_type=self.shipment_type,
+            courier_external_id="0034043333301020017128701",
+            reference_number="REF123501",
+            shipper=self.shipper,
+            route=self.route,
+            consignee=self.consignee,
+            height=20,
+            width=30,
+            length=50,
+            dimension_unit="mm",
+            weight=1.2,
+            weight_unit="kg"
+        )
+        
+        class StubCourierFactory:
+            def fetch_label(self, courier_name, courier_external_id):
+                return LabelResponse.create_error_response('Courier unavailable', 'COURIER_API_ERROR')
+        
+        repositories.label_prefetch.enqueue(new_shipment.id, 'dhl')
+        service = LabelPrefetchService(
+            label_service=ShipmentLabelService(courier_factory_instance=StubCourierFactory()),
+            rate_limiter=CourierRateLimiter(0)
+        )
+        
+        delays = []
+        for _ in range(LabelPrefetchService.MAX_ATTEMPTS - 1):
+            self.assertEqual(service.process_batch(10)['retried'], 1)
+            self.assertEqual(service.process_batch(10)['total'], 0)
+            task = LabelPrefetchTask.objects.get(shipment=new_shipment)
+            delays.append(round((task.next_attempt_at - task.processed_at).total_seconds() / 60))
+            LabelPrefetchTask.objects.filter(id=task.id).update(next_attempt_at=timezone.now())
+        
+        self.assertEqual(delays, [1, 2])
+        self.assertEqual(service.process_batch(10)['failed'], 1)
+        task = LabelPrefetchTask.objects.get(shipment=new_shipment)
+        self.assertEqual((task.status, task.attempts, task.next_attempt_at), ('failed', 3, None))
+
+    def test_expiring_labels_are_refreshed_in_batches(self):
+        self.courier_config.label_url_ttl_seconds = 3600
+        self.courier_config.save()
+        batches = []
+        
+        class StubCourierFactory:
+            def fetch_labels(self, courier_name, courier_external_ids):
+                batches.append(list(courier_external_ids))
+                return {
+                    courier_external_id: LabelResponse.from_dict({
+                        'success': True,
+                        'url': 'https://api-sandbox.dhl.com/labels?token=fresh',
+                        'format': 'PDF'
+                    })
+                    for courier_external_id in courier_external_ids
+                }
+        
+        class StubDocumentService:
+            def store_document(self, label_id, url, content_hash=None):
+                return None
+        
+        ShipmentLabel.objects.filter(id=self.shipment_label.id).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertIsNone(LabelCacheService().get_cached_label('REF123437'))
+        
+        ShipmentLabel.objects.filter(id=self.shipment_label.id).update(expires_at=timezone.now() + timedelta(minutes=5))
+        service = LabelRefreshService(courier_factory_instance=StubCourierFactory(), document_service=StubDocumentService())
+        self.assertEqual(service.refresh_expiring(lead_seconds=60)['total'], 0)
+        results = service.refresh_expiring(lead_seconds=600)
+        
+        self.assertEqual((results['total'], results['refreshed']), (1, 1))
+        self.assertEqual(batches, [["0034043333301020017128697"]])
+        cached = LabelCacheService().get_cached_label('REF123437')
+        self.assertEqual(cached.url, 'https://api-sandbox.dhl.com/labels?token=fresh')
+        self.assertGreater(cached.id, self.shipment_label.id)
+        self.assertAlmostEqual(
+            (ShipmentLabel.objects.get(id=cached.id).expires_at - timezone.now()).total_seconds(), 3600, delta=60
+        )
+
+    def test_failed_label_refreshes_are_recorded_and_skipped(self):
+        class StubCourierFactory:
+            def fetch_labels(self, courier_name, courier_external_ids):
+                return {}
+        
+        ShipmentLabel.objects.filter(id=self.shipment_label.id).update(expires_at=timezone.now() + timedelta(minutes=5))
+        service = LabelRefreshService(courier_factory_instance=StubCourierFactory())
+        
+        results = service.refresh_expiring(lead_seconds=600)
+        self.assertEqual((results['total'], results['failed']), (1, 1))
+        label = ShipmentLabel.objects.get(id=self.shipment_label.id)
+        self.assertEqual(label.refresh_attempts, 1)
+        self.assertIsNotNone(label.refresh_attempted_at)
+        self.assertEqual(service.refresh_expiring(lead_seconds=600)['total'], 0)
+        
+        for attempts in range(2, LabelRefreshService.MAX_ATTEMPTS + 1):
+            ShipmentLabel.objects.filter(id=self.shipment_label.id).update(
+                refresh_attempted_at=timezone.now() - LabelRefreshService.RETRY_DELAY
+            )
+            self.assertEqual(service.refresh_expiring(lead_seconds=600)['failed'], 1)
+            self.assertEqual(ShipmentLabel.objects.get(id=self.shipment_label.id).refresh_attempts, attempts)
+        
+        ShipmentLabel.objects.filter(id=self.shipment_label.id).update(
+            refresh_attempted_at=timezone.now() - LabelRefreshService.RETRY_DELAY
+        )
+        self.assertEqual(service.refresh_expiring(lead_seconds=600)['total'], 0)
+
+    def test_single_flight_shares_one_call_between_concurrent_callers(self):
+        flights = SingleFlight()
+        calls = []
+        release = threading.Event()
+        results = []
+        
+        def fetch():
+            calls.append(1)
+            release.wait(5)
+            return 'label'
+        
+        def request():
+            results.append(flights.run('REF123437', fetch))
+        
+        threads = [threading.Thread(target=request) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        deadline = time.monotonic() + 5
+        while flights.waiters('REF123437') < 4 and time.monotonic() < deadline:
+            threading.Event().wait(0.01)
+        waiters = flights.waiters('REF123437')
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        
+        self.assertEqual(waiters, 4, 'Callers did not all join the running call within 5 seconds')
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ['label'] * 5)
+        self.assertEqual(flights.in_flight(), 0)
+        self.assertEqual(flights.run('REF123437', fetch), 'label')
+        self.assertEqual(len(calls), 2)
+
+    def test_dhl_webhook_processor_applies_events_one_at_a_time_when_batch_fails(self):
+        class FailingStatusRepository(ShipmentStatusRepository):
+            def claim_markers(self, pairs):
+                pairs = list(pairs)
+                if len(pairs) > 1 or (self.shipment_id, 'delivered') in pairs:
+                    raise RuntimeError('insert failed')
+                return super().claim_markers(pairs)
+        
+        processor = DHLWebhookProcessor()
+        processor._status_repo = FailingStatusRepository()
+        processor._status_repo.shipment_id = self.shipment.id
+        results = processor.process_webhooks([
+            DHLWebhookParser.parse({"tracking_number": "0034043333301020017128697", "status": status})
+            for status in ('in_transit', 'delivered')
+        ])
+        
+        self.assertEqual(results[0]['mapped_status'], 'in_transit')
+        self.assertIsNotNone(results[0]['status_entry_id'])
+        self.assertEqual(results[1]['error_code'], 'PROCESSING_ERROR')
+        self.assertEqual(
+            list(ShipmentStatus.objects.filter(shipment=self.shipment).order_by('id').values_list('status', flat=True)),
+            ['created', 'in_transit']
+        )
+    
+    def test_dhl_webhook_processor_skips_shipments_cancelled_during_batch(self):
+        shipment_id = self.shipment.id
+        
+        class RacingProcessor(DHLWebhookProcessor):
+            # Runs after the batch loaded its shipments, before anything is written
+            def _map_dhl_status(self, dhl_status):
+                Shipment.objects.filter(id=shipment_id).update(current_status='cancelled')
+                return super()._map_dhl_status(dhl_status)
+        
+        webhook_data = DHLWebhookParser.parse({"tracking_number": "0034043333301020017128697", "status": "in_transit"})
+        self.assertEqual(RacingProcessor().process_webhooks([webhook_data])[0]['status'], 'cancelled_ignored')
+        self.assertEqual(RacingProcessor().process_webhook(webhook_data)['status'], 'cancelled_ignored')
+        self.assertFalse(ShipmentStatus.objects.filter(shipment=self.shipment, status='in_transit').exists())
+        self.assertFalse(ShipmentStatusMarker.objects.filter(shipment=self.shipment, status='in_transit').exists())
+    
+    def test_dhl_webhook_processor_deduplicates_with_markers(self):
+        processor = DHLWebhookProcessor()
+        
+        def process(status):
+            return processor.process_webhook(DHLWebhookParser.parse({
+                "tracking_number": "0034043333301020017128697",
+                "status": status
+            }))
+        
+        self.assertTrue(ShipmentStatusMarker.objects.filter(shipment=self.shipment, status='created').exists())
+        self.assertEqual(process('in_transit')['mapped_status'], 'in_transit')
+        self.assertEqual(process('in_transit')['status'], 'duplicate_ignored')
+        self.assertIsNotNone(process('exception')['status_entry_id'])
+        self.assertIsNotNone(process('exception')['status_entry_id'])
+        self.assertEqual(process('cancelled')['mapped_status'], 'cancelled')
+        self.assertEqual(process('delivered')['status'], 'cancelled_ignored')
+        self.assertEqual(
+            list(ShipmentStatus.objects.filter(shipment=self.shipment).order_by('id').values_list('status', flat=True)),
+            ['created', 'in_transit', 'exception', 'exception', 'cancelled']
+        )
+
+    def test_tracking_number_filter_rejects_unknown_numbers_without_queries(self):
+        tracking_filter = TrackingNumberFilter(catch_up_interval=0)
+        received_before_build = timezone.now() - timedelta(minutes=1)
+        with self.assertNumQueries(0):
+            self.assertTrue(tracking_filter.might_contain("UNKNOWN-TRACKING-NUMBER", received_before_build))
+        tracking_filter.refresh()
+        
+        with self.assertNumQueries(0):
+            self.assertTrue(tracking_filter.might_contain("0034043333301020017128697", received_before_build))
+            self.assertFalse(tracking_filter.might_contain("UNKNOWN-TRACKING-NUMBER", received_before_build))
+            # Received after the last sync, so its shipment may be newer than the filter
+            self.assertTrue(tracking_filter.might_contain("UNKNOWN-TRACKING-NUMBER", timezone.now()))
+        
+        Shipment.objects.create(
+            courier=self.courier,
+            shipment_type=self.shipment_type,
+            courier_external_id="CREATED-BY-ANOTHER-PROCESS",
+            reference_number="REF-FILTER-NEW",
+            shipper=self.shipper,
+            route=self.route,
+            consignee=self.consignee,
+            height=20,
+            width=30,
+            length=50,
+            dimension_unit="mm",
+            weight=1.2,
+            weight_unit="kg"
+        )
+        self.assertFalse(tracking_filter.might_contain("CREATED-BY-ANOTHER-PROCESS", received_before_build))
+        tracking_filter.refresh()
+        self.assertTrue(tracking_filter.might_contain("CREATED-BY-ANOTHER-PROCESS", received_before_build))
+        
+        stats = tracking_filter.stats()
+        self.assertEqual(stats['count'], 2)
+        self.assertEqual(stats['rejections'], 2)
+        self.assertGreater(stats['memory_bytes'], 0)
+        self.assertLess(stats['false_positive_rate'], 0.01)
+
+
+# The replica alias points at the primary, so routing decisions are visible
+# without a second database; outside a transaction the router is not bypassed.
+@override_settings(READ_REPLICA_ALIAS='default')
+class ReadReplicaRoutingTestCase(TransactionTestCase):
+    def test_replica_reads_stick_to_primary_after_a_write(self):
+        router = ReadReplicaRouter()
+        decisions = []
+        
+        def view(request):
+            decisions.append(router.db_for_read(Shipment))
+            with replica_reads():
+                decisions.append(router.db_for_read(Shipment))
+                decisions.append(router.db_for_write(Shipment))
+                decisions.append(router.db_for_read(Shipment))
+            return HttpResponse()
+        
+        middleware = PrimaryStickinessMiddleware(view)
+        response = middleware(RequestFactory().get('/'))
+        self.assertEqual(decisions, [None, 'default', 'default', None])
+        self.assertIn(PrimaryStickinessMiddleware.COOKIE_NAME, response.cookies)
+        
+        def read_view(request):
+            with replica_reads():
+                decisions.append(router.db_for_read(Shipment))
+            return HttpResponse()
+        
+        decisions.clear()
+        sticky_request = RequestFactory().get('/')
+        sticky_request.COOKIES = {k: v.value for k, v in response.cookies.items()}
+        PrimaryStickinessMiddleware(read_view)(sticky_request)
+        PrimaryStickinessMiddleware(read_view)(RequestFactory().get('/'))
+        with override_settings(READ_REPLICA_ALIAS='replica'):
+            PrimaryStickinessMiddleware(read_view)(RequestFactory().get('/'))
+        self.assertEqual(decisions, [None, 'default', None])
+
+    def test_read_is_retried_on_the_primary_when_the_replica_fails(self):
+        outcomes = []
+        
+        def failing_read():
+            list(Shipment.objects.all())
+            if not outcomes:
+                outcomes.append('replica')
+                raise OperationalError('server closed the connection unexpectedly')
+            outcomes.append('primary')
+            return ['row']
+        
+        def view(request):
+            self.assertEqual(read_from_replica(failing_read), ['row'])
+            self.assertIsNone(ReadReplicaRouter().db_for_read(Shipment))
+            with replica_reads():
+                self.assertIsNone(ReadReplicaRouter().db_for_read(Shipment))
+            return HttpResponse()
+        
+        self.addCleanup(replica_health._down_until.clear)
+        PrimaryStickinessMiddleware(view)(RequestFactory().get('/'))
+        self.assertEqual(outcomes, ['replica', 'primary'])
+        
+        def primary_read():
+            list(Shipment.objects.all())
+            raise OperationalError('primary down')
+        
+        def primary_view(request):
+            # Errors of reads that never reached the replica are not retried
+            ReadReplicaRouter().db_for_write(Shipment)
+            with self.assertRaises(OperationalError):
+                read_from_replica(primary_read)
+            return HttpResponse()
+        
+        replica_health._down_until.clear()
+        PrimaryStickinessMiddleware(primary_view)(RequestFactory().get('/'))
+
+    def test_cache_and_derived_writes_do_not_pin_reads(self):
+        router = ReadReplicaRouter()
+        reads = []
+        
+        def empty_read():
+            reads.append(router.db_for_read(Shipment))
+            return []
+        
+        def view(request):
+            with derived_writes():
+                router.db_for_write(Shipment)
+            router.db_for_write(DatabaseCache('tracking_cache', {}).cache_model_class)
+            self.assertEqual(read_from_replica(empty_read), [])
+            return HttpResponse()
+        
+        response = PrimaryStickinessMiddleware(view)(RequestFactory().get('/'))
+        self.assertNotIn(PrimaryStickinessMiddleware.COOKIE_NAME, response.cookies)
+        # The miss came from the replica, so it is read again from the primary
+        self.assertEqual(reads, ['default', None])
+        
+        def pinned_view(request):
+            router.db_for_write(Shipment)
+            self.assertEqual(read_from_replica(empty_read), [])
+            return HttpResponse()
+        
+        reads.clear()
+        response = PrimaryStickinessMiddleware(pinned_view)(RequestFactory().get('/'))
+        self.assertIn(PrimaryStickinessMiddleware.COOKIE_NAME, response.cookies)
+        # A miss read from the primary is not read again
+        self.assertEqual(reads, [None])
+
+
+@skipUnless(connection.vendor == 'postgresql', 'shipment_statuses partitioning requires PostgreSQL')
+class StatusPartitionTestCase(TransactionTestCase):
+    def setUp(self):
+        migration = importlib.import_module('shipment.migrations.0011_partition_shipment_statuses')
+        with connection.cursor() as cursor:
+            cursor.execute(migration.PARTITION_SQL)
+        self.addCleanup(self._unpartition, migration.UNPARTITION_SQL)
+        
+        courier = Courier.objects.create(name="DHL", is_active=True)
+        self.shipment = Shipment.objects.create(
+            courier=courier,
+            shipment_type=ShipmentType.objects.create(name="express"),
+            courier_external_id="0034043333301020017128697",
+            reference_number="REF-PARTITION",
+            shipper=Shipper.objects.create(
+                name="John Doe", address="123 Main Street", city="Berlin", country="DEU",
+                phone="+966501234567", email="john.doe@example.com", postal_code="12235"
+            ),
+            route=Route.objects.create(origin="Berlin", destination="Bonn"),
+            consignee=Consignee.objects.create(
+                name="Jane Smith", address="456 King Road", city="Bonn", country="DEU",
+                phone="+966509876543", email="jane.smith@example.com", postal_code="12345"
+            ),
+            height=20,
+            width=30,
+            length=50,
+            dimension_unit="mm",
+            weight=1.2,
+            weight_unit="kg"
+        )
+    
+    @staticmethod
+    def _unpartition(unpartition_sql):
+        # Back to the schema the test database was created with
+        with connection.cursor() as cursor:
+            cursor.execute(unpartition_sql)
+            for index in ('shipment_statuses_shipment_id_b550a119', 'shipment_st_shipmen_9c894a_idx',
+                          'shipment_st_status_ebbd5f_idx', 'shipment_st_created_f4d9c6_idx'):
+                cursor.execute(f'DROP INDEX {index}')
+            cursor.execute('CREATE INDEX shipment_st_shipmen_e9e013_idx ON shipment_statuses (shipment_id, created_at DESC)')
+            cursor.execute('CREATE INDEX shipment_st_shipmen_7cb55e_idx ON shipment_statuses (shipment_id, status)')
+    
+    def _count(self, table):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM "{table}"')
+            return cursor.fetchone()[0]
+    
+    def test_partitions_are_created_filled_from_default_and_archived(self):
+        self.assertEqual(StatusPartitionService.ensure_future_partitions(3), [])
+        
+        old_month = StatusPartitionService.add_months(StatusPartitionService.current_month(), -24)
+        name = StatusPartitionService.partition_name(old_month)
+        status = ShipmentStatus.objects.create(shipment=self.shipment, status='created')
+        ShipmentStatus.objects.filter(id=status.id).update(created_at=timezone.make_aware(datetime(old_month.year, old_month.month, 15)))
+        self.assertEqual(self._count(StatusPartitionService.DEFAULT_PARTITION), 1)
+        
+        self.assertTrue(StatusPartitionService.create_partition(old_month))
+        self.assertEqual((self._count(StatusPartitionService.DEFAULT_PARTITION), self._count(name)), (0, 1))
+        self.assertEqual(StatusPartitionService.partitions_older_than(12), [name])
+        
+        with tempfile.TemporaryDirectory() as output_dir:
+            path = StatusPartitionService.archive_partition(name, output_dir)
+            with gzip.open(path, 'rt', encoding='utf-8') as archive_file:
+                self.assertEqual(len(archive_file.read().splitlines()), 2)
+            self.assertNotIn(name, StatusPartitionService.list_partitions())
+            self.assertEqual(StatusPartitionService.partitions_older_than(12), [name])
+            
+            archived_at = os.path.getmtime(path)
+            self.assertEqual(StatusPartitionService.archive_partition(name, output_dir), path)
+            self.assertEqual(os.path.getmtime(path), archived_at)
+        
+        StatusPartitionService.drop_partition(name)
+        self.assertEqual(StatusPartitionService.partitions_older_than(12), [])
+        self.assertFalse(ShipmentStatus.objects.filter(id=status.id).exists())
@@ -8,12 +8,16 @@ urlpatterns = [
     
     # Shipment label endpoints
     path('shipment-labels/<str:reference_number>/', views.get_shipment_label, name='get_shipment_label'),
+    path('label-print-runs/', views.print_label_run, name='print_label_run'),
     
     # Shipment tracking endpoints
     path('shipments/<str:reference_number>/track/', views.track_shipment, name='track_shipment'),
+    path('shipments/track/', views.track_shipments_batch, name='track_shipments_batch'),
     
     # Shipment cancellation endpoints
     path('shipments/<str:reference_number>/cancel/', views.cancel_shipment, name='cancel_shipment'),
+    path('shipments/cancel/', views.cancel_shipments_bulk, name='cancel_shipments_bulk'),
+    path('shipments/cancellations/<int:job_id>/', views.get_cancellation_job, name='get_cancellation_job'),
     
     # Webhook endpoints
     path('webhooks/dhl/', webhook_views.dhl_webhook, name='dhl_webhook'),
@@ -1,11 +1,19 @@
+from django.http import StreamingHttpResponse
 from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
-from .serializers import ShipmentRequestCreateSerializer
+from .serializers import (
+    ShipmentRequestCreateSerializer,
+    BatchTrackingRequestSerializer,
+    BulkCancellationRequestSerializer,
+    LabelPrintRunRequestSerializer
+)
 from .services import ShipmentRequestService
 from .services.labels.shipment_label_service import ShipmentLabelService
 from .services.tracking.shipment_tracking_service import ShipmentTrackingService
-from .services.cancellation import ShipmentCancellationService
+from .services.tracking.tracking_cache_service import TrackingCacheService
+from .services.cancellation import ShipmentCancellationService, CancellationQueueService
+from .services.conditional import ETagService
 
 
 @api_view(['POST'])
@@ -23,8 +31,22 @@ def create_shipment_request(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
+    idempotency_key = request.headers.get('Idempotency-Key') or None
+    if idempotency_key and len(idempotency_key) > 255:
+        return Response(
+            {
+                'success': False,
+                'message': 'Validation failed',
+                'errors': {'Idempotency-Key': ['Ensure this header has no more than 255 characters.']}
+            },
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
     try:
-        result = ShipmentRequestService.create_shipment_request(serializer.validated_data)
+        result = ShipmentRequestService.create_shipment_request(
+            serializer.validated_data,
+            idempotency_key=idempotency_key
+        )
         
         return Response(
             result.to_dict(),
@@ -46,11 +68,30 @@ def create_shipment_request(request):
 def get_shipment_label(request, reference_number: str):
     try:
         from .services.labels.label_response_handler import LabelResponseHandler
+        from .services.labels.label_document_service import LabelDocumentService
+        
+        etag_service = ETagService()
+        etag = etag_service.label_etag(reference_number)
+        if etag_service.is_not_modified(request, etag):
+            return etag_service.not_modified_response(etag)
+        
+        # ?document=1 streams the stored label inline, ?download=1 as an attachment
+        download = request.query_params.get('download') == '1'
+        if download or request.query_params.get('document') == '1':
+            label, document, error = LabelDocumentService().get_document(reference_number)
+            if error:
+                return LabelResponseHandler.handle_result(error)
+            response = LabelResponseHandler.document_response(label, document, as_attachment=download)
+            response['ETag'] = etag_service.label_etag_for(label.id)
+            return response
         
         label_service = ShipmentLabelService()
         result = label_service.get_shipment_label_by_reference(reference_number)
         
-        return LabelResponseHandler.handle_result(result)
+        response = LabelResponseHandler.handle_result(result)
+        if result.success and result.id:
+            response['ETag'] = etag_service.label_etag_for(result.id)
+        return response
             
     except Exception as e:
         return Response(
@@ -63,15 +104,61 @@ def get_shipment_label(request, reference_number: str):
         )
 
 
+@api_view(['POST'])
+def print_label_run(request):
+    serializer = LabelPrintRunRequestSerializer(data=request.data)
+    
+    if not serializer.is_valid():
+        return Response(
+            {
+                'success': False,
+                'message': 'Validation failed',
+                'errors': serializer.errors
+            },
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    from .services.labels.label_print_run_service import LabelPrintRunService
+    
+    # Pages are streamed as labels become ready, in request order
+    response = StreamingHttpResponse(
+        LabelPrintRunService().stream(serializer.validated_data['reference_numbers']),
+        content_type='application/pdf'
+    )
+    response['Content-Disposition'] = 'attachment; filename="labels.pdf"'
+    return response
+
+
 @api_view(['GET'])
 def track_shipment(request, reference_number: str):
     try:
         from .services.tracking.tracking_response_handler import TrackingResponseHandler
         
+        etag_service = ETagService()
+        
+        cached = TrackingCacheService.get(reference_number)
+        if cached:
+            if etag_service.is_not_modified(request, cached['etag']):
+                return etag_service.not_modified_response(cached['etag'])
+            response = Response(cached['data'], status=status.HTTP_200_OK)
+            response['ETag'] = cached['etag']
+            return response
+        
+        generation = TrackingCacheService.get_generation(reference_number)
+        etag = etag_service.tracking_etag(reference_number)
+        if etag_service.is_not_modified(request, etag):
+            return etag_service.not_modified_response(etag)
+        
+        # The ETag and cache generation come from the primary, so the body must too;
+        # a lagging replica would otherwise cache a stale body under the new ETag
         tracking_service = ShipmentTrackingService()
-        result = tracking_service.track_shipment_by_reference(reference_number)
+        result = tracking_service.track_shipment_by_reference(reference_number, use_replica=False)
         
-        return TrackingResponseHandler.handle_result(result)
+        response = TrackingResponseHandler.handle_result(result)
+        if result.success and etag:
+            response['ETag'] = etag
+            TrackingCacheService.set(reference_number, generation, etag, response.data)
+        return response
             
     except Exception as e:
         return Response(
@@ -84,6 +171,39 @@ def track_shipment(request, reference_number: str):
         )
 
 
+@api_view(['POST'])
+def track_shipments_batch(request):
+    serializer = BatchTrackingRequestSerializer(data=request.data)
+    
+    if not serializer.is_valid():
+        return Response(
+            {
+                'success': False,
+                'message': 'Validation failed',
+                'errors': serializer.errors
+            },
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        from .services.tracking.tracking_response_handler import TrackingResponseHandler
+        
+        tracking_service = ShipmentTrackingService()
+        results = tracking_service.track_shipments_by_references(serializer.validated_data['reference_numbers'])
+        
+        return TrackingResponseHandler.handle_batch_result(results)
+    
+    except Exception as e:
+        return Response(
+            {
+                'success': False,
+                'message': 'Internal server error',
+                'error': str(e)
+            },
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
 @api_view(['POST'])
 def cancel_shipment(request, reference_number: str):
     try:
@@ -109,4 +229,75 @@ def cancel_shipment(request, reference_number: str):
                 'error_code': 'INTERNAL_ERROR'
             },
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
\ No newline at end of file
+        )
+
+
+@api_view(['POST'])
+def cancel_shipments_bulk(request):
+    serializer = BulkCancellationRequestSerializer(data=request.data)
+    
+    if not serializer.is_valid():
+        return Response(
+            {
+                'success': False,
+                'message': 'Validation failed',
+                'errors': serializer.errors
+            },
+            status=status.HTTP_400_BAD_REQUEST
+        )
+    
+    try:
+        job = CancellationQueueService().enqueue(serializer.validated_data['reference_numbers'])
+        
+        return Response(
+            {
+                'success': True,
+                'message': 'Cancellations queued',
+                'data': job
+            },
+            status=status.HTTP_202_ACCEPTED
+        )
+    
+    except Exception as e:
+        return Response(
+            {
+                'success': False,
+                'message': 'Internal server error',
+                'error': str(e)
+            },
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+
+
+@api_view(['GET'])
+def get_cancellation_job(request, job_id: int):
+    try:
+        job = CancellationQueueService().get_job(job_id)
+        if job is None:
+            return Response(
+                {
+                    'success': False,
+                    'message': 'Cancellation job not found',
+                    'error_code': 'JOB_NOT_FOUND'
+                },
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        return Response(
+            {
+                'success': True,
+                'message': 'Cancellation job retrieved successfully',
+                'data': job
+            },
+            status=status.HTTP_200_OK
+        )
+    
+    except Exception as e:
+        return Response(
+            {
+                'success': False,
+                'message': 'Internal server error',
+                'error': str(e)
+            },
+            status=status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
@@ -1,150 +1,132 @@
 import json
 import logging
-from django.http import JsonResponse
+from django.http import HttpResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.views.decorators.http import require_http_methods
-from django.utils.decorators import method_decorator
-from django.views import View
-from rest_framework.decorators import api_view
-from rest_framework.response import Response
-from rest_framework import status
 
+from .repositories.repository_factory import repositories
 from .services.webhooks import (
-    DHLWebhookParser,
     DHLWebhookValidator,
-    DHLWebhookProcessor
+    WebhookInboxProcessor
 )
 
 logger = logging.getLogger(__name__)
 
 
-@api_view(['POST'])
+# Webhook ingestion is a hot path, so this is a plain Django view rather than a
+# DRF one: the body is decoded once and responses are written as pre-encoded
+# JSON with the same shape DRF rendered.
+def _json_bytes(data) -> bytes:
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _error_body(message: str, error_code: str) -> bytes:
+    return _json_bytes({'success': False, 'message': message, 'error_code': error_code})
+
+
+INVALID_REQUEST_BODY = _error_body('Invalid request or API key', 'INVALID_REQUEST')
+INVALID_JSON_BODY = _error_body('Invalid JSON payload', 'INVALID_JSON')
+INVALID_PAYLOAD_BODY = _error_body('Invalid payload structure', 'INVALID_PAYLOAD')
+PARSE_ERROR_BODY = _error_body('Failed to parse webhook data', 'PARSE_ERROR')
+BATCH_TOO_LARGE_BODY = _error_body(
+    f'A batch may contain at most {DHLWebhookValidator.MAX_BATCH_EVENTS} events',
+    'BATCH_TOO_LARGE'
+)
+INTERNAL_ERROR_BODY = _error_body('Internal server error', 'INTERNAL_ERROR')
+EVENT_ERROR_BODIES = {
+    'INVALID_PAYLOAD': INVALID_PAYLOAD_BODY,
+    'PARSE_ERROR': PARSE_ERROR_BODY
+}
+ACCEPTED_BODY_TEMPLATE = '{"success":true,"message":"Webhook accepted for processing","data":{"inbox_id":%d,"tracking_number":%s}}'
+
+
+def _json_response(body: bytes, status: int) -> HttpResponse:
+    return HttpResponse(body, status=status, content_type='application/json')
+
+
 @csrf_exempt
 def dhl_webhook(request):
+    if request.method != 'POST':
+        return _json_response(_json_bytes({'detail': f'Method "{request.method}" not allowed.'}), 405)
+
     try:
-        logger.info("DHL Webhook: Received webhook request")
-        
-        if not DHLWebhookValidator.validate_request(request):
+        if not DHLWebhookValidator.is_authorized(request):
             logger.warning("DHL Webhook: Request validation failed")
-            return Response(
-                {
-                    'success': False,
-                    'message': 'Invalid request or API key',
-                    'error_code': 'INVALID_REQUEST'
-                },
-                status=status.HTTP_403_FORBIDDEN
-            )
-        
+            return _json_response(INVALID_REQUEST_BODY, 403)
+
         try:
             payload = json.loads(request.body)
-        except json.JSONDecodeError as e:
+        except (json.JSONDecodeError, UnicodeDecodeError) as e:
             logger.error(f"DHL Webhook: JSON decode error: {str(e)}")
-            return Response(
-                {
-                    'success': False,
-                    'message': 'Invalid JSON payload',
-                    'error_code': 'INVALID_JSON'
-                },
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Step 3: Validate the payload
-        if not DHLWebhookValidator.validate_payload(payload):
-            logger.warning("DHL Webhook: Payload validation failed")
-            return Response(
-                {
-                    'success': False,
-                    'message': 'Invalid payload structure',
-                    'error_code': 'INVALID_PAYLOAD'
-                },
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Step 4: Parse webhook data
-        webhook_data = DHLWebhookParser.parse(payload)
-        if not webhook_data:
-            logger.warning("DHL Webhook: Failed to parse webhook data")
-            return Response(
-                {
-                    'success': False,
-                    'message': 'Failed to parse webhook data',
-                    'error_code': 'PARSE_ERROR'
-                },
-                status=status.HTTP_400_BAD_REQUEST
-            )
-        
-        # Step 5: Process the webhook
-        processor = DHLWebhookProcessor()
-        result = processor.process_webhook(webhook_data)
-        
-        if result['success']:
-            logger.info(f"DHL Webhook: Successfully processed webhook for shipment {result.get('reference_number')}")
-            
-            # Check if it's a duplicate or cancelled
-            if result.get('status') == 'duplicate_ignored':
-                return Response(
-                    {
-                        'success': True,
-                        'message': 'Duplicate status ignored',
-                        'data': {
-                            'shipment_id': result.get('shipment_id'),
-                            'reference_number': result.get('reference_number'),
-                            'status_entry_id': result.get('status_entry_id'),
-                            'mapped_status': result.get('mapped_status'),
-                            'status': 'duplicate_ignored'
-                        }
-                    },
-                    status=status.HTTP_200_OK
-                )
-            elif result.get('status') == 'cancelled_ignored':
-                return Response(
-                    {
-                        'success': True,
-                        'message': 'Shipment already cancelled, webhook ignored',
-                        'data': {
-                            'shipment_id': result.get('shipment_id'),
-                            'reference_number': result.get('reference_number'),
-                            'status_entry_id': result.get('status_entry_id'),
-                            'mapped_status': result.get('mapped_status'),
-                            'status': 'cancelled_ignored'
-                        }
-                    },
-                    status=status.HTTP_200_OK
-                )
-            else:
-                return Response(
-                    {
-                        'success': True,
-                        'message': 'Webhook processed successfully',
-                        'data': {
-                            'shipment_id': result.get('shipment_id'),
-                            'reference_number': result.get('reference_number'),
-                            'status_entry_id': result.get('status_entry_id'),
-                            'mapped_status': result.get('mapped_status')
-                        }
-                    },
-                    status=status.HTTP_200_OK
-                )
-        else:
-            logger.warning(f"DHL Webhook: Processing failed: {result.get('message')}")
-            return Response(
-                {
-                    'success': False,
-                    'message': result.get('message'),
-                    'error_code': result.get('error_code')
-                },
-                status=status.HTTP_400_BAD_REQUEST
-            )
-            
+            return _json_response(INVALID_JSON_BODY, 400)
+
+        if isinstance(payload, list):
+            return _queue_event_batch(payload)
+
+        error_code, tracking_number = DHLWebhookValidator.check_event(payload)
+        if error_code:
+            logger.warning(f"DHL Webhook: Rejected webhook ({error_code})")
+            return _json_response(EVENT_ERROR_BODIES[error_code], 400)
+
+        # Append to the inbox; WebhookInboxProcessor applies it asynchronously
+        inbox_entry = repositories.webhook_inbox.append(
+            WebhookInboxProcessor.COURIER,
+            payload,
+            WebhookInboxProcessor.lane_hash(tracking_number)
+        )
+        logger.info(f"DHL Webhook: Queued webhook {inbox_entry.id} for tracking number {tracking_number}")
+
+        body = ACCEPTED_BODY_TEMPLATE % (inbox_entry.id, json.dumps(tracking_number, ensure_ascii=False))
+        return _json_response(body.encode('utf-8'), 202)
+
     except Exception as e:
         logger.error(f"DHL Webhook: Unexpected error: {str(e)}")
-        return Response(
-            {
-                'success': False,
-                'message': 'Internal server error',
-                'error_code': 'INTERNAL_ERROR'
-            },
-            status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
+        return _json_response(INTERNAL_ERROR_BODY, 500)
+
+
+def _queue_event_batch(events):
+    """Validate an array of webhook events in one pass, then queue the valid ones with one insert."""
+    if not events:
+        return _json_response(INVALID_PAYLOAD_BODY, 400)
+
+    if len(events) > DHLWebhookValidator.MAX_BATCH_EVENTS:
+        return _json_response(BATCH_TOO_LARGE_BODY, 400)
+
+    results = []
+    accepted = []
+    for index, event in enumerate(events):
+        error_code, tracking_number = DHLWebhookValidator.check_event(event)
+        if error_code:
+            results.append({'index': index, 'success': False, 'error_code': error_code})
+        else:
+            result = {'index': index, 'success': True, 'tracking_number': tracking_number}
+            results.append(result)
+            accepted.append((event, result))
+
+    if not accepted:
+        logger.warning(f"DHL Webhook: Rejected all {len(events)} events of batch")
+        return _json_response(_json_bytes({
+            'success': False,
+            'message': 'No valid events in batch',
+            'error_code': 'INVALID_PAYLOAD',
+            'data': {'results': results}
+        }), 400)
 
+    inbox_entries = repositories.webhook_inbox.append_many(
+        WebhookInboxProcessor.COURIER,
+        [event for event, _ in accepted],
+        [WebhookInboxProcessor.lane_hash(result['tracking_number']) for _, result in accepted]
+    )
+    for (_, result), inbox_entry in zip(accepted, inbox_entries):
+        result['inbox_id'] = inbox_entry.id
 
+    logger.info(f"DHL Webhook: Queued {len(accepted)} of {len(events)} batched events")
+    return _json_response(_json_bytes({
+        'success': True,
+        'message': 'Webhook batch accepted for processing',
+        'data': {
+            'total': len(events),
+            'accepted': len(accepted),
+            'rejected': len(events) - len(accepted),
+            'results': results
+        }
+    }), 202)